@@ -7,54 +7,61 @@ Compila código Apollo para LLVM IR
 import sys
 import os
 import argparse
-from typing import Optional
+import mmap
+import shutil
+import tempfile
+from typing import List, Optional, TextIO, Union
 
 # Adiciona diretório raiz ao path
 root_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, root_dir)
 
-from lexer.apollo_lexer import ApolloLexer
+from lexer.apollo_lexer import ApolloLexer, BytesLike, LexicalError
 from parser.parser import ApolloParser, ParseError
+from parser.ast import Program, VarDeclaration, symbol_key
+from parser.ast_cache import ASTCache
 from semantic.semantic_analyzer import SemanticAnalyzer
 from codegen.llvm_generator import LLVMGenerator
 
+# Capacidade da janela de tokens do modo em fluxo
+STREAM_WINDOW = 64
 
-def compile_apollo(source_code: str, output_file: Optional[str] = None, verbose: bool = False) -> bool:
+
+def compile_apollo(source_code: Union[str, BytesLike], output_file: Optional[str] = None, verbose: bool = False,
+                   max_errors: Optional[int] = None, stream: bool = False,
+                   ast_cache: Optional[ASTCache] = None) -> bool:
     """
     Compila código Apollo para LLVM IR
     
     Args:
-        source_code: Código-fonte Apollo
+        source_code: Código-fonte Apollo (texto, ou bytes em UTF-8 como um arquivo mapeado com mmap)
         output_file: Arquivo de saída (opcional)
         verbose: Mostra informações detalhadas
+        max_errors: Interrompe a análise léxica após esse número de erros léxicos, e o
+            parsing após esse número de erros de sintaxe (opcional)
+        stream: Compila em fluxo (ver `compile_apollo_stream`)
+        ast_cache: Cache de ASTs: código já compilado pula as análises léxica e sintática
     
     Returns:
         True se compilação foi bem-sucedida, False caso contrário
     """
+    if stream:
+        return compile_apollo_stream(source_code, output_file, verbose, max_errors)
     try:
-        # 1. Análise Léxica
-        if verbose:
-            print("=== Análise Léxica ===")
-        
-        lexer = ApolloLexer()
-        tokens = lexer.tokenize(source_code)
-        
-        if verbose:
-            print(f"Tokens reconhecidos: {len(tokens)}")
-            for token in tokens[:10]:  # Mostra primeiros 10
-                print(f"  {token}")
-            if len(tokens) > 10:
-                print(f"  ... e mais {len(tokens) - 10} tokens")
-        
-        # 2. Análise Sintática
-        if verbose:
-            print("\n=== Análise Sintática ===")
+        lexer = ApolloLexer(max_errors=max_errors)
+        key = ast = None
+        if ast_cache is not None:
+            key = ast_cache.key(source_code)
+            ast = ast_cache.load(key, lexer.interner)
+            if ast is not None and verbose:
+                print(f"AST carregada do cache: {ast}")
         
-        parser = ApolloParser(lexer)
-        ast = parser.parse(source_code)
-        
-        if verbose:
-            print(f"AST criada: {ast}")
+        if ast is None:
+            ast = _parse_source(lexer, source_code, verbose, max_errors)
+            if ast is None:
+                return False
+            if ast_cache is not None:
+                ast_cache.store(key, ast)
         
         # 3. Análise Semântica
         if verbose:
@@ -78,9 +85,10 @@ def compile_apollo(source_code: str, output_file: Optional[str] = None, verbose:
         
         codegen = LLVMGenerator()
         # passa a tabela de símbolos global do analisador semântico para o gerador
+        # (chaveada pelos ids internados dos nomes)
         symbol_table = {}
         if semantic_analyzer.current_scope:
-            symbol_table = {name: sym.var_type for name, sym in semantic_analyzer.current_scope.symbols.items()}
+            symbol_table = {key: sym.var_type for key, sym in semantic_analyzer.current_scope.symbols.items()}
         llvm_ir = codegen.generate(ast, symbol_table)
         
         # 5. Saída
@@ -94,6 +102,9 @@ def compile_apollo(source_code: str, output_file: Optional[str] = None, verbose:
         
         return True
     
+    except LexicalError as e:
+        print(f"Erro léxico: {e.message} (linha {e.line}, coluna {e.column})")
+        return False
     except ParseError as e:
         print(f"Erro de parsing: {e}")
         return False
@@ -104,6 +115,161 @@ def compile_apollo(source_code: str, output_file: Optional[str] = None, verbose:
         return False
 
 
+def _parse_source(lexer: ApolloLexer, source_code: Union[str, BytesLike], verbose: bool,
+                  max_errors: Optional[int]) -> Optional[Program]:
+    """Análises léxica e sintática de `compile_apollo`; None se houve erros de sintaxe"""
+    # 1. Análise Léxica
+    if verbose:
+        print("=== Análise Léxica ===")
+    
+    # O código é tokenizado uma única vez: o mesmo buffer serve para a
+    # listagem abaixo e para o parser
+    if isinstance(source_code, str):
+        tokens = lexer.tokenize_compact(source_code)
+    else:
+        tokens = lexer.tokenize_bytes(source_code)
+    
+    if verbose:
+        print(f"Tokens reconhecidos: {len(tokens)}")
+        for index in range(min(10, len(tokens))):  # Mostra primeiros 10
+            print(f"  {tokens[index]}")
+        if len(tokens) > 10:
+            print(f"  ... e mais {len(tokens) - 10} tokens")
+    
+    # 2. Análise Sintática
+    if verbose:
+        print("\n=== Análise Sintática ===")
+    
+    # Com recuperação de erros, todos os erros de sintaxe do arquivo
+    # saem numa única passada
+    parser = ApolloParser(lexer, recover=True, max_errors=max_errors)
+    ast = parser.parse_tokens(tokens)
+    
+    if parser.errors:
+        report_parse_errors(parser.errors)
+        return None
+    
+    if verbose:
+        print(f"AST criada: {ast}")
+    
+    return ast
+
+
+def report_parse_errors(errors: List[ParseError]):
+    print("Erros de parsing encontrados:")
+    for error in errors:
+        print(f"  {error}")
+
+
+def compile_apollo_stream(source_code: Union[str, BytesLike], output_file: Optional[str] = None,
+                          verbose: bool = False, max_errors: Optional[int] = None) -> bool:
+    """
+    Compila código Apollo para LLVM IR em fluxo, comando a comando
+    
+    Cada declaração ou comando do nível do programa é verificado contra o
+    escopo global acumulado e tem seu IR gravado assim que o parser o
+    reconhece; a AST dele é descartada em seguida. A memória usada não
+    cresce com o tamanho do programa (só com o aninhamento e o número de
+    variáveis e strings). Diferente de `compile_apollo`, as declarações são
+    processadas na ordem do código: uma variável precisa ser declarada antes
+    de ser usada.
+    
+    O IR vai para um arquivo temporário, que só vira output_file (ou é
+    impresso) se a compilação terminar sem erros. Argumentos e retorno como
+    em `compile_apollo`.
+    """
+    directory = os.path.dirname(os.path.abspath(output_file)) if output_file else None
+    temp_path = None
+    try:
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=directory, suffix='.ll',
+                                         delete=False) as ir:
+            temp_path = ir.name
+            success = _compile_stream_to(ir, source_code, verbose, max_errors)
+        
+        if not success:
+            return False
+        if output_file:
+            os.replace(temp_path, output_file)
+            print(f"Código LLVM IR gerado em: {output_file}")
+        else:
+            print("\n=== Código LLVM IR ===")
+            with open(temp_path, encoding='utf-8') as ir:
+                shutil.copyfileobj(ir, sys.stdout)
+            print()
+        return True
+    
+    except LexicalError as e:
+        print(f"Erro léxico: {e.message} (linha {e.line}, coluna {e.column})")
+        return False
+    except ParseError as e:
+        print(f"Erro de parsing: {e}")
+        return False
+    except Exception as e:
+        print(f"Erro inesperado: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        if temp_path and os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def _compile_stream_to(ir: TextIO, source_code: Union[str, BytesLike], verbose: bool,
+                       max_errors: Optional[int]) -> bool:
+    """Laço do modo em fluxo: parser, análise semântica e geração por comando"""
+    if verbose:
+        print("=== Compilação em fluxo ===")
+    
+    lexer = ApolloLexer(max_errors=max_errors)
+    parser = ApolloParser(lexer, window=STREAM_WINDOW, recover=True, max_errors=max_errors)
+    semantic_analyzer = SemanticAnalyzer()
+    semantic_analyzer.start()
+    # Tabela de tipos do gerador, preenchida à medida que as declarações
+    # passam pela análise semântica
+    symbol_table = {}
+    codegen = LLVMGenerator()
+    codegen.start(symbol_table)
+    
+    separator = ""
+    errors = []
+    items = 0
+    for item in parser.iter_parse(source_code):
+        items += 1
+        item_errors = semantic_analyzer.analyze_item(item)
+        if item_errors:
+            errors.extend(item_errors)
+        if isinstance(item, VarDeclaration):
+            key = symbol_key(item.name, item.name_id)
+            symbol = semantic_analyzer.current_scope.symbols.get(key)
+            if symbol is not None:
+                symbol_table[key] = symbol.var_type
+        if errors or parser.errors:
+            # Depois do primeiro erro só a análise continua, para relatar todos
+            continue
+        codegen.generate_item(item)
+        for line in codegen.take_code():
+            ir.write(separator + line)
+            separator = "\n"
+    
+    if parser.errors:
+        report_parse_errors(parser.errors)
+        return False
+    if errors:
+        print("Erros semânticos encontrados:")
+        for error in errors:
+            print(f"  {error}")
+        return False
+    
+    codegen.finish()
+    for line in codegen.take_code():
+        ir.write(separator + line)
+        separator = "\n"
+    
+    if verbose:
+        print(f"Declarações e comandos compilados: {items}")
+    return True
+
+
 def main():
     """Função principal"""
     parser = argparse.ArgumentParser(
@@ -114,19 +280,31 @@ Exemplos:
   python apollo_compiler.py programa.apl
   python apollo_compiler.py programa.apl -o programa.ll
   python apollo_compiler.py programa.apl -v
+  python apollo_compiler.py programa.apl --stream -o programa.ll
+  python apollo_compiler.py programa.apl --cache
         """
     )
     
     parser.add_argument('input_file', help='Arquivo de entrada (.apl)')
     parser.add_argument('-o', '--output', help='Arquivo de saída (.ll)')
     parser.add_argument('-v', '--verbose', action='store_true', help='Modo verboso')
+    parser.add_argument('--max-errors', type=int, metavar='N',
+                        help='Interrompe a compilação após N erros léxicos ou de sintaxe')
+    parser.add_argument('--stream', action='store_true',
+                        help='Compila comando a comando, com memória constante')
+    parser.add_argument('--cache', action='store_true',
+                        help='Reaproveita a AST de compilações anteriores do mesmo código')
     
     args = parser.parse_args()
     
-    # Lê arquivo de entrada
+    # Mapeia o arquivo de entrada na memória: o lexer lê os bytes direto do
+    # mapeamento, e as páginas só são carregadas quando o scanner chega nelas
     try:
-        with open(args.input_file, 'r', encoding='utf-8') as f:
-            source_code = f.read()
+        with open(args.input_file, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                source_code = b''  # mmap não aceita arquivos vazios
+            else:
+                source_code = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
     except FileNotFoundError:
         print(f"Erro: Arquivo '{args.input_file}' não encontrado")
         sys.exit(1)
@@ -135,7 +313,12 @@ Exemplos:
         sys.exit(1)
     
     # Compila
-    success = compile_apollo(source_code, args.output, args.verbose)
+    try:
+        ast_cache = ASTCache() if args.cache else None
+        success = compile_apollo(source_code, args.output, args.verbose, args.max_errors, args.stream, ast_cache)
+    finally:
+        if isinstance(source_code, mmap.mmap):
+            source_code.close()
     
     sys.exit(0 if success else 1)
 
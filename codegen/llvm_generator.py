@@ -3,16 +3,63 @@ Gerador de Código LLVM IR para a linguagem Apollo
 Converte a AST em código LLVM IR
 """
 
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional, Union
 from parser.ast import (
     ASTNode, Program, VarDeclaration, Assignment, IfStatement, WhileStatement,
     WriteStatement, ReadNumberStatement, ReadTextStatement,
     BinaryOp, UnaryOp, IntegerLiteral, RealLiteral, StringLiteral,
-    BooleanLiteral, Variable, FunctionCall, Type
+    BooleanLiteral, Variable, FunctionCall, Type, symbol_key
 )
+from parser.arena import node_key
+from parser.visitor import ASTVisitor
 
 
-class LLVMGenerator:
+class TypeInference(ASTVisitor):
+    """
+    Tipos das expressões de uma árvore que não passou pela análise
+    semântica, com as mesmas regras dela. As subexpressões são consultadas
+    pelo gerador (`get_expression_type`), que guarda o que já foi inferido.
+    """
+    
+    def __init__(self, generator: 'LLVMGenerator'):
+        self.generator = generator
+    
+    def visit_integer_literal(self, lit: IntegerLiteral) -> Type:
+        return Type.INTEGER
+    
+    def visit_real_literal(self, lit: RealLiteral) -> Type:
+        return Type.REAL
+    
+    def visit_string_literal(self, lit: StringLiteral) -> Type:
+        return Type.TEXT
+    
+    def visit_boolean_literal(self, lit: BooleanLiteral) -> Type:
+        return Type.BOOLEAN
+    
+    def visit_function_call(self, call: FunctionCall) -> Type:
+        if call.name == "leia_texto":
+            return Type.TEXT
+        return Type.INTEGER
+    
+    def visit_variable(self, var: Variable) -> Type:
+        return self.generator.var_type(var.name, var.name_id)
+    
+    def visit_binary_op(self, op: BinaryOp) -> Type:
+        if op.operator in ("+", "-", "*", "/"):
+            get_type = self.generator.get_expression_type
+            if Type.REAL in (get_type(op.left), get_type(op.right)):
+                return Type.REAL
+            return Type.INTEGER
+        return Type.BOOLEAN
+    
+    def visit_unary_op(self, op: UnaryOp) -> Type:
+        return self.generator.get_expression_type(op.operand)
+    
+    def generic_visit(self, node: ASTNode) -> Type:
+        return Type.INTEGER  # Tipo padrão
+
+
+class LLVMGenerator(ASTVisitor):
     """Gerador de código LLVM IR"""
     
     def __init__(self):
@@ -20,19 +67,38 @@ class LLVMGenerator:
         self.variable_counter = 0
         self.label_counter = 0
         self.string_counter = 0
-        self.variables: Dict[str, str] = {}  # nome -> registro LLVM
+        self.variables: Dict[Union[int, str], str] = {}  # id do nome (ou nome) -> registro LLVM
         self.strings: Dict[str, str] = {}  # valor -> nome global
+        self.inferred_types: Dict[Any, Type] = {}  # tipos inferidos de expressões não anotadas, por node_key
+        self.type_inference = TypeInference(self)
     
-    def generate(self, program: Program, symbol_table: Optional[Dict[str, Type]] = None) -> str:
+    def generate(self, program: Program, symbol_table: Optional[Dict[Union[int, str], Type]] = None) -> str:
         """Gera código LLVM IR para o programa"""
+        self.start(symbol_table)
+        
+        # Gera código para declarações
+        for decl in program.declarations:
+            self.visit_var_declaration(decl)
+        
+        # Gera código para statements
+        for stmt in program.statements:
+            self.visit_statement(stmt)
+        
+        self.finish()
+        return "\n".join(self.code)
+    
+    def start(self, symbol_table: Optional[Dict[Union[int, str], Type]] = None):
+        """Reinicia o gerador e emite o cabeçalho e a abertura da função main"""
         self.code = []
         self.variable_counter = 0
         self.label_counter = 0
         self.string_counter = 0
         self.variables = {}
         self.strings = {}
-        # tabela de tipos das variáveis (nome -> Type)
-        self.symbol_table: Dict[str, Type] = symbol_table or {}
+        self.inferred_types = {}
+        # tabela de tipos das variáveis (id do nome ou nome -> Type),
+        # com as mesmas chaves de `Scope.symbols`
+        self.symbol_table: Dict[Union[int, str], Type] = symbol_table if symbol_table is not None else {}
         
         # Cabeçalho
         self.code.append("; Código LLVM IR gerado para Apollo")
@@ -46,15 +112,13 @@ class LLVMGenerator:
         # Função main
         self.code.append("define i32 @main() {")
         self.code.append("entry:")
-        
-        # Gera código para declarações
-        for decl in program.declarations:
-            self.visit_var_declaration(decl)
-        
-        # Gera código para statements
-        for stmt in program.statements:
-            self.visit_statement(stmt)
-        
+    
+    def generate_item(self, item: ASTNode):
+        """Geração em fluxo: emite o código de uma declaração ou comando do nível do programa"""
+        self.visit(item)
+    
+    def finish(self):
+        """Fecha a função main e emite as strings globais"""
         # Retorno
         self.code.append("  ret i32 0")
         self.code.append("}")
@@ -63,8 +127,12 @@ class LLVMGenerator:
         # Adiciona strings globais
         for value, name in self.strings.items():
             self.code.append(f"{name} = private unnamed_addr constant [{len(value) + 1} x i8] c\"{self.escape_string(value)}\\00\"")
-        
-        return "\n".join(self.code)
+    
+    def take_code(self) -> List[str]:
+        """Linhas emitidas desde a última chamada (o gerador as esquece)"""
+        lines = self.code
+        self.code = []
+        return lines
     
     def new_register(self) -> str:
         """Gera um novo registro temporário"""
@@ -90,25 +158,21 @@ class LLVMGenerator:
             self.strings[value] = name
         return self.strings[value]
     
+    def var_type(self, name: str, name_id: int = -1) -> Type:
+        """Tipo da variável na tabela de símbolos (inteiro se desconhecida)"""
+        var_type = self.symbol_table.get(symbol_key(name, name_id))
+        if var_type is None:
+            var_type = self.symbol_table.get(name, Type.INTEGER)
+        return var_type
+    
     def visit_statement(self, stmt: ASTNode):
         """Visita um statement"""
-        if isinstance(stmt, Assignment):
-            self.visit_assignment(stmt)
-        elif isinstance(stmt, IfStatement):
-            self.visit_if_statement(stmt)
-        elif isinstance(stmt, WhileStatement):
-            self.visit_while_statement(stmt)
-        elif isinstance(stmt, WriteStatement):
-            self.visit_write_statement(stmt)
-        elif isinstance(stmt, ReadNumberStatement):
-            self.visit_read_number_statement(stmt)
-        elif isinstance(stmt, ReadTextStatement):
-            self.visit_read_text_statement(stmt)
+        self.visit(stmt)
     
     def visit_var_declaration(self, decl: VarDeclaration):
         """Visita uma declaração de variável"""
         reg = self.new_register()
-        self.variables[decl.name] = reg
+        self.variables[symbol_key(decl.name, decl.name_id)] = reg
         
         # Inicializa com zero
         if decl.var_type == Type.INTEGER:
@@ -126,21 +190,23 @@ class LLVMGenerator:
         
         if decl.initial_value:
             value_reg = self.visit_expression(decl.initial_value)
+            if decl.var_type == Type.REAL:
+                value_reg = self.promote(decl.initial_value, value_reg)
             llvm_type = self.get_llvm_type(decl.var_type)
             self.code.append(f"  store {llvm_type} {value_reg}, {llvm_type}* {reg}")
     
     def visit_assignment(self, assign: Assignment):
         """Visita uma atribuição"""
-        if assign.variable not in self.variables:
+        key = symbol_key(assign.variable, assign.name_id)
+        var_reg = self.variables.get(key)
+        if var_reg is None:
             # Variável não declarada, cria automaticamente (para compatibilidade)
-            reg = self.new_register()
-            self.variables[assign.variable] = reg
+            var_reg = self.new_register()
+            self.variables[key] = var_reg
             # usa tipo da tabela de símbolos se disponível
-            var_type = self.symbol_table.get(assign.variable, Type.INTEGER)
+            var_type = self.var_type(assign.variable, assign.name_id)
             llvm_type = self.get_llvm_type(var_type)
-            self.code.append(f"  {reg} = alloca {llvm_type}")
-        
-        var_reg = self.variables[assign.variable]
+            self.code.append(f"  {var_reg} = alloca {llvm_type}")
         
         # Trata leia_numero() e leia_texto() como chamadas especiais
         if isinstance(assign.value, FunctionCall):
@@ -159,7 +225,9 @@ class LLVMGenerator:
         
         value_reg = self.visit_expression(assign.value)
         # determina tipo da variável a partir da tabela de símbolos
-        var_type = self.symbol_table.get(assign.variable, Type.INTEGER)
+        var_type = self.var_type(assign.variable, assign.name_id)
+        if var_type == Type.REAL:
+            value_reg = self.promote(assign.value, value_reg)
         llvm_type = self.get_llvm_type(var_type)
         self.code.append(f"  store {llvm_type} {value_reg}, {llvm_type}* {var_reg}")
     
@@ -243,12 +311,13 @@ class LLVMGenerator:
     
     def visit_read_number_statement(self, stmt: ReadNumberStatement):
         """Visita um comando leia_numero"""
-        if stmt.variable not in self.variables:
-            reg = self.new_register()
-            self.variables[stmt.variable] = reg
-            self.code.append(f"  {reg} = alloca i32")
+        key = symbol_key(stmt.variable, stmt.name_id)
+        var_reg = self.variables.get(key)
+        if var_reg is None:
+            var_reg = self.new_register()
+            self.variables[key] = var_reg
+            self.code.append(f"  {var_reg} = alloca i32")
         
-        var_reg = self.variables[stmt.variable]
         format_str = self.get_string_global("%d")
         format_reg = self.new_register()
         self.code.append(f"  {format_reg} = getelementptr inbounds [2 x i8], [2 x i8]* {format_str}, i32 0, i32 0")
@@ -256,12 +325,13 @@ class LLVMGenerator:
     
     def visit_read_text_statement(self, stmt: ReadTextStatement):
         """Visita um comando leia_texto"""
-        if stmt.variable not in self.variables:
-            reg = self.new_register()
-            self.variables[stmt.variable] = reg
-            self.code.append(f"  {reg} = alloca i8*")
+        key = symbol_key(stmt.variable, stmt.name_id)
+        var_reg = self.variables.get(key)
+        if var_reg is None:
+            var_reg = self.new_register()
+            self.variables[key] = var_reg
+            self.code.append(f"  {var_reg} = alloca i8*")
         
-        var_reg = self.variables[stmt.variable]
         format_str = self.get_string_global("%s")
         format_reg = self.new_register()
         self.code.append(f"  {format_reg} = getelementptr inbounds [2 x i8], [2 x i8]* {format_str}, i32 0, i32 0")
@@ -269,51 +339,52 @@ class LLVMGenerator:
     
     def visit_expression(self, expr: ASTNode) -> str:
         """Visita uma expressão e retorna o registro LLVM"""
-        if isinstance(expr, IntegerLiteral):
-            return str(expr.value)
-        elif isinstance(expr, RealLiteral):
-            # Representação literal para double
-            return str(expr.value)
-        elif isinstance(expr, StringLiteral):
-            str_global = self.get_string_global(expr.value)
+        reg = self.visit(expr)
+        return "0" if reg is None else reg
+    
+    def visit_integer_literal(self, lit: IntegerLiteral) -> str:
+        return str(lit.value)
+    
+    def visit_real_literal(self, lit: RealLiteral) -> str:
+        # Representação literal para double
+        return str(lit.value)
+    
+    def visit_string_literal(self, lit: StringLiteral) -> str:
+        str_global = self.get_string_global(lit.value)
+        reg = self.new_register()
+        self.code.append(f"  {reg} = getelementptr inbounds [{len(lit.value) + 1} x i8], [{len(lit.value) + 1} x i8]* {str_global}, i32 0, i32 0")
+        return reg
+    
+    def visit_boolean_literal(self, lit: BooleanLiteral) -> str:
+        return "1" if lit.value else "0"
+    
+    def visit_variable(self, var: Variable) -> str:
+        """Carrega o valor de uma variável"""
+        key = symbol_key(var.name, var.name_id)
+        var_type = self.var_type(var.name, var.name_id)
+        var_reg = self.variables.get(key)
+        if var_reg is None:
+            # Variável não declarada, cria automaticamente com tipo da tabela
             reg = self.new_register()
-            self.code.append(f"  {reg} = getelementptr inbounds [{len(expr.value) + 1} x i8], [{len(expr.value) + 1} x i8]* {str_global}, i32 0, i32 0")
-            return reg
-        elif isinstance(expr, BooleanLiteral):
-            return "1" if expr.value else "0"
-        elif isinstance(expr, FunctionCall):
-            return self.visit_function_call(expr)
-        elif isinstance(expr, Variable):
-            if expr.name not in self.variables:
-                # Variável não declarada, cria automaticamente com tipo da tabela
-                reg = self.new_register()
-                self.variables[expr.name] = reg
-                var_type = self.symbol_table.get(expr.name, Type.INTEGER)
-                llvm_type = self.get_llvm_type(var_type)
-                self.code.append(f"  {reg} = alloca {llvm_type}")
-                # inicializa com zero de acordo com tipo
-                if var_type == Type.INTEGER:
-                    self.code.append(f"  store i32 0, i32* {reg}")
-                elif var_type == Type.REAL:
-                    self.code.append(f"  store double 0.0, double* {reg}")
-                elif var_type == Type.TEXT:
-                    self.code.append(f"  store i8* null, i8** {reg}")
-                elif var_type == Type.BOOLEAN:
-                    self.code.append(f"  store i1 false, i1* {reg}")
-
-            var_reg = self.variables[expr.name]
-            # carrega de acordo com tipo
-            var_type = self.symbol_table.get(expr.name, Type.INTEGER)
+            self.variables[key] = reg
             llvm_type = self.get_llvm_type(var_type)
-            load_reg = self.new_register()
-            self.code.append(f"  {load_reg} = load {llvm_type}, {llvm_type}* {var_reg}")
-            return load_reg
-        elif isinstance(expr, BinaryOp):
-            return self.visit_binary_op(expr)
-        elif isinstance(expr, UnaryOp):
-            return self.visit_unary_op(expr)
-        else:
-            return "0"
+            self.code.append(f"  {reg} = alloca {llvm_type}")
+            # inicializa com zero de acordo com tipo
+            if var_type == Type.INTEGER:
+                self.code.append(f"  store i32 0, i32* {reg}")
+            elif var_type == Type.REAL:
+                self.code.append(f"  store double 0.0, double* {reg}")
+            elif var_type == Type.TEXT:
+                self.code.append(f"  store i8* null, i8** {reg}")
+            elif var_type == Type.BOOLEAN:
+                self.code.append(f"  store i1 false, i1* {reg}")
+
+            var_reg = reg
+        # carrega de acordo com tipo
+        llvm_type = self.get_llvm_type(var_type)
+        load_reg = self.new_register()
+        self.code.append(f"  {load_reg} = load {llvm_type}, {llvm_type}* {var_reg}")
+        return load_reg
     
     def visit_function_call(self, call: FunctionCall) -> str:
         """Visita uma chamada de função"""
@@ -336,6 +407,9 @@ class LLVMGenerator:
 
         # se algum for real, promovemos para real
         is_real = left_type == Type.REAL or right_type == Type.REAL
+        if is_real:
+            left_reg = self.promote(op.left, left_reg)
+            right_reg = self.promote(op.right, right_reg)
 
         # Operadores aritméticos
         if op.operator in ("+", "-", "*", "/"):
@@ -378,18 +452,20 @@ class LLVMGenerator:
                 elif op.operator == ">=":
                     self.code.append(f"  {cmp_reg} = fcmp oge double {left_reg}, {right_reg}")
             else:
+                # inteiros (i32); == e != também comparam lógicos (i1) e textos (i8*)
+                operand_type = self.get_llvm_type(left_type)
                 if op.operator == "==":
-                    self.code.append(f"  {cmp_reg} = icmp eq i32 {left_reg}, {right_reg}")
+                    self.code.append(f"  {cmp_reg} = icmp eq {operand_type} {left_reg}, {right_reg}")
                 elif op.operator == "!=":
-                    self.code.append(f"  {cmp_reg} = icmp ne i32 {left_reg}, {right_reg}")
+                    self.code.append(f"  {cmp_reg} = icmp ne {operand_type} {left_reg}, {right_reg}")
                 elif op.operator == "<":
-                    self.code.append(f"  {cmp_reg} = icmp slt i32 {left_reg}, {right_reg}")
+                    self.code.append(f"  {cmp_reg} = icmp slt {operand_type} {left_reg}, {right_reg}")
                 elif op.operator == ">":
-                    self.code.append(f"  {cmp_reg} = icmp sgt i32 {left_reg}, {right_reg}")
+                    self.code.append(f"  {cmp_reg} = icmp sgt {operand_type} {left_reg}, {right_reg}")
                 elif op.operator == "<=":
-                    self.code.append(f"  {cmp_reg} = icmp sle i32 {left_reg}, {right_reg}")
+                    self.code.append(f"  {cmp_reg} = icmp sle {operand_type} {left_reg}, {right_reg}")
                 elif op.operator == ">=":
-                    self.code.append(f"  {cmp_reg} = icmp sge i32 {left_reg}, {right_reg}")
+                    self.code.append(f"  {cmp_reg} = icmp sge {operand_type} {left_reg}, {right_reg}")
             # cmp_reg é i1
             return cmp_reg
 
@@ -412,37 +488,42 @@ class LLVMGenerator:
         result_reg = self.new_register()
         
         if op.operator == "-":
-            self.code.append(f"  {result_reg} = sub i32 0, {operand_reg}")
+            if self.get_expression_type(op.operand) == Type.REAL:
+                self.code.append(f"  {result_reg} = fneg double {operand_reg}")
+            else:
+                self.code.append(f"  {result_reg} = sub i32 0, {operand_reg}")
         else:
             result_reg = operand_reg
         
         return result_reg
     
+    def promote(self, expr: ASTNode, value_reg: str) -> str:
+        """Valor de expr como double: inteiros são convertidos (promoção inteiro -> real)"""
+        if self.get_expression_type(expr) != Type.INTEGER:
+            return value_reg
+        result_reg = self.new_register()
+        self.code.append(f"  {result_reg} = sitofp i32 {value_reg} to double")
+        return result_reg
+    
     def get_expression_type(self, expr: ASTNode) -> Type:
-        """Retorna o tipo de uma expressão"""
-        if isinstance(expr, IntegerLiteral):
-            return Type.INTEGER
-        elif isinstance(expr, RealLiteral):
-            return Type.REAL
-        elif isinstance(expr, StringLiteral):
-            return Type.TEXT
-        elif isinstance(expr, BooleanLiteral):
-            return Type.BOOLEAN
-        elif isinstance(expr, FunctionCall):
-            if expr.name == "leia_numero":
-                return Type.INTEGER
-            elif expr.name == "leia_texto":
-                return Type.TEXT
-            return Type.INTEGER
-        elif isinstance(expr, Variable):
-            # Assume INTEGER por padrão (deveria usar tabela de símbolos)
-            return Type.INTEGER
-        elif isinstance(expr, BinaryOp):
-            if expr.operator in ("==", "!=", "<", ">", "<=", ">="):
-                return Type.BOOLEAN
-            return Type.INTEGER
-        else:
-            return Type.INTEGER
+        """
+        Retorna o tipo de uma expressão: o anotado pela análise semântica
+        (`resolved_type`) ou, numa árvore não analisada, o inferido aqui. A
+        inferência depende da tabela de símbolos desta geração, então fica
+        guardada no gerador (e não no nó) até o próximo `start`, pela chave
+        estável do nó (as visões da arena são objetos novos a cada acesso)
+        """
+        expr_type = expr.resolved_type
+        if expr_type is None:
+            key = node_key(expr)
+            expr_type = self.inferred_types.get(key)
+            if expr_type is None:
+                expr_type = self.inferred_types[key] = self.infer_expression_type(expr)
+        return expr_type
+    
+    def infer_expression_type(self, expr: ASTNode) -> Type:
+        """Tipo de uma expressão não anotada, com as regras da análise semântica"""
+        return self.type_inference.visit(expr)
     
     def get_llvm_type(self, var_type: Type) -> str:
         """Converte tipo Apollo para tipo LLVM"""
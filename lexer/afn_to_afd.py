@@ -32,13 +32,15 @@ class AFN:
         return result
 
 class AFD:
-    def __init__(self, estados, alfabeto, transicoes, estado_inicial, estados_finais):
+    def __init__(self, estados, alfabeto, transicoes, estado_inicial, estados_finais, subconjuntos=None):
         # Inicializa o AFD com seus componentes
         self.estados = estados
         self.alfabeto = alfabeto
         self.transicoes = transicoes  # dict: (estado, simbolo) -> estado
         self.estado_inicial = estado_inicial
         self.estados_finais = estados_finais
+        # dict: estado do AFD -> frozenset de estados do AFN que ele representa
+        self.subconjuntos = subconjuntos or {}
 
 
 def afn_para_afd(afn):
@@ -82,9 +84,198 @@ def afn_para_afd(afn):
         alfabeto=alfabeto,
         transicoes=transicoes,
         estado_inicial=mapeamento[estado_inicial],
-        estados_finais=estados_finais
+        estados_finais=estados_finais,
+        subconjuntos={nome: conjunto for conjunto, nome in mapeamento.items()}
+    )
+
+
+def afn_para_afd_bitset(afn):
+    """
+    Mesmo AFD de `afn_para_afd` (mesmos nomes, transições e subconjuntos),
+    com os conjuntos de estados do AFN representados como inteiros: o bit i
+    indica o i-ésimo estado. O fechamento-ε de cada estado é calculado uma
+    única vez, e o passo de cada estado por símbolo já inclui o fechamento
+    dos destinos. Como só importam os estados que têm transição pelo
+    símbolo, o resultado do passo é memorizado por (parte relevante do
+    conjunto, símbolo), reaproveitado entre conjuntos diferentes.
+    """
+    alfabeto = [s for s in afn.alfabeto if s != '']
+    lista = list(afn.estados)
+    vistos = set(lista)
+    for (estado, _), destinos in afn.transicoes.items():
+        for e in [estado, *destinos]:
+            if e not in vistos:
+                vistos.add(e)
+                lista.append(e)
+    if afn.estado_inicial not in vistos:
+        lista.append(afn.estado_inicial)
+    indice = {e: i for i, e in enumerate(lista)}
+
+    # Fechamento-ε de cada estado, como bits
+    vazio = set()
+    fecho = []
+    for e in lista:
+        bits = 1 << indice[e]
+        pilha = [e]
+        while pilha:
+            for prox in afn.transicoes.get((pilha.pop(), ''), vazio):
+                bit = 1 << indice[prox]
+                if not bits & bit:
+                    bits |= bit
+                    pilha.append(prox)
+        fecho.append(bits)
+
+    # passo[simbolo][i]: fechamento-ε dos destinos do estado i pelo símbolo;
+    # relevantes[simbolo]: estados que têm alguma transição pelo símbolo
+    passo = {s: {} for s in alfabeto}
+    relevantes = dict.fromkeys(alfabeto, 0)
+    for (estado, simbolo), destinos in afn.transicoes.items():
+        if simbolo not in passo or not destinos:
+            continue
+        i = indice[estado]
+        bits = passo[simbolo].get(i, 0)
+        for prox in destinos:
+            bits |= fecho[indice[prox]]
+        passo[simbolo][i] = bits
+        relevantes[simbolo] |= 1 << i
+
+    memo = {}
+
+    def mover(conjunto, simbolo):
+        parte = conjunto & relevantes[simbolo]
+        chave = (parte, simbolo)
+        resultado = memo.get(chave)
+        if resultado is None:
+            resultado = 0
+            tabela = passo[simbolo]
+            while parte:
+                bit = parte & -parte
+                resultado |= tabela[bit.bit_length() - 1]
+                parte ^= bit
+            memo[chave] = resultado
+        return resultado
+
+    estado_inicial = fecho[indice[afn.estado_inicial]]
+    fila = deque([estado_inicial])
+    transicoes = dict()
+    mapeamento = {estado_inicial: 'S0'}
+
+    while fila:
+        atual = fila.popleft()
+        nome_atual = mapeamento[atual]
+        for simbolo in alfabeto:
+            prox = mover(atual, simbolo)
+            if not prox:
+                continue
+            nome = mapeamento.get(prox)
+            if nome is None:
+                nome = mapeamento[prox] = f'S{len(mapeamento)}'
+                fila.append(prox)
+            transicoes[(nome_atual, simbolo)] = nome
+
+    finais = 0
+    for e in afn.estados_finais:
+        if e in indice:
+            finais |= 1 << indice[e]
+
+    def estados_de(bits):
+        return frozenset(lista[i] for i in range(bits.bit_length()) if bits >> i & 1)
+
+    return AFD(
+        estados=list(mapeamento.values()),
+        alfabeto=alfabeto,
+        transicoes=transicoes,
+        estado_inicial='S0',
+        estados_finais={nome for bits, nome in mapeamento.items() if bits & finais},
+        subconjuntos={nome: estados_de(bits) for bits, nome in mapeamento.items()}
+    )
+
+
+def minimizar_afd(afd, rotulos=None):
+    """
+    Minimiza um AFD pelo algoritmo de Hopcroft.
+
+    rotulos (opcional) mapeia estados finais para um rótulo (por exemplo o tipo
+    de token aceito); estados com rótulos diferentes nunca são unidos. Sem
+    rótulos, a partição inicial é apenas finais / não finais. As transições
+    ausentes são tratadas como um estado morto implícito, que não aparece no
+    AFD resultante.
+    """
+    if rotulos is None:
+        rotulos = {e: True for e in afd.estados_finais}
+    morto = object()
+    estados = list(afd.estados) + [morto]
+
+    # Transições inversas: (símbolo, destino) -> origens
+    inversas = defaultdict(set)
+    for estado in estados:
+        for simbolo in afd.alfabeto:
+            destino = afd.transicoes.get((estado, simbolo), morto) if estado is not morto else morto
+            inversas[(simbolo, destino)].add(estado)
+
+    # Partição inicial por rótulo (não finais e o estado morto ficam juntos)
+    grupos = defaultdict(set)
+    for estado in estados:
+        grupos[rotulos.get(estado)].add(estado)
+    blocos = list(grupos.values())
+    bloco_de = {e: i for i, bloco in enumerate(blocos) for e in bloco}
+    pendentes = set(range(len(blocos)))
+
+    # Refina a partição até que nenhum bloco possa ser dividido
+    while pendentes:
+        divisor = list(blocos[pendentes.pop()])
+        for simbolo in afd.alfabeto:
+            afetados = defaultdict(set)
+            for destino in divisor:
+                for origem in inversas.get((simbolo, destino), ()):
+                    afetados[bloco_de[origem]].add(origem)
+            for indice, parte in afetados.items():
+                if len(parte) == len(blocos[indice]):
+                    continue
+                novo = len(blocos)
+                blocos.append(parte)
+                blocos[indice] -= parte
+                for e in parte:
+                    bloco_de[e] = novo
+                if indice in pendentes or len(parte) <= len(blocos[indice]):
+                    pendentes.add(novo)
+                else:
+                    pendentes.add(indice)
+
+    # Renomeia os blocos em ordem de busca em largura a partir do inicial
+    inicial = bloco_de[afd.estado_inicial]
+    mapeamento = {inicial: 'S0'}
+    fila = deque([inicial])
+    transicoes = dict()
+    while fila:
+        atual = fila.popleft()
+        representante = next(iter(blocos[atual]))
+        for simbolo in afd.alfabeto:
+            destino = afd.transicoes.get((representante, simbolo))
+            if destino is None or morto in blocos[bloco_de[destino]]:
+                continue
+            proximo = bloco_de[destino]
+            if proximo not in mapeamento:
+                mapeamento[proximo] = f'S{len(mapeamento)}'
+                fila.append(proximo)
+            transicoes[(mapeamento[atual], simbolo)] = mapeamento[proximo]
+
+    subconjuntos = {}
+    for indice, nome in mapeamento.items():
+        partes = [afd.subconjuntos.get(e, frozenset([e])) for e in blocos[indice]]
+        subconjuntos[nome] = frozenset().union(*partes)
+
+    return AFD(
+        estados=list(mapeamento.values()),
+        alfabeto=list(afd.alfabeto),
+        transicoes=transicoes,
+        estado_inicial='S0',
+        estados_finais={nome for indice, nome in mapeamento.items()
+                        if any(e in afd.estados_finais for e in blocos[indice])},
+        subconjuntos=subconjuntos
     )
 
 # Exemplo de uso:
 # afn = AFN(...)
-# afd = afn_para_afd(afn)
+# afd = minimizar_afd(afn_para_afd(afn))
+# afd = minimizar_afd(afn_para_afd_bitset(afn))  # mesmo resultado, mais rápido
@@ -1,8 +1,49 @@
 from enum import Enum
-from typing import Dict, Set, Optional, List, Tuple
+from typing import Callable, Dict, FrozenSet, Set, Optional, List, Tuple, Iterator, TextIO, Union
 import re
-from dataclasses import dataclass
-from collections import deque
+import codecs
+from dataclasses import dataclass, field
+from array import array
+from bisect import bisect_right
+from concurrent.futures import Executor, ProcessPoolExecutor
+import mmap
+import os
+import sys
+import threading
+
+# Adiciona o diretório do lexer ao path para os módulos auxiliares
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from scanner_tables import ACCEPT_KINDS, ScannerTables, load_scanner_tables
+from scanner_codegen import load_generated_scanner
+
+# Sequência de espaços em branco (mesmo critério de str.isspace)
+WHITESPACE_RE = re.compile(r'\s+')
+
+# Mesma sequência sobre bytes: os espaços ASCII de str.isspace (os de fora
+# do ASCII são decodificados um a um)
+WHITESPACE_BYTES_RE = re.compile(rb'[\t-\r\x1c-\x20]+')
+
+# Entradas aceitas por `ApolloLexer.tokenize_bytes` (texto em UTF-8)
+BytesLike = Union[bytes, bytearray, memoryview, mmap.mmap]
+
+# Tamanho mínimo (em caracteres) de cada bloco da análise paralela
+MIN_PARALLEL_CHUNK = 1 << 16
+
+# Palavras-chave da linguagem Apollo
+APOLLO_KEYWORDS = frozenset({
+    'algoritmo', 'fim_algoritmo', 'se', 'senao', 'enquanto',
+    'para', 'faca', 'escreva', 'leia_numero', 'leia_texto',
+    'verdadeiro', 'falso', 'inteiro', 'real', 'texto', 'logico'
+})
+
+# Operadores com precedência
+APOLLO_OPERATORS = frozenset({
+    '==', '!=', '<=', '>=', '<', '>', '=', '+', '-', '*', '/'
+})
+
+# Símbolos especiais
+APOLLO_SYMBOLS = frozenset({'(', ')', '{', '}', '[', ']', ':', ',', ';', '.'})
 
 class TokenType(Enum):
     """Enumeração dos tipos de tokens reconhecidos pela linguagem Apollo"""
@@ -36,6 +77,8 @@ class Token:
     line: int
     column: int
     length: int = 0
+    offset: int = -1  # posição do primeiro caractere no código-fonte
+    symbol_id: int = field(default=-1, compare=False)  # id do nome internado (palavras)
     
     def __post_init__(self):
         if self.length == 0:
@@ -47,8 +90,251 @@ class Token:
     def __str__(self) -> str:
         return f"{self.type.name}: '{self.value}'"
 
+# Código inteiro de cada tipo de token (índice nesta tupla)
+TOKEN_TYPES = tuple(TokenType)
+TOKEN_CODES = {token_type: code for code, token_type in enumerate(TOKEN_TYPES)}
+
+class LineIndex:
+    """
+    Índice dos inícios de linha de um texto. É construído numa única passada
+    (com str.find) e converte offsets em (linha, coluna) por bisseção, de modo
+    que o lexer só precisa acompanhar offsets.
+    """
+    
+    def __init__(self, source: Union[str, BytesLike]):
+        starts = array('i', [0])
+        if isinstance(source, str):
+            pos = source.find('\n')
+            while pos >= 0:
+                starts.append(pos + 1)
+                pos = source.find('\n', pos + 1)
+        else:
+            # Bytes são percorridos em janelas, sem copiar o buffer inteiro
+            window_size = 1 << 20
+            for base in range(0, len(source), window_size):
+                window = bytes(source[base:base + window_size])
+                pos = window.find(b'\n')
+                while pos >= 0:
+                    starts.append(base + pos + 1)
+                    pos = window.find(b'\n', pos + 1)
+        self.starts = starts
+    
+    def __len__(self) -> int:
+        return len(self.starts)
+    
+    def line_col(self, offset: int) -> Tuple[int, int]:
+        """Linha e coluna (a partir de 1) do caractere em offset"""
+        line = bisect_right(self.starts, offset)
+        return line, offset - self.starts[line - 1] + 1
+
+class Interner:
+    """
+    Tabela de internação de nomes. Cada palavra (identificador, palavra-chave
+    ou booleano) recebe um id inteiro pequeno e uma string canônica, de modo
+    que tokens e nós da AST com o mesmo nome compartilham o mesmo objeto e as
+    fases seguintes podem usar tabelas indexadas por inteiro.
+    
+    O tipo do token também fica guardado por id: as palavras-chave são
+    registradas de antemão, então a mesma consulta que interna o lexema
+    resolve se ele é palavra-chave, sem um teste de pertinência à parte.
+    """
+    
+    def __init__(self, keywords: Set[str], booleans: Set[str] = frozenset({'verdadeiro', 'falso'})):
+        self.ids: Dict[str, int] = {}
+        self.names: List[str] = []
+        self.kinds: List[TokenType] = []
+        self._lock = threading.Lock()
+        for name in sorted(keywords | booleans):
+            self._add(name, TokenType.BOOLEAN if name in booleans else TokenType.KEYWORD)
+    
+    def _add(self, name: str, kind: TokenType) -> int:
+        # O id só é publicado em ids depois que names e kinds já o contêm:
+        # quem o encontra sem a trava sempre consegue indexar as listas
+        symbol_id = len(self.names)
+        self.names.append(name)
+        self.kinds.append(kind)
+        self.ids[name] = symbol_id
+        return symbol_id
+    
+    def intern(self, name: str) -> int:
+        """
+        Id do nome, registrando-o como identificador se ainda não existir.
+        A consulta não trava; só o registro de um nome novo é serializado,
+        então várias threads podem analisar com o mesmo lexer.
+        """
+        symbol_id = self.ids.get(name)
+        if symbol_id is None:
+            with self._lock:
+                symbol_id = self.ids.get(name)
+                if symbol_id is None:
+                    symbol_id = self._add(name, TokenType.IDENTIFIER)
+        return symbol_id
+    
+    def __len__(self) -> int:
+        return len(self.names)
+    
+    def name(self, symbol_id: int) -> str:
+        """String canônica do id"""
+        return self.names[symbol_id]
+    
+    def kind(self, symbol_id: int) -> TokenType:
+        """Tipo de token do id (IDENTIFIER, KEYWORD ou BOOLEAN)"""
+        return self.kinds[symbol_id]
+
+class TokenBuffer:
+    """
+    Sequência compacta de tokens em colunas paralelas (struct-of-arrays).
+    
+    Cada token ocupa uma posição em quatro arrays de inteiros: código do
+    tipo, início e fim no código-fonte e id do nome internado (-1 para o que
+    não é palavra). O lexema só é recortado do código-fonte quando pedido (as
+    palavras vêm direto do `Interner`), linha e coluna vêm de um `LineIndex`
+    construído na primeira consulta, e objetos `Token` só são criados sob
+    demanda (indexação ou iteração).
+    """
+    
+    def __init__(self, source: str, line_index: Optional[LineIndex] = None,
+                 interner: Optional[Interner] = None):
+        self.source = source
+        self.types = array('i')
+        self.starts = array('i')
+        self.ends = array('i')
+        self.symbol_ids = array('i')
+        self.interner = interner
+        self._line_index = line_index
+    
+    @property
+    def line_index(self) -> LineIndex:
+        if self._line_index is None:
+            self._line_index = LineIndex(self.source)
+        return self._line_index
+    
+    def append(self, type_code: int, start: int, end: int, symbol_id: int = -1):
+        """Adiciona um token"""
+        self.types.append(type_code)
+        self.starts.append(start)
+        self.ends.append(end)
+        self.symbol_ids.append(symbol_id)
+    
+    def __len__(self) -> int:
+        return len(self.types)
+    
+    def type_at(self, index: int) -> TokenType:
+        """Tipo do token index, sem criar o Token"""
+        return TOKEN_TYPES[self.types[index]]
+    
+    def value_at(self, index: int) -> str:
+        """Lexema do token index (string canônica para palavras)"""
+        symbol_id = self.symbol_ids[index]
+        if symbol_id >= 0:
+            return self.interner.names[symbol_id]
+        return self.source[self.starts[index]:self.ends[index]]
+    
+    def __getitem__(self, index: int) -> Token:
+        """Materializa o token index"""
+        start = self.starts[index]
+        line, column = self.line_index.line_col(start)
+        return Token(TOKEN_TYPES[self.types[index]], self.value_at(index),
+                     line, column, offset=start, symbol_id=self.symbol_ids[index])
+    
+    def __iter__(self) -> Iterator[Token]:
+        for index in range(len(self.types)):
+            yield self[index]
+    
+    def tokens(self) -> List[Token]:
+        """Materializa todos os tokens numa lista"""
+        return list(self)
+    
+    def without(self, *token_types: TokenType) -> 'TokenBuffer':
+        """Cópia do buffer sem os tokens dos tipos dados"""
+        excluded = {TOKEN_CODES[t] for t in token_types}
+        result = type(self)(self.source, self._line_index, self.interner)
+        for index, code in enumerate(self.types):
+            if code not in excluded:
+                result.append(code, self.starts[index], self.ends[index], self.symbol_ids[index])
+        return result
+
+class ByteTokenBuffer(TokenBuffer):
+    """
+    `TokenBuffer` sobre o código-fonte em UTF-8 (bytes, memoryview ou um
+    arquivo mapeado com mmap). Offsets são posições em bytes; lexemas só são
+    decodificados quando pedidos, e a coluna conta caracteres, decodificando
+    o começo da linha apenas quando ele não é ASCII.
+    
+    Como na leitura em modo texto, quebras de linha "\\r\\n" e "\\r" dentro
+    dos lexemas viram "\\n".
+    """
+    
+    def value_at(self, index: int) -> str:
+        symbol_id = self.symbol_ids[index]
+        if symbol_id >= 0:
+            return self.interner.names[symbol_id]
+        data = bytes(self.source[self.starts[index]:self.ends[index]])
+        errors = 'replace' if self.types[index] == TOKEN_CODES[TokenType.INVALID] else 'strict'
+        value = data.decode('utf-8', errors)
+        if '\r' in value:
+            value = value.replace('\r\n', '\n').replace('\r', '\n')
+        return value
+    
+    def __getitem__(self, index: int) -> Token:
+        start = self.starts[index]
+        line, column = self.line_index.line_col(start)
+        if column > 1:
+            prefix = bytes(self.source[start - column + 1:start])
+            if not prefix.isascii():
+                column = len(prefix.decode('utf-8', 'replace')) + 1
+        return Token(TOKEN_TYPES[self.types[index]], self.value_at(index),
+                     line, column, offset=start, symbol_id=self.symbol_ids[index])
+
+def _decode_char(data: bytes, pos: int) -> Tuple[Optional[str], int]:
+    """
+    Decodifica o caractere UTF-8 que começa em data[pos]. Retorna
+    (caractere, bytes); (None, 1) para uma sequência inválida e
+    (None, bytes_esperados) quando o caractere passa do fim de data.
+    """
+    lead = data[pos]
+    size = 2 if 0xC0 <= lead < 0xE0 else 3 if 0xE0 <= lead < 0xF0 else 4 if 0xF0 <= lead < 0xF8 else 1
+    if pos + size > len(data):
+        return None, size
+    try:
+        return data[pos:pos + size].decode('utf-8'), size
+    except UnicodeDecodeError:
+        return None, 1
+
+def _match_space_bytes(data: bytes, pos: int) -> int:
+    """Fim da sequência de espaços (ASCII ou não) que começa em pos"""
+    while True:
+        match = WHITESPACE_BYTES_RE.match(data, pos)
+        if match:
+            pos = match.end()
+        if pos < len(data) and data[pos] >= 0x80:
+            char, size = _decode_char(data, pos)
+            if char is not None and char.isspace():
+                pos += size
+                continue
+        return pos
+
+class _Utf8Reader:
+    """
+    Leitor de texto (só `read`) sobre código em UTF-8 num objeto de bytes,
+    memoryview ou mmap: cada leitura decodifica só os próximos bytes, de
+    modo que o texto inteiro nunca é montado. Sequências inválidas viram
+    U+FFFD, que o scanner trata como token inválido.
+    """
+    
+    def __init__(self, data: BytesLike):
+        self.data = data
+        self.pos = 0
+        self.decoder = codecs.getincrementaldecoder('utf-8')('replace')
+    
+    def read(self, size: int) -> str:
+        # size >= 4: um bloco não vazio sempre completa ao menos um caractere
+        chunk = bytes(self.data[self.pos:self.pos + max(size, 4)])
+        self.pos += len(chunk)
+        return self.decoder.decode(chunk, final=not chunk)
+
 class CircularBuffer:
-    """Buffer circular eficiente para leitura de caracteres"""
+    """Buffer circular (ring buffer) de caracteres com capacidade fixa"""
     
     def __init__(self, size: int = 4096):
         self.buffer = [''] * size
@@ -69,6 +355,19 @@ class CircularBuffer:
             self.end = (self.end + 1) % self.size
             self.start = (self.start + 1) % self.size
     
+    def write(self, text: str) -> int:
+        """
+        Copia o máximo possível de text para o espaço livre, sem sobrescrever
+        caracteres ainda não consumidos. Retorna quantos caracteres foram escritos.
+        """
+        n = min(len(text), self.size - self.count)
+        first = min(n, self.size - self.end)
+        self.buffer[self.end:self.end + first] = text[:first]
+        self.buffer[:n - first] = text[first:n]
+        self.end = (self.end + n) % self.size
+        self.count += n
+        return n
+    
     def peek(self, offset: int = 0) -> Optional[str]:
         """Retorna o caractere na posição offset sem consumir"""
         if offset >= self.count:
@@ -76,15 +375,32 @@ class CircularBuffer:
         pos = (self.start + offset) % self.size
         return self.buffer[pos]
     
+    def text(self, count: Optional[int] = None) -> str:
+        """Retorna os próximos count caracteres (todos, por padrão) sem consumir"""
+        count = self.count if count is None else min(count, self.count)
+        first = min(count, self.size - self.start)
+        return ''.join(self.buffer[self.start:self.start + first]) + ''.join(self.buffer[:count - first])
+    
     def consume(self, count: int = 1) -> str:
         """Consome e retorna os próximos count caracteres"""
-        result = ""
-        for i in range(min(count, self.count)):
-            result += self.buffer[self.start]
-            self.start = (self.start + 1) % self.size
-            self.count -= 1
+        result = self.text(count)
+        self.start = (self.start + len(result)) % self.size
+        self.count -= len(result)
         return result
     
+    def free(self) -> int:
+        """Espaço livre no buffer"""
+        return self.size - self.count
+    
+    def grow(self, size: int):
+        """Aumenta a capacidade preservando o conteúdo não consumido"""
+        content = self.text()
+        self.buffer = list(content) + [''] * (size - len(content))
+        self.size = size
+        self.start = 0
+        self.end = len(content) % size
+        self.count = len(content)
+    
     def is_empty(self) -> bool:
         return self.count == 0
 
@@ -145,38 +461,136 @@ class AFD:
             return (pos, state)
         return None
 
-class ApolloLexer:
-    """Analisador léxico da linguagem Apollo com princípio do match mais longo"""
+class LexicalError(Exception):
+    """Exceção para erros léxicos"""
+    
+    def __init__(self, message: str, line: int = 0, column: int = 0):
+        self.message = message
+        self.line = line
+        self.column = column
+        super().__init__(f"Erro léxico na linha {line}, coluna {column}: {message}")
+
+_shared_lock = threading.Lock()
+_default_tables: Optional['LexerTables'] = None
+
+@dataclass(frozen=True)
+class LexerTables:
+    """
+    Parte imutável do lexer: palavras-chave, operadores, símbolos, as tabelas
+    do AFD combinado e o que é derivado delas (scanner, regex de trechos
+    inválidos). Nada aqui muda depois da construção, então uma única
+    instância atende ao mesmo tempo vários `ApolloLexer` (em threads ou
+    tarefas asyncio diferentes) sem travas e sem reconstruir os autômatos.
+    
+    O `ApolloLexer` é o contexto barato de cada análise: guarda só o estado
+    mutável (código-fonte atual, posição, nomes internados).
+    """
+    keywords: FrozenSet[str] = APOLLO_KEYWORDS
+    operators: FrozenSet[str] = APOLLO_OPERATORS
+    symbols: FrozenSet[str] = APOLLO_SYMBOLS
+    scanner: ScannerTables = field(init=False, repr=False, compare=False)
+    scan: Callable[[bytes, int, int], Tuple[int, int, bool]] = field(init=False, repr=False, compare=False)
+    accept_types: Tuple[TokenType, ...] = field(init=False, repr=False, compare=False)
+    invalid_skip_re: 're.Pattern' = field(init=False, repr=False, compare=False)
+    invalid_skip_bytes_re: 're.Pattern' = field(init=False, repr=False, compare=False)
+    _legacy: Dict[str, Dict[str, AFD]] = field(init=False, repr=False, compare=False)
     
-    def __init__(self):
-        # Palavras-chave da linguagem Apollo
-        self.keywords = {
-            'algoritmo', 'fim_algoritmo', 'se', 'senao', 'enquanto',
-            'para', 'faca', 'escreva', 'leia_numero', 'leia_texto',
-            'verdadeiro', 'falso', 'inteiro', 'real', 'texto', 'logico'
-        }
+    def __post_init__(self):
+        init = lambda name, value: object.__setattr__(self, name, value)
+        init('keywords', frozenset(self.keywords))
+        init('operators', frozenset(self.operators))
+        init('symbols', frozenset(self.symbols))
         
-        # Operadores com precedência
-        self.operators = {
-            '==', '!=', '<=', '>=', '<', '>', '=', '+', '-', '*', '/'
-        }
+        # AFD combinado em tabelas densas: reconhece o match mais longo numa
+        # única passada. As tabelas vêm do cache (memória ou disco) sempre
+        # que possível.
+        scanner = load_scanner_tables(self.operators, self.symbols)
+        init('scanner', scanner)
+        # Scanner especializado gerado por scanner_codegen (quando existe e
+        # corresponde a estas tabelas); senão, o laço genérico sobre as tabelas
+        init('scan', load_generated_scanner(scanner) or scanner.scan)
+        init('accept_types', tuple(TokenType[name] for name in ACCEPT_KINDS))
         
-        # Símbolos especiais
-        self.symbols = {'(', ')', '{', '}', '[', ']', ':', ',', ';', '.'}
+        # Trechos sem nenhum token reconhecível viram um único token INVALID.
+        # As regex saltam os caracteres que não podem iniciar um token
+        # (nem espaço em branco); só nos demais o autômato é executado.
+        start_chars = re.escape(scanner.start_chars())
+        init('invalid_skip_re', re.compile('[^\\s%s]*' % start_chars))
+        init('invalid_skip_bytes_re', re.compile(
+            b'[^\\t-\\r\\x1c-\\x20\\x80-\\xff%s]*' % start_chars.encode('ascii')))
         
-        # AFDs para reconhecimento de tokens
-        self.afds = self._create_afds()
+        # AFDs individuais do modo legado, criados apenas no primeiro uso
+        init('_legacy', {})
+    
+    @classmethod
+    def default(cls) -> 'LexerTables':
+        """Instância compartilhada com a especificação padrão da linguagem"""
+        global _default_tables
+        if _default_tables is None:
+            with _shared_lock:
+                if _default_tables is None:
+                    _default_tables = cls()
+        return _default_tables
+    
+    @property
+    def afds(self) -> Dict[str, AFD]:
+        """AFDs por tipo de token, usados pelo modo legado (single_pass=False)"""
+        afds = self._legacy.get('afds')
+        if afds is None:
+            with _shared_lock:
+                afds = self._legacy.get('afds')
+                if afds is None:
+                    afds = self._legacy['afds'] = ApolloLexer._create_afds()
+        return afds
+
+class ApolloLexer:
+    """
+    Analisador léxico da linguagem Apollo com princípio do match mais longo.
+    
+    A configuração e os autômatos ficam num `LexerTables` compartilhado
+    (por padrão `LexerTables.default()`); criar um lexer é barato. Os métodos
+    tokenize* não alteram o estado do lexer além dos nomes internados, então
+    podem ser chamados de várias threads ao mesmo tempo. A leitura token a
+    token (`reset`/`get_next_token`) é estado de uma única análise.
+    """
+    
+    def __init__(self, single_pass: bool = True, max_errors: Optional[int] = None,
+                 tables: Optional[LexerTables] = None):
+        shared = tables or LexerTables.default()
+        self.shared = shared
+        self.keywords = shared.keywords
+        self.operators = shared.operators
+        self.symbols = shared.symbols
+        
+        # Com single_pass=False usa os AFDs individuais em vez do AFD combinado
+        self.single_pass = single_pass
+        self.tables = shared.scanner
+        self._scan = shared.scan
+        self._accept_types = shared.accept_types
+        self._invalid_skip_re = shared.invalid_skip_re
+        self._invalid_skip_bytes_re = shared.invalid_skip_bytes_re
+        
+        # Nomes internados: compartilhados por todos os tokens deste lexer e
+        # pelos nós da AST construídos a partir deles
+        self.interner = Interner(self.keywords)
         
-        # Buffer para leitura eficiente
-        self.buffer = CircularBuffer()
+        # Limite de tokens inválidos: acima dele a análise é interrompida com
+        # LexicalError (None = sem limite)
+        self.max_errors = max_errors
         
-        # Estado do lexer
+        # Estado da leitura token a token (reset / get_next_token)
         self.position = 0
         self.line = 1
         self.column = 1
         self.source = ""
     
-    def _create_afds(self) -> Dict[str, AFD]:
+    @property
+    def afds(self) -> Dict[str, AFD]:
+        """AFDs por tipo de token, usados pelo modo legado (single_pass=False)"""
+        return self.shared.afds
+    
+    @staticmethod
+    def _create_afds() -> Dict[str, AFD]:
         """Cria os AFDs para reconhecimento de diferentes tipos de tokens"""
         afds = {}
         
@@ -279,7 +693,7 @@ class ApolloLexer:
         
         return afds
     
-    def _longest_match(self, text: str, start_pos: int) -> Optional[Tuple[str, TokenType, int]]:
+    def _longest_match(self, text: str, start_pos: int) -> Optional[Tuple[str, TokenType, int, int]]:
         """
         Implementa o princípio do match mais longo.
         Retorna (lexema, tipo, posição_final) do match mais longo encontrado.
@@ -296,8 +710,14 @@ class ApolloLexer:
                 
                 if length > best_length:
                     lexema = text[start_pos:final_pos]
-                    token_type = self._determine_token_type(lexema, afd_name)
-                    best_match = (lexema, token_type, final_pos)
+                    symbol_id = -1
+                    if afd_name == 'identifier':
+                        symbol_id = self.interner.intern(lexema)
+                        lexema = self.interner.names[symbol_id]
+                        token_type = self.interner.kinds[symbol_id]
+                    else:
+                        token_type = self._determine_token_type(lexema, afd_name)
+                    best_match = (lexema, token_type, final_pos, symbol_id)
                     best_length = length
         
         # Testa operadores e símbolos (match exato)
@@ -305,27 +725,150 @@ class ApolloLexer:
             if text.startswith(op, start_pos):
                 length = len(op)
                 if length > best_length:
-                    best_match = (op, TokenType.OPERATOR, start_pos + length)
+                    best_match = (op, TokenType.OPERATOR, start_pos + length, -1)
                     best_length = length
         
         for sym in self.symbols:
             if text.startswith(sym, start_pos):
                 length = len(sym)
                 if length > best_length:
-                    best_match = (sym, TokenType.SYMBOL, start_pos + length)
+                    best_match = (sym, TokenType.SYMBOL, start_pos + length, -1)
                     best_length = length
         
         return best_match
     
+    def _invalid_run(self, text: str, classes: Optional[bytes], pos: int, end: int,
+                     final: bool = True) -> int:
+        """
+        Fim do trecho inválido que começa antes de pos (pos é a posição logo
+        após o primeiro caractere sem match). O trecho cresce até um espaço
+        em branco ou uma posição onde algum token casa: a regex salta os
+        caracteres que não podem iniciar token e o autômato só é executado
+        nos demais. classes são as classes de text (None no modo legado).
+        
+        Com final=False, text termina antes do fim do código-fonte; o retorno
+        end indica que o trecho (ou o token seguinte) pode continuar depois.
+        """
+        skip = self._invalid_skip_re
+        while True:
+            pos = skip.match(text, pos, end).end()
+            if pos >= end or text[pos].isspace():
+                return pos
+            if classes is None:
+                if self._longest_match(text, pos):
+                    return pos
+            else:
+                kind, _, at_end = self._scan(classes, pos, end)
+                if at_end and not final:
+                    return end
+                if kind >= 0:
+                    return pos
+            pos += 1
+    
+    def _invalid_run_bytes(self, data: bytes, classes: bytes, pos: int, end: int,
+                           final: bool = True) -> int:
+        """
+        `_invalid_run` sobre bytes em UTF-8: caracteres fora do ASCII são
+        decodificados para decidir se são espaço em branco (fim do trecho).
+        """
+        skip = self._invalid_skip_bytes_re
+        while True:
+            pos = skip.match(data, pos, end).end()
+            if pos >= end:
+                return pos
+            byte = data[pos]
+            if byte >= 0x80:
+                char, size = _decode_char(data, pos)
+                if char is not None and char.isspace():
+                    return pos
+                if pos + size > end and not final:
+                    return end
+                pos += size if char is not None else 1
+                continue
+            if byte <= 0x20:
+                return pos  # espaço ASCII (os demais bytes baixos são saltados pela regex)
+            kind, _, at_end = self._scan(classes, pos, end)
+            if at_end and not final:
+                return end
+            if kind >= 0:
+                return pos
+            pos += 1
+    
+    def _too_many_errors(self, token: Token) -> LexicalError:
+        """Erro para o token inválido que excedeu max_errors"""
+        return LexicalError(f"Limite de {self.max_errors} erros léxicos excedido em '{token.value}'",
+                            token.line, token.column)
+    
+    def _scan_match(self, text: str, classes: bytes, start_pos: int) -> Optional[Tuple[str, TokenType, int, int]]:
+        """
+        Equivalente a `_longest_match` usando o AFD combinado: uma única
+        passada da esquerda para a direita sobre as classes de caracteres.
+        Retorna (lexema, tipo, posição_final, id_do_nome).
+        """
+        kind, final_pos, _ = self._scan(classes, start_pos, len(classes))
+        if kind < 0:
+            return None
+        
+        lexema = text[start_pos:final_pos]
+        token_type = self._accept_types[kind]
+        symbol_id = -1
+        if token_type is TokenType.IDENTIFIER:
+            interner = self.interner
+            symbol_id = interner.ids.get(lexema)
+            if symbol_id is None:
+                symbol_id = interner.intern(lexema)
+            lexema = interner.names[symbol_id]
+            token_type = interner.kinds[symbol_id]
+        return (lexema, token_type, final_pos, symbol_id)
+    
+    def _scan_token_at(self, source: str, pos: int) -> Tuple[TokenType, int, int]:
+        """
+        Reconhece um único token (incluindo espaços e comentários) começando
+        em pos, classificando só uma janela do texto em volta. A janela cresce
+        enquanto o autômato continuar vivo no fim dela. source pode ser uma
+        str ou um `ChunkedText`: só len, índice e fatias são usados.
+        Retorna (tipo, posição_final, id_do_nome).
+        """
+        char = source[pos]
+        end = len(source)
+        window = 64
+        if char.isspace():
+            while True:
+                limit = min(end, pos + window)
+                final_pos = pos + WHITESPACE_RE.match(source[pos:limit]).end()
+                if final_pos < limit or limit == end:
+                    return TokenType.WHITESPACE, final_pos, -1
+                window *= 4
+        
+        while True:
+            limit = min(end, pos + window)
+            text = source[pos:limit]
+            classes = self.tables.classify(text)
+            kind, final_pos, at_end = self._scan(classes, 0, len(classes))
+            if kind < 0 and (not at_end or limit == end):
+                final_pos = self._invalid_run(text, classes, 1, len(text), limit == end)
+                at_end = final_pos == len(text)
+            if not at_end or limit == end:
+                break
+            window *= 4
+        
+        final_pos += pos
+        if kind < 0:
+            return TokenType.INVALID, final_pos, -1
+        token_type = self._accept_types[kind]
+        if token_type is TokenType.IDENTIFIER:
+            symbol_id = self.interner.intern(source[pos:final_pos])
+            return self.interner.kinds[symbol_id], final_pos, symbol_id
+        return token_type, final_pos, -1
+    
+    def incremental(self, source_code: str) -> 'IncrementalLexer':
+        """Cria um `IncrementalLexer` para o código-fonte"""
+        return IncrementalLexer(self, source_code)
+    
     def _determine_token_type(self, lexema: str, afd_name: str) -> TokenType:
         """Determina o tipo de token baseado no lexema e AFD que o reconheceu"""
         if afd_name == 'identifier':
-            if lexema in {'verdadeiro', 'falso'}:
-                return TokenType.BOOLEAN
-            elif lexema in self.keywords:
-                return TokenType.KEYWORD
-            else:
-                return TokenType.IDENTIFIER
+            return self.interner.kinds[self.interner.intern(lexema)]
         elif afd_name == 'integer':
             return TokenType.INTEGER
         elif afd_name == 'real':
@@ -337,87 +880,515 @@ class ApolloLexer:
         else:
             return TokenType.INVALID
     
-    def _update_position(self, char: str):
-        """Atualiza a posição (linha e coluna) baseada no caractere"""
-        if char == '\n':
-            self.line += 1
-            self.column = 1
-        else:
-            self.column += 1
-    
-    def tokenize(self, source_code: str) -> List[Token]:
+    def tokenize(self, source_code: str, skip_trivia: bool = False) -> List[Token]:
         """
         Realiza a análise léxica do código-fonte usando o princípio do match mais longo.
-        Retorna uma lista de tokens.
+        Retorna uma lista de tokens. Com skip_trivia=True os espaços em branco
+        e comentários são pulados sem gerar tokens.
+        
+        O laço acompanha apenas offsets; linha e coluna de cada token vêm do
+        índice de inícios de linha. A posição é local à chamada: o lexer
+        não guarda estado da análise.
         """
-        self.source = source_code
-        self.position = 0
-        self.line = 1
-        self.column = 1
+        position = 0
+        line_index = LineIndex(source_code)
         tokens = []
+        classes = self.tables.classify(source_code) if self.single_pass else None
+        end = len(source_code)
+        errors = 0
         
-        while self.position < len(source_code):
-            # Pula espaços em branco
-            if source_code[self.position].isspace():
-                start_line = self.line
-                start_col = self.column
-                whitespace = ""
-                
-                while (self.position < len(source_code) and 
-                       source_code[self.position].isspace()):
-                    char = source_code[self.position]
-                    whitespace += char
-                    self._update_position(char)
-                    self.position += 1
+        while position < end:
+            start = position
+            
+            # Pula espaços em branco (a sequência inteira de uma vez)
+            if source_code[start].isspace():
+                position = WHITESPACE_RE.match(source_code, start).end()
                 
                 # Adiciona token de espaço em branco (opcional, para debug)
-                if whitespace:
+                if not skip_trivia:
+                    line, column = line_index.line_col(start)
                     tokens.append(Token(
                         TokenType.WHITESPACE, 
-                        whitespace, 
-                        start_line, 
-                        start_col
+                        source_code[start:position], 
+                        line, 
+                        column,
+                        offset=start
                     ))
                 continue
             
             # Aplica o princípio do match mais longo
-            match = self._longest_match(source_code, self.position)
+            if classes is not None:
+                match = self._scan_match(source_code, classes, start)
+            else:
+                match = self._longest_match(source_code, start)
             
             if match:
-                lexema, token_type, final_pos = match
-                start_line = self.line
-                start_col = self.column
-                
-                # Atualiza posição
-                for i in range(self.position, final_pos):
-                    self._update_position(source_code[i])
+                lexema, token_type, position, symbol_id = match
                 
                 # Cria token
-                token = Token(token_type, lexema, start_line, start_col)
-                tokens.append(token)
-                
-                self.position = final_pos
+                if not (skip_trivia and token_type == TokenType.COMMENT):
+                    line, column = line_index.line_col(start)
+                    tokens.append(Token(token_type, lexema, line, column,
+                                        offset=start, symbol_id=symbol_id))
             else:
-                # Caractere não reconhecido
-                char = source_code[self.position]
+                # Trecho não reconhecido: um único token até o próximo início possível
+                position = self._invalid_run(source_code, classes, start + 1, end)
+                line, column = line_index.line_col(start)
                 tokens.append(Token(
                     TokenType.INVALID, 
-                    char, 
-                    self.line, 
-                    self.column
+                    source_code[start:position], 
+                    line, 
+                    column,
+                    offset=start
                 ))
-                self._update_position(char)
-                self.position += 1
+                errors += 1
+                if self.max_errors is not None and errors > self.max_errors:
+                    raise self._too_many_errors(tokens[-1])
         
         # Adiciona token de fim de arquivo
-        tokens.append(Token(TokenType.EOF, "", self.line, self.column))
+        line, column = line_index.line_col(end)
+        tokens.append(Token(TokenType.EOF, "", line, column, offset=end))
         
         return tokens
     
+    def tokenize_compact(self, source_code: str, skip_trivia: bool = False,
+                         trivia: Optional[TokenBuffer] = None) -> TokenBuffer:
+        """
+        Mesma análise de `tokenize`, mas guarda os tokens num `TokenBuffer`
+        (colunas de inteiros) em vez de criar um objeto `Token` por token.
+        
+        Com skip_trivia=True, espaços em branco e comentários não entram no
+        buffer: são pulados em bloco (regex para espaços, busca da quebra de
+        linha para comentários). Se trivia for um `TokenBuffer`, as faixas
+        puladas são registradas nele, para ferramentas que precisam dos
+        comentários.
+        """
+        tables = self.tables
+        scan = self._scan
+        interner = self.interner
+        ids = interner.ids
+        kind_codes = [TOKEN_CODES[t] for t in interner.kinds]
+        accept_codes = [TOKEN_CODES[t] for t in self._accept_types]
+        identifier = TOKEN_CODES[TokenType.IDENTIFIER]
+        whitespace = TOKEN_CODES[TokenType.WHITESPACE]
+        comment = TOKEN_CODES[TokenType.COMMENT]
+        invalid = TOKEN_CODES[TokenType.INVALID]
+        
+        buffer = TokenBuffer(source_code, interner=interner)
+        classes = tables.classify(source_code)
+        end = len(source_code)
+        pos = 0
+        errors = 0
+        
+        while pos < end:
+            char = source_code[pos]
+            symbol_id = -1
+            if char.isspace():
+                final_pos = WHITESPACE_RE.match(source_code, pos).end()
+                code = whitespace
+            elif char == '#' and pos + 1 < end:
+                # Comentário vai até a quebra de linha (inclusive) ou o fim
+                newline = source_code.find('\n', pos + 1)
+                final_pos = end if newline < 0 else newline + 1
+                code = comment
+            else:
+                kind, final_pos, _ = scan(classes, pos, end)
+                if kind < 0:
+                    code = invalid
+                    final_pos = self._invalid_run(source_code, classes, pos + 1, end)
+                else:
+                    code = accept_codes[kind]
+                    if code == identifier:
+                        lexema = source_code[pos:final_pos]
+                        symbol_id = ids.get(lexema)
+                        if symbol_id is None:
+                            symbol_id = interner.intern(lexema)
+                            kind_codes.append(identifier)
+                        code = kind_codes[symbol_id]
+            
+            if not skip_trivia or (code != whitespace and code != comment):
+                buffer.append(code, pos, final_pos, symbol_id)
+                if code == invalid:
+                    errors += 1
+                    if self.max_errors is not None and errors > self.max_errors:
+                        raise self._too_many_errors(buffer[len(buffer) - 1])
+            elif trivia is not None:
+                trivia.append(code, pos, final_pos)
+            pos = final_pos
+        
+        buffer.append(TOKEN_CODES[TokenType.EOF], end, end)
+        return buffer
+    
+    def tokenize_parallel(self, source_code: str, workers: Optional[int] = None,
+                          chunk_size: Optional[int] = None, skip_trivia: bool = False,
+                          executor: Optional[Executor] = None) -> TokenBuffer:
+        """
+        Mesmo resultado de `tokenize_compact`, dividindo o código-fonte em
+        blocos terminados em quebra de linha e analisando os blocos em
+        paralelo num `ProcessPoolExecutor` (ou no executor dado).
+        
+        Os tokens de cada bloco voltam com offsets relativos e são costurados
+        em ordem. Um token de bloco só é aceito se não puder depender do texto
+        depois do bloco: espaços que chegam ao fim do bloco (podem continuar
+        no seguinte) e trechos inválidos com aspas (a string pode fechar num
+        bloco seguinte) são re-analisados sequencialmente sobre o texto
+        inteiro, e a costura volta a usar os blocos assim que um token
+        sequencial terminar exatamente no início de um token de bloco. Linha
+        e coluna vêm do `LineIndex` do texto inteiro.
+        
+        Com `max_errors`, o limite é conferido depois da costura, sobre o
+        total de tokens inválidos do texto inteiro.
+        """
+        workers = workers or os.cpu_count() or 1
+        end = len(source_code)
+        if chunk_size is None:
+            chunk_size = max(end // (4 * workers), MIN_PARALLEL_CHUNK)
+        
+        # Blocos terminam logo após uma quebra de linha
+        bounds = [0]
+        while end - bounds[-1] > chunk_size:
+            newline = source_code.find('\n', bounds[-1] + chunk_size - 1)
+            if newline < 0 or newline + 1 == end:
+                break
+            bounds.append(newline + 1)
+        bounds.append(end)
+        if len(bounds) <= 2:
+            return self.tokenize_compact(source_code, skip_trivia)
+        
+        chunks = [source_code[a:b] for a, b in zip(bounds, bounds[1:])]
+        if executor is not None:
+            results = list(executor.map(_lex_chunk, chunks, [skip_trivia] * len(chunks)))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(_lex_chunk, chunks, [skip_trivia] * len(chunks)))
+        
+        interner = self.interner
+        trivia_codes = (TOKEN_CODES[TokenType.WHITESPACE], TOKEN_CODES[TokenType.COMMENT])
+        buffer = TokenBuffer(source_code, interner=interner)
+        pos = 0  # fim do último token analisado sequencialmente
+        synced = True
+        
+        def scan_sequential():
+            nonlocal pos
+            token_type, final_pos, symbol_id = self._scan_token_at(source_code, pos)
+            code = TOKEN_CODES[token_type]
+            if not (skip_trivia and code in trivia_codes):
+                buffer.append(code, pos, final_pos, symbol_id)
+            pos = final_pos
+        
+        for index, (types, starts, ends, symbol_ids, names, quotes) in enumerate(results):
+            base = bounds[index]
+            chunk_end = bounds[index + 1]
+            count = len(types) - 1  # o último é o EOF do bloco
+            id_map = [interner.intern(name) for name in names]
+            id_map.append(-1)  # id -1 (não é palavra) continua -1
+            
+            # Tokens que podem depender do texto depois do bloco
+            hazards = quotes if source_code.find('"', chunk_end) >= 0 else []
+            if count and chunk_end != end and base + ends[count - 1] == chunk_end:
+                hazards = hazards + [count - 1]
+            
+            i = 0
+            for stop in hazards + [count]:
+                while i < stop:
+                    if not synced:
+                        start = base + starts[i]
+                        if start < pos:
+                            i += 1
+                            continue
+                        while pos < start:
+                            scan_sequential()
+                        if pos != start:
+                            i += 1
+                            continue
+                        synced = True
+                    
+                    # Trecho sincronizado: copia as colunas do bloco de uma vez
+                    buffer.types.extend(types[i:stop])
+                    buffer.starts.extend([offset + base for offset in starts[i:stop]])
+                    buffer.ends.extend([offset + base for offset in ends[i:stop]])
+                    buffer.symbol_ids.extend([id_map[symbol_id] for symbol_id in symbol_ids[i:stop]])
+                    i = stop
+                
+                if stop < count:
+                    start = base + starts[stop]
+                    if synced:
+                        pos = start
+                        synced = False
+                    while pos <= start:
+                        scan_sequential()
+                    i = stop + 1
+        
+        if not synced:
+            while pos < end:
+                scan_sequential()
+        
+        if self.max_errors is not None:
+            invalid = TOKEN_CODES[TokenType.INVALID]
+            errors = 0
+            for index, code in enumerate(buffer.types):
+                if code == invalid:
+                    errors += 1
+                    if errors > self.max_errors:
+                        raise self._too_many_errors(buffer[index])
+        
+        buffer.append(TOKEN_CODES[TokenType.EOF], end, end)
+        return buffer
+    
+    def tokenize_bytes(self, data: BytesLike, skip_trivia: bool = False,
+                       window_size: int = 1 << 16) -> ByteTokenBuffer:
+        """
+        Mesma análise de `tokenize_compact` diretamente sobre o código-fonte
+        em UTF-8 (bytes, memoryview ou arquivo mapeado com mmap), sem
+        decodificar o texto inteiro. A entrada é percorrida em janelas de
+        window_size bytes (ampliadas se um token não couber), de modo que um
+        arquivo mapeado só é lido à medida que o scanner avança.
+        
+        Bytes fora do ASCII têm classe CLASS_OTHER, como os caracteres que
+        representam; só no início de um token o caractere é decodificado,
+        para decidir entre espaço em branco e token inválido. Identificadores
+        são decodificados ao serem internados; os demais lexemas, só quando
+        lidos do buffer.
+        """
+        tables = self.tables
+        scan = self._scan
+        interner = self.interner
+        ids = interner.ids
+        kind_codes = [TOKEN_CODES[t] for t in interner.kinds]
+        accept_codes = [TOKEN_CODES[t] for t in self._accept_types]
+        identifier = TOKEN_CODES[TokenType.IDENTIFIER]
+        whitespace = TOKEN_CODES[TokenType.WHITESPACE]
+        comment = TOKEN_CODES[TokenType.COMMENT]
+        invalid = TOKEN_CODES[TokenType.INVALID]
+        
+        buffer = ByteTokenBuffer(data, interner=interner)
+        end = len(data)
+        base = 0
+        errors = 0
+        
+        while base < end:
+            limit = min(end, base + window_size)
+            window = bytes(data[base:limit])
+            classes = tables.classify_bytes(window)
+            last = limit == end
+            window_end = len(window)
+            pos = 0
+            
+            while pos < window_end:
+                byte = window[pos]
+                symbol_id = -1
+                if byte >= 0x80:
+                    char, size = _decode_char(window, pos)
+                    if char is not None and char.isspace():
+                        final_pos = _match_space_bytes(window, pos)
+                        code = whitespace
+                    elif pos + size > window_end and not last:
+                        break  # caractere cortado no fim da janela
+                    else:
+                        final_pos = pos + size
+                        code = invalid
+                elif byte <= 0x20 and (byte >= 0x1c or 0x09 <= byte <= 0x0d):
+                    final_pos = _match_space_bytes(window, pos)
+                    code = whitespace
+                elif byte == 0x23:  # '#'
+                    newline = window.find(b'\n', pos + 1)
+                    if newline >= 0:
+                        final_pos = newline + 1
+                        code = comment
+                    elif not last:
+                        break  # o comentário continua na próxima janela
+                    elif pos + 1 < window_end:
+                        final_pos = window_end
+                        code = comment
+                    else:
+                        final_pos = pos + 1
+                        code = invalid
+                else:
+                    kind, final_pos, at_end = scan(classes, pos, window_end)
+                    if at_end and not last:
+                        break  # o token pode continuar na próxima janela
+                    if kind < 0:
+                        code = invalid
+                        final_pos = pos + 1
+                    else:
+                        code = accept_codes[kind]
+                        if code == identifier:
+                            lexema = window[pos:final_pos].decode('ascii')
+                            symbol_id = ids.get(lexema)
+                            if symbol_id is None:
+                                symbol_id = interner.intern(lexema)
+                                kind_codes.append(identifier)
+                            code = kind_codes[symbol_id]
+                
+                if code == invalid:
+                    final_pos = self._invalid_run_bytes(window, classes, final_pos, window_end, last)
+                    if final_pos == window_end and not last:
+                        break  # o trecho inválido pode continuar na próxima janela
+                elif code == whitespace and final_pos + 4 > window_end and not last:
+                    break  # o espaço pode continuar na próxima janela
+                if not skip_trivia or (code != whitespace and code != comment):
+                    buffer.append(code, base + pos, base + final_pos, symbol_id)
+                    if code == invalid:
+                        errors += 1
+                        if self.max_errors is not None and errors > self.max_errors:
+                            raise self._too_many_errors(buffer[len(buffer) - 1])
+                pos = final_pos
+            
+            if pos == 0 and not last:
+                # Um único token ocupa a janela inteira: amplia a janela
+                window_size *= 2
+            base += pos
+        
+        buffer.append(TOKEN_CODES[TokenType.EOF], end, end)
+        return buffer
+    
+    def tokenize_stream(self, fileobj: TextIO, chunk_size: int = 8192) -> Iterator[Token]:
+        """
+        Versão incremental de `tokenize` para arquivos grandes: lê o arquivo em
+        blocos de chunk_size caracteres através de um buffer circular e produz
+        os tokens sob demanda. A memória usada fica limitada ao tamanho do
+        buffer (que só cresce se um único token for maior que ele).
+        """
+        tables = self.tables
+        scan = self._scan
+        buffer = CircularBuffer(2 * chunk_size)
+        line = 1
+        column = 1
+        base = 0  # posição no arquivo do início da janela
+        eof = False
+        errors = 0
+        
+        while True:
+            while not eof and buffer.free() >= chunk_size:
+                chunk = fileobj.read(chunk_size)
+                if chunk:
+                    buffer.write(chunk)
+                else:
+                    eof = True
+            
+            window = buffer.text()
+            classes = tables.classify(window)
+            end = len(window)
+            pos = 0
+            
+            while pos < end:
+                if window[pos].isspace():
+                    final_pos = WHITESPACE_RE.match(window, pos).end()
+                    if final_pos == end and not eof:
+                        break  # o espaço pode continuar no próximo bloco
+                    token_type = TokenType.WHITESPACE
+                else:
+                    kind, final_pos, at_end = scan(classes, pos, end)
+                    if at_end and not eof:
+                        break  # o token pode continuar no próximo bloco
+                    if kind < 0:
+                        final_pos = self._invalid_run(window, classes, pos + 1, end, eof)
+                        if final_pos == end and not eof:
+                            break  # o trecho inválido pode continuar no próximo bloco
+                        token_type = TokenType.INVALID
+                    else:
+                        token_type = self._accept_types[kind]
+                
+                lexema = window[pos:final_pos]
+                symbol_id = -1
+                if token_type is TokenType.IDENTIFIER:
+                    symbol_id = self.interner.intern(lexema)
+                    lexema = self.interner.names[symbol_id]
+                    token_type = self.interner.kinds[symbol_id]
+                token = Token(token_type, lexema, line, column, offset=base + pos, symbol_id=symbol_id)
+                if token_type is TokenType.INVALID:
+                    errors += 1
+                    if self.max_errors is not None and errors > self.max_errors:
+                        raise self._too_many_errors(token)
+                yield token
+                
+                newlines = lexema.count('\n')
+                if newlines:
+                    line += newlines
+                    column = len(lexema) - lexema.rfind('\n')
+                else:
+                    column += len(lexema)
+                pos = final_pos
+            
+            buffer.consume(pos)
+            base += pos
+            if eof and buffer.is_empty():
+                break
+            if pos == 0 and buffer.free() < chunk_size:
+                # Um único token ocupa o buffer inteiro: amplia a janela
+                buffer.grow(2 * buffer.size)
+        
+        yield Token(TokenType.EOF, "", line, column, offset=base)
+    
+    def iter_tokens_bytes(self, data: BytesLike, skip_trivia: bool = False,
+                          chunk_size: int = 8192) -> Iterator[Token]:
+        """
+        `iter_tokens` sobre o código em UTF-8 (bytes, memoryview ou arquivo
+        mapeado com mmap): os bytes são decodificados em blocos de
+        chunk_size à medida que `tokenize_stream` avança, de modo que nem o
+        texto nem os tokens do arquivo inteiro ficam na memória. Como em
+        `tokenize_stream`, o offset dos tokens conta caracteres, não bytes.
+        """
+        for token in self.tokenize_stream(_Utf8Reader(data), chunk_size):
+            if not (skip_trivia and (token.type is TokenType.WHITESPACE or token.type is TokenType.COMMENT)):
+                yield token
+    
+    def iter_tokens(self, source_code: str, skip_trivia: bool = False) -> Iterator[Token]:
+        """
+        Produz os mesmos tokens de `tokenize` sob demanda, um de cada vez,
+        sem montar a lista: quem consome (ex.: uma `TokenWindow`) guarda só os
+        tokens de que ainda precisa. Linha e coluna são acompanhadas contando
+        as quebras de linha de cada lexema.
+        """
+        tables = self.tables
+        scan = self._scan
+        interner = self.interner
+        classes = tables.classify(source_code)
+        end = len(source_code)
+        pos = 0
+        line = 1
+        column = 1
+        errors = 0
+        
+        while pos < end:
+            symbol_id = -1
+            if source_code[pos].isspace():
+                final_pos = WHITESPACE_RE.match(source_code, pos).end()
+                token_type = TokenType.WHITESPACE
+            else:
+                kind, final_pos, _ = scan(classes, pos, end)
+                if kind < 0:
+                    token_type = TokenType.INVALID
+                    final_pos = self._invalid_run(source_code, classes, pos + 1, end)
+                else:
+                    token_type = self._accept_types[kind]
+            
+            lexema = source_code[pos:final_pos]
+            if token_type is TokenType.IDENTIFIER:
+                symbol_id = interner.intern(lexema)
+                lexema = interner.names[symbol_id]
+                token_type = interner.kinds[symbol_id]
+            elif token_type is TokenType.INVALID:
+                errors += 1
+                if self.max_errors is not None and errors > self.max_errors:
+                    raise self._too_many_errors(Token(token_type, lexema, line, column, offset=pos))
+            if not (skip_trivia and (token_type is TokenType.WHITESPACE or token_type is TokenType.COMMENT)):
+                yield Token(token_type, lexema, line, column, offset=pos, symbol_id=symbol_id)
+            
+            newlines = lexema.count('\n')
+            if newlines:
+                line += newlines
+                column = len(lexema) - lexema.rfind('\n')
+            else:
+                column += len(lexema)
+            pos = final_pos
+        
+        yield Token(TokenType.EOF, "", line, column, offset=end)
+    
     def get_next_token(self) -> Token:
         """Interface para análise sintática - retorna o próximo token"""
         if not hasattr(self, '_token_stream') or self._token_stream is None:
-            self._token_stream = iter(self.tokenize(self.source))
+            self._token_stream = self.iter_tokens(self.source)
             self._current_token = None
         
         if self._current_token is None:
@@ -425,6 +1396,9 @@ class ApolloLexer:
                 self._current_token = next(self._token_stream)
             except StopIteration:
                 self._current_token = Token(TokenType.EOF, "", self.line, self.column)
+            else:
+                if self._current_token.type == TokenType.EOF:
+                    self.line, self.column = self._current_token.line, self._current_token.column
         
         return self._current_token
     
@@ -447,37 +1421,502 @@ class ApolloLexer:
         self._token_stream = None
         self._current_token = None
 
+
+def _lex_chunk(text: str, skip_trivia: bool = False):
+    """
+    Tarefa de `tokenize_parallel` executada em outro processo: analisa um
+    bloco e devolve as colunas do `TokenBuffer` (offsets relativos ao bloco),
+    os nomes internados, para o processo principal traduzir os ids, e os
+    índices dos tokens inválidos que contêm aspas.
+    """
+    lexer = ApolloLexer()
+    buffer = lexer.tokenize_compact(text, skip_trivia)
+    invalid = TOKEN_CODES[TokenType.INVALID]
+    quotes = [index for index, code in enumerate(buffer.types)
+              if code == invalid and '"' in text[buffer.starts[index]:buffer.ends[index]]]
+    return buffer.types, buffer.starts, buffer.ends, buffer.symbol_ids, lexer.interner.names, quotes
+
+@dataclass
+class TokenEdit:
+    """Faixa de tokens alterada por uma edição: [start, old_end) virou [start, new_end)"""
+    start: int
+    old_end: int
+    new_end: int
+    # Tipos dos tokens [start, old_end) antes da edição
+    replaced: List[TokenType] = field(default_factory=list, compare=False)
+
+class ChunkedText:
+    """
+    Texto de um documento em edição guardado em pedaços de alguns KB, com o
+    offset e a linha do início de cada pedaço. Uma edição refaz só os
+    pedaços que toca e as listas de prefixos (uma entrada por pedaço), sem
+    copiar o resto do documento. Aceita len, índice e fatias sem passo, o
+    que basta para o scanner ler janelas do texto.
+    """
+
+    __slots__ = ('chunk_size', 'chunks', 'sizes', 'breaks', 'starts', 'lines', 'size')
+
+    def __init__(self, text: str, chunk_size: int = 4096):
+        self.chunk_size = chunk_size
+        self.chunks: List[str] = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)] or ['']
+        self.sizes = [len(chunk) for chunk in self.chunks]
+        self.breaks = [chunk.count('\n') for chunk in self.chunks]
+        self.starts: List[int] = []  # offset do início de cada pedaço
+        self.lines: List[int] = []   # quebras de linha antes de cada pedaço
+        self.size = len(text)
+        self._reindex(0)
+
+    def _reindex(self, first: int):
+        """Recalcula os prefixos a partir do pedaço first"""
+        del self.starts[first:], self.lines[first:]
+        offset = self.starts[-1] + self.sizes[first - 1] if first else 0
+        lines = self.lines[-1] + self.breaks[first - 1] if first else 0
+        for size, breaks in zip(self.sizes[first:], self.breaks[first:]):
+            self.starts.append(offset)
+            self.lines.append(lines)
+            offset += size
+            lines += breaks
+
+    def _find(self, offset: int) -> int:
+        """Índice do pedaço que contém offset (o último, para o fim do texto)"""
+        return max(bisect_right(self.starts, offset) - 1, 0)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __str__(self) -> str:
+        return ''.join(self.chunks)
+
+    def __getitem__(self, key: Union[int, slice]) -> str:
+        if isinstance(key, slice):
+            start, stop, _ = key.indices(self.size)
+            if start >= stop:
+                return ''
+            index = self._find(start)
+            pieces = []
+            while start < stop:
+                base = self.starts[index]
+                pieces.append(self.chunks[index][start - base:stop - base])
+                start = base + self.sizes[index]
+                index += 1
+            return ''.join(pieces)
+        if key < 0:
+            key += self.size
+        if not 0 <= key < self.size:
+            raise IndexError("posição fora do texto")
+        index = self._find(key)
+        return self.chunks[index][key - self.starts[index]]
+
+    def rfind(self, char: str, end: int) -> int:
+        """Última ocorrência de char antes de end, ou -1"""
+        index = self._find(end)
+        found = self.chunks[index].rfind(char, 0, end - self.starts[index])
+        while found < 0 and index > 0:
+            index -= 1
+            found = self.chunks[index].rfind(char)
+        return self.starts[index] + found if found >= 0 else -1
+
+    def position(self, offset: int) -> Tuple[int, int]:
+        """(linha, coluna) do caractere em offset"""
+        index = self._find(offset)
+        line = self.lines[index] + self.chunks[index].count('\n', 0, offset - self.starts[index]) + 1
+        return line, offset - self.rfind('\n', offset)
+
+    def replace(self, offset: int, removed: int, inserted: str) -> str:
+        """Substitui removed caracteres a partir de offset por inserted; devolve o texto removido"""
+        first, last = self._find(offset), self._find(offset + removed)
+        base = self.starts[first]
+        text = ''.join(self.chunks[first:last + 1])
+        removed_text = text[offset - base:offset + removed - base]
+        text = text[:offset - base] + inserted + text[offset + removed - base:]
+        size = self.chunk_size
+        if len(text) > 2 * size:
+            pieces = [text[i:i + size] for i in range(0, len(text), size)]
+        elif text or len(self.chunks) == last + 1 - first:
+            pieces = [text]
+        else:
+            pieces = []  # sem pedaços vazios, a não ser no documento vazio
+        self.chunks[first:last + 1] = pieces
+        self.sizes[first:last + 1] = [len(piece) for piece in pieces]
+        self.breaks[first:last + 1] = [piece.count('\n') for piece in pieces]
+        self.size += len(inserted) - removed
+        self._reindex(first)
+        return removed_text
+
+class IncrementalLexer:
+    """
+    Mantém os tokens de um documento em edição e os atualiza a cada mudança
+    no texto, re-analisando só a vizinhança da edição.
+
+    O texto fica num `ChunkedText` e os tokens em colunas paralelas (tipo,
+    lexema, id do nome, offset, linha e coluna). Em vez de atualizar o
+    offset e a linha de todos os tokens depois de cada edição, a edição
+    registra um deslocamento pendente a partir do primeiro token seguinte a
+    ela (`_marks`), que `__getitem__` soma ao ler o token. Assim o custo de
+    uma edição depende do tamanho da edição, não do tamanho do arquivo nem
+    da distância até a edição anterior. Com deslocamentos pendentes demais,
+    eles são aplicados de uma vez às colunas.
+    """
+
+    # Deslocamentos pendentes acumulados antes de serem aplicados às colunas
+    max_pending = 256
+
+    def __init__(self, lexer: ApolloLexer, source_code: str, chunk_size: int = 4096):
+        self.lexer = lexer
+        self._text = ChunkedText(source_code, chunk_size)
+        self._source: Optional[str] = source_code  # texto completo, refeito só quando pedido
+        tokens = lexer.tokenize(source_code)
+        self._types: List[TokenType] = [t.type for t in tokens]
+        self._values: List[str] = [t.value for t in tokens]
+        self._symbols = array('q', [t.symbol_id for t in tokens])
+        self._offsets = array('q', [t.offset for t in tokens])
+        self._lines = array('q', [t.line for t in tokens])
+        self._columns = array('q', [t.column for t in tokens])
+        # A partir do token _marks[k] (até a marca seguinte), offset e linha
+        # guardados valem _offset_shifts[k] e _line_shifts[k] a menos
+        self._marks: List[int] = []
+        self._offset_shifts: List[int] = []
+        self._line_shifts: List[int] = []
+
+    @property
+    def source(self) -> str:
+        if self._source is None:
+            self._source = str(self._text)
+        return self._source
+
+    def position(self, offset: int) -> Tuple[int, int]:
+        """(linha, coluna) de um offset do texto atual"""
+        return self._text.position(offset)
+
+    def text(self, start: int, end: int) -> str:
+        """Trecho [start, end) do texto atual"""
+        return self._text[start:end]
+
+    def __len__(self) -> int:
+        return len(self._types)
+
+    def _shift(self, index: int) -> Tuple[int, int]:
+        """Deslocamento pendente (offset, linha) do token index"""
+        mark = bisect_right(self._marks, index) - 1
+        if mark < 0:
+            return 0, 0
+        return self._offset_shifts[mark], self._line_shifts[mark]
+
+    def _offset(self, index: int) -> int:
+        mark = bisect_right(self._marks, index) - 1
+        return self._offsets[index] + (self._offset_shifts[mark] if mark >= 0 else 0)
+
+    def _end(self, index: int) -> int:
+        return self._offset(index) + len(self._values[index])
+
+    def __getitem__(self, index: int) -> Token:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("índice de token fora da faixa")
+        offset_shift, line_shift = self._shift(index)
+        return Token(self._types[index], self._values[index], self._lines[index] + line_shift,
+                     self._columns[index], offset=self._offsets[index] + offset_shift,
+                     symbol_id=self._symbols[index])
+
+    def tokens(self) -> List[Token]:
+        """Lista completa de tokens com posições absolutas"""
+        types, values, symbols = self._types, self._values, self._symbols
+        offsets, lines, columns = self._offsets, self._lines, self._columns
+        bounds = [0] + self._marks + [len(types)]
+        shifts = [(0, 0)] + list(zip(self._offset_shifts, self._line_shifts))
+        result = []
+        for segment, (offset_shift, line_shift) in enumerate(shifts):
+            for i in range(bounds[segment], bounds[segment + 1]):
+                result.append(Token(types[i], values[i], lines[i] + line_shift, columns[i],
+                                    offset=offsets[i] + offset_shift, symbol_id=symbols[i]))
+        return result
+
+    def _apply_shifts(self):
+        """Soma os deslocamentos pendentes às colunas de offset e linha"""
+        bounds = self._marks + [len(self._types)]
+        for mark, (offset_shift, line_shift) in enumerate(zip(self._offset_shifts, self._line_shifts)):
+            start, end = bounds[mark], bounds[mark + 1]
+            self._offsets[start:end] = array('q', [value + offset_shift for value in self._offsets[start:end]])
+            self._lines[start:end] = array('q', [value + line_shift for value in self._lines[start:end]])
+        self._marks, self._offset_shifts, self._line_shifts = [], [], []
+
+    def _restart_index(self, offset: int, inserted: str) -> int:
+        """
+        Índice do primeiro token que precisa ser re-analisado. Um token pode
+        olhar até dois caracteres além do seu fim (ex.: "1." antes de um
+        dígito vira real), então só os tokens que terminam antes de offset - 1
+        são seguros. Uma aspa inválida (string sem fechamento) olha até o fim
+        do arquivo: se a edição insere aspas, a última aspa antes dela também
+        precisa ser re-analisada. Um trecho inválido termina onde começa o
+        próximo token válido, então o trecho logo antes do ponto de reinício
+        também volta a ser analisado.
+        """
+        # Busca binária pelo primeiro token que termina em offset - 1 ou depois
+        low, high = 0, len(self) - 1
+        while low < high:
+            middle = (low + high) // 2
+            if self._end(middle) < offset - 1:
+                low = middle + 1
+            else:
+                high = middle
+        index = low
+
+        if '"' in inserted:
+            quote = self._text.rfind('"', offset)
+            while quote >= 0 and index > 0 and self._end(index - 1) > quote:
+                index -= 1
+        if index > 0 and self._types[index - 1] == TokenType.INVALID:
+            index -= 1
+        return index
+
+    def edit(self, offset: int, removed: int, inserted: str) -> TokenEdit:
+        """
+        Aplica a edição (substitui removed caracteres a partir de offset por
+        inserted) e re-analisa a partir do ponto seguro mais próximo até que
+        os novos tokens voltem a coincidir com os antigos. A faixa devolvida
+        não inclui os tokens re-analisados antes da edição que saíram iguais.
+        """
+        start = self._restart_index(offset, inserted)
+        if start:
+            last = self[start - 1]
+            pos = last.offset + last.length
+            line = last.line + last.value.count('\n')
+            column = (len(last.value) - last.value.rfind('\n') if '\n' in last.value
+                      else last.column + last.length)
+            base_shift = self._shift(start - 1)
+        else:
+            pos, line, column = 0, 1, 1
+            base_shift = (0, 0)
+
+        text = self._text
+        removed_text = text.replace(offset, removed, inserted)
+        self._source = None
+        delta = len(inserted) - removed
+        line_delta = inserted.count('\n') - removed_text.count('\n')
+        edit_end = offset + len(inserted)
+
+        # Os tokens antigos a partir de start, já com o offset que teriam no
+        # texto novo, são os candidatos a ponto de sincronização (o EOF
+        # sempre sincroniza)
+        sync = start
+        new_tokens: List[Tuple[TokenType, str, int, int, int, int]] = []
+        while True:
+            # Descarta os tokens antigos que não podem mais ser ponto de sincronização
+            while self._offset(sync) + delta < max(pos, edit_end):
+                sync += 1
+            if self._offset(sync) + delta == pos and pos >= edit_end:
+                break  # sincronizado: o restante do texto não mudou
+
+            token_type, final_pos, symbol_id = self.lexer._scan_token_at(text, pos)
+            lexema = text[pos:final_pos] if symbol_id < 0 else self.lexer.interner.names[symbol_id]
+            new_tokens.append((token_type, lexema, symbol_id, pos, line, column))
+
+            newlines = lexema.count('\n')
+            if newlines:
+                line += newlines
+                column = len(lexema) - lexema.rfind('\n')
+            else:
+                column += len(lexema)
+            pos = final_pos
+
+        # Tokens do começo da faixa re-analisados sem mudança não fazem parte dela
+        same = 0
+        while same < min(sync - start, len(new_tokens)):
+            index = start + same
+            old = (self._types[index], self._values[index], self._offset(index))
+            if old != new_tokens[same][:2] + new_tokens[same][3:4]:
+                break
+            same += 1
+
+        replaced = self._types[start + same:sync]
+
+        # Troca os tokens [start, sync) pelos novos; eles guardam posições
+        # relativas ao deslocamento do token anterior
+        sync_shift = self._shift(sync)
+        column_shift = column - self._columns[sync]
+        offset_base, line_base = base_shift
+        self._types[start:sync] = [t[0] for t in new_tokens]
+        self._values[start:sync] = [t[1] for t in new_tokens]
+        self._symbols[start:sync] = array('q', [t[2] for t in new_tokens])
+        self._offsets[start:sync] = array('q', [t[3] - offset_base for t in new_tokens])
+        self._lines[start:sync] = array('q', [t[4] - line_base for t in new_tokens])
+        self._columns[start:sync] = array('q', [t[5] for t in new_tokens])
+
+        # Os tokens depois da faixa andam delta caracteres e line_delta linhas
+        resumed = start + len(new_tokens)
+        count_delta = resumed - sync
+        marks, offset_shifts, line_shifts = [resumed], [sync_shift[0] + delta], [sync_shift[1] + line_delta]
+        for mark, offset_shift, line_shift in zip(self._marks, self._offset_shifts, self._line_shifts):
+            if mark > sync:
+                marks.append(mark + count_delta)
+                offset_shifts.append(offset_shift + delta)
+                line_shifts.append(line_shift + line_delta)
+        kept = bisect_right(self._marks, start)
+        if kept and self._marks[kept - 1] == start:
+            kept -= 1  # a marca em start cobria tokens substituídos
+        if (offset_shifts[0], line_shifts[0]) == base_shift:
+            del marks[0], offset_shifts[0], line_shifts[0]
+        self._marks = self._marks[:kept] + marks
+        self._offset_shifts = self._offset_shifts[:kept] + offset_shifts
+        self._line_shifts = self._line_shifts[:kept] + line_shifts
+
+        # Os tokens seguintes na mesma linha do ponto de sincronização mudam de coluna
+        if column_shift:
+            columns, values = self._columns, self._values
+            for index in range(resumed, len(values)):
+                columns[index] += column_shift
+                if '\n' in values[index]:
+                    break
+
+        if len(self._marks) > self.max_pending:
+            self._apply_shifts()
+        return TokenEdit(start + same, sync, resumed, replaced)
+
+class TokenWindow:
+    """
+    Janela de tokens sobre um fluxo (ex.: `ApolloLexer.iter_tokens`): um
+    buffer circular de capacidade fixa, indexado pela posição absoluta do
+    token no fluxo. Os tokens são lidos do fluxo só quando pedidos e, com o
+    buffer cheio, o mais antigo é descartado.
+    
+    Um token não é descartado enquanto houver uma marca (`pin`) numa posição
+    anterior ou igual a ele, nem se estiver em `floor` ou depois; nesses
+    casos o buffer dobra de tamanho. Assim um parser pode marcar um ponto,
+    avançar especulativamente e voltar sem re-tokenizar.
+    """
+    
+    def __init__(self, tokens: Iterator[Token], capacity: int = 16):
+        self._tokens = iter(tokens)
+        self._slots: List[Optional[Token]] = [None] * capacity
+        self.capacity = capacity
+        self.start = 0   # posição absoluta do token mais antigo guardado
+        self.end = 0     # posição absoluta seguinte ao último token lido
+        self.floor: Optional[int] = None  # tokens a partir daqui não são descartados
+        self._pins: List[int] = []
+        self._exhausted = False
+    
+    def _grow(self):
+        """Dobra a capacidade preservando as posições dos tokens guardados"""
+        capacity = 2 * self.capacity
+        slots: List[Optional[Token]] = [None] * capacity
+        for index in range(self.start, self.end):
+            slots[index % capacity] = self._slots[index % self.capacity]
+        self._slots = slots
+        self.capacity = capacity
+    
+    def _fill(self, index: int):
+        """Lê tokens do fluxo até que a posição index esteja no buffer"""
+        while self.end <= index:
+            if self._exhausted:
+                raise IndexError("posição depois do fim do fluxo de tokens")
+            token = next(self._tokens, None)
+            if token is None:
+                self._exhausted = True
+                continue
+            if self.end - self.start == self.capacity:
+                keep = min(self._pins) if self._pins else self.end
+                if self.floor is not None:
+                    keep = min(keep, self.floor)
+                if keep <= self.start:
+                    self._grow()
+                else:
+                    self.start += 1
+            self._slots[self.end % self.capacity] = token
+            self.end += 1
+    
+    def __getitem__(self, index: int) -> Token:
+        if index < self.start:
+            raise LookupError(f"Token {index} já foi descartado da janela")
+        if index >= self.end:
+            self._fill(index)
+        return self._slots[index % self.capacity]
+    
+    def type_at(self, index: int) -> TokenType:
+        return self[index].type
+    
+    def value_at(self, index: int) -> str:
+        return self[index].value
+    
+    def pin(self, index: int):
+        """Impede que os tokens a partir de index sejam descartados"""
+        if index < self.start:
+            raise LookupError(f"Token {index} já foi descartado da janela")
+        self._pins.append(index)
+    
+    def unpin(self, index: int):
+        """Remove uma marca feita com `pin`"""
+        self._pins.remove(index)
+
 # Interface para integração com análise sintática
 class LexerInterface:
-    """Interface padronizada entre lexer e parser"""
+    """
+    Interface padronizada entre lexer e parser: um cursor sobre uma
+    `TokenWindow` alimentada por `ApolloLexer.iter_tokens`, com lookahead de
+    k tokens e marcas para retroceder sem re-tokenizar.
+    """
     
-    def __init__(self, lexer: ApolloLexer):
+    def __init__(self, lexer: ApolloLexer, buffer_size: int = 16):
         self.lexer = lexer
-        self.token_buffer = deque()
-        self.buffer_size = 10
+        self.buffer_size = buffer_size
+        self.position = 0
+        self._window: Optional[TokenWindow] = None
+    
+    @property
+    def window(self) -> TokenWindow:
+        """Janela sobre o código-fonte atual do lexer, criada no primeiro uso"""
+        if self._window is None:
+            self._window = TokenWindow(self.lexer.iter_tokens(self.lexer.source), self.buffer_size)
+            self._window.floor = self.position
+        return self._window
+    
+    def reset(self, source_code: str):
+        """Reinicia com novo código-fonte"""
+        self.lexer.reset(source_code)
+        self.position = 0
+        self._window = None
+    
+    def _token(self, index: int) -> Token:
+        try:
+            return self.window[index]
+        except IndexError:
+            return self.window[self.window.end - 1]  # depois do fim, repete o EOF
     
     def next_token(self) -> Token:
         """Retorna o próximo token"""
-        if self.token_buffer:
-            return self.token_buffer.popleft()
-        # Use consume_token para avançar corretamente o stream e evitar
-        # retornar o mesmo token repetidamente (causando loop infinito).
-        return self.lexer.consume_token()
+        token = self._token(self.position)
+        if token.type != TokenType.EOF:
+            self.position += 1
+            self.window.floor = self.position
+        return token
     
     def peek_token(self, offset: int = 0) -> Token:
         """Retorna o token na posição offset sem consumir"""
-        while len(self.token_buffer) <= offset:
-            token = self.lexer.get_next_token()
-            self.token_buffer.append(token)
-        
-        return self.token_buffer[offset]
+        return self._token(self.position + offset)
+    
+    def mark(self) -> int:
+        """Marca a posição atual para um `reset_to` posterior"""
+        self.window.pin(self.position)
+        return self.position
+    
+    def reset_to(self, mark: int):
+        """Volta à posição marcada e libera a marca"""
+        self.window.unpin(mark)
+        self.position = mark
+        self.window.floor = mark
+    
+    def release(self, mark: int):
+        """Libera a marca sem voltar (a especulação deu certo)"""
+        self.window.unpin(mark)
     
     def backtrack(self, count: int = 1):
-        """Retrocede count tokens (implementação simplificada)"""
-        # Em uma implementação completa, seria necessário manter
-        # um histórico de tokens consumidos
-        pass
+        """Retrocede count tokens, desde que ainda estejam na janela"""
+        if self.position - count < self.window.start:
+            raise LookupError(f"Não é possível retroceder {count} tokens: já foram descartados da janela")
+        self.position -= count
+        self.window.floor = self.position
     
     def get_position(self) -> Tuple[int, int]:
         """Retorna a posição atual (linha, coluna)"""
-        return (self.lexer.line, self.lexer.column)
+        token = self.peek_token()
+        return (token.line, token.column)
@@ -0,0 +1,226 @@
+"""
+Gerador do scanner especializado da linguagem Apollo.
+
+A partir das tabelas do AFD combinado (`scanner_tables`) gera um módulo
+Python independente com uma função `scan` equivalente a
+`ScannerTables.scan`, no estilo do re2c: cada estado vira um trecho de código
+próprio, as transições viram comparações com as classes de caractere e o
+estado seguinte é escrito logo abaixo, sem consultar a tabela. Laços de um
+estado sobre si mesmo (corpo de identificadores, números, strings e
+comentários) viram um laço apertado ou um único `bytes.find`.
+
+Uso (em tempo de build, ver scripts/setup.sh):
+    python lexer/scanner_codegen.py
+
+O módulo gerado (`_scanner_gen.py`, fora do controle de versão) guarda o
+hash das tabelas de que veio; `ApolloLexer` só o usa quando o hash confere e
+volta ao caminho por tabelas caso contrário.
+"""
+
+from typing import Callable, Dict, List, Optional, Tuple
+import hashlib
+import importlib
+import os
+import sys
+
+from scanner_tables import ScannerTables
+
+# Versão do formato do código gerado: entra no hash, então mudar o gerador
+# invalida módulos gerados por versões anteriores
+GENERATOR_FORMAT = 'APLXGEN1'
+
+GENERATED_MODULE = '_scanner_gen'
+
+# Profundidade máxima de estados escritos um dentro do outro; abaixo disso
+# o estado é alcançado pelo despachante do laço principal
+_MAX_DEPTH = 16
+
+ScanFunction = Callable[[bytes, int, int], Tuple[int, int, bool]]
+
+
+def tables_digest(tables: ScannerTables) -> str:
+    """Hash das tabelas e do formato do gerador"""
+    data = GENERATOR_FORMAT.encode('ascii') + tables.to_bytes()
+    return hashlib.sha256(data).hexdigest()[:32]
+
+
+class _Emitter:
+    """Escreve o código da função `scan` estado a estado"""
+
+    def __init__(self, tables: ScannerTables):
+        self.tables = tables
+        self.lines: List[str] = []
+        self.constants: List[str] = []
+        self._sets: Dict[Tuple[int, ...], str] = {}
+
+        # Transições de cada estado agrupadas por destino (na ordem das classes)
+        n = tables.num_classes
+        self.edges: List[Dict[int, List[int]]] = []
+        predecessors: Dict[int, set] = {}
+        for state in range(tables.num_states):
+            edges: Dict[int, List[int]] = {}
+            for cls in range(n):
+                target = tables.transitions[state * n + cls]
+                if target >= 0:
+                    edges.setdefault(target, []).append(cls)
+                    if target != state:
+                        predecessors.setdefault(target, set()).add(state)
+            self.edges.append(edges)
+
+        # Estados com mais de uma origem e transições próprias ficam no
+        # despachante (evita duplicar subárvores); folhas são duplicadas
+        self.shared = {state for state, origins in predecessors.items()
+                       if len(origins) > 1 and any(t != state for t in self.edges[state])}
+        self.blocks: List[int] = []
+
+    def emit(self, indent: int, line: str):
+        self.lines.append('    ' * indent + line)
+
+    def class_set(self, classes: List[int]) -> str:
+        """Constante com a tabela de pertinência (256 bytes) de um conjunto de classes"""
+        key = tuple(classes)
+        name = self._sets.get(key)
+        if name is None:
+            name = f'_SET{len(self._sets)}'
+            self._sets[key] = name
+            table = bytes(1 if c in key else 0 for c in range(256))
+            self.constants.append(f'{name} = {table!r}')
+        return name
+
+    def condition(self, classes: List[int]) -> str:
+        if len(classes) == 1:
+            return f'c == {classes[0]}'
+        if len(classes) <= 3:
+            return ' or '.join(f'c == {c}' for c in classes)
+        return f'{self.class_set(classes)}[c]'
+
+    def enter(self, state: int, indent: int):
+        """Código executado ao consumir o caractere que leva a state"""
+        kind = self.tables.accept[state]
+        if kind >= 0:
+            self.emit(indent, f'best_kind = {kind}')
+            self.emit(indent, 'best_end = pos')
+
+    def body(self, state: int, indent: int, path: Tuple[int, ...]):
+        """Código do estado depois da entrada: laço sobre si mesmo e transições"""
+        tables = self.tables
+        edges = self.edges[state]
+
+        loop = edges.get(state)
+        if loop:
+            others = [c for c in range(tables.num_classes) if c not in loop]
+            if len(others) == 1:
+                self.emit(indent, f'pos = classes.find({bytes(others)!r}, pos, end)')
+                self.emit(indent, 'if pos < 0:')
+                self.emit(indent + 1, 'pos = end')
+            elif len(loop) == 1:
+                self.emit(indent, f'while pos < end and classes[pos] == {loop[0]}:')
+                self.emit(indent + 1, 'pos += 1')
+            else:
+                self.emit(indent, f'while pos < end and {self.class_set(loop)}[classes[pos]]:')
+                self.emit(indent + 1, 'pos += 1')
+            if tables.accept[state] >= 0:
+                self.emit(indent, 'best_end = pos')
+
+        targets = [(target, classes) for target, classes in edges.items() if target != state]
+        if not targets:
+            self.emit(indent, 'return best_kind, best_end, pos >= end')
+            return
+
+        self.emit(indent, 'if pos >= end:')
+        self.emit(indent + 1, 'return best_kind, best_end, True')
+        self.emit(indent, 'c = classes[pos]')
+        for target, classes in targets:
+            self.emit(indent, f'if {self.condition(classes)}:')
+            self.emit(indent + 1, 'pos += 1')
+            self.enter(target, indent + 1)
+            if (target in self.shared or target in path or target == tables.initial_state
+                    or len(path) >= _MAX_DEPTH):
+                self.jump(target, indent + 1)
+            else:
+                self.body(target, indent + 1, path + (target,))
+        self.emit(indent, 'return best_kind, best_end, False')
+
+    def jump(self, target: int, indent: int):
+        if target not in self.blocks:
+            self.blocks.append(target)
+        self.emit(indent, f'state = {target}')
+        self.emit(indent, 'continue')
+
+    def function(self) -> List[str]:
+        initial = self.tables.initial_state
+        self.blocks.append(initial)
+        self.emit(0, 'def scan(classes, pos, end):')
+        self.emit(1, '"""Mesmo contrato de ScannerTables.scan: (tipo, posição_final, no_fim)"""')
+        self.emit(1, 'best_kind = -1')
+        self.emit(1, 'best_end = pos')
+        self.emit(1, f'state = {initial}')
+        self.emit(1, 'while True:')
+        done = 0
+        while done < len(self.blocks):
+            state = self.blocks[done]
+            done += 1
+            self.emit(2, f'if state == {state}:')
+            self.body(state, 3, (state,))
+        self.emit(2, 'raise AssertionError(state)')
+        return self.lines
+
+
+def generate_scanner_source(tables: ScannerTables) -> str:
+    """Código-fonte do módulo com o scanner especializado para as tabelas dadas"""
+    emitter = _Emitter(tables)
+    function = emitter.function()
+    header = [
+        '"""',
+        'Scanner especializado da linguagem Apollo.',
+        '',
+        'ARQUIVO GERADO por lexer/scanner_codegen.py - não edite à mão.',
+        '"""',
+        '',
+        f'TABLES_DIGEST = {tables_digest(tables)!r}',
+        '',
+    ]
+    if emitter.constants:
+        header += emitter.constants + ['']
+    return '\n'.join(header + [''] + function) + '\n'
+
+
+def default_module_path() -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), GENERATED_MODULE + '.py')
+
+
+def write_scanner_module(tables: ScannerTables, path: Optional[str] = None) -> str:
+    """Gera o módulo do scanner em path (padrão: lexer/_scanner_gen.py) e devolve o caminho"""
+    path = path or default_module_path()
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(generate_scanner_source(tables))
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_generated_scanner(tables: ScannerTables,
+                           module_name: str = GENERATED_MODULE) -> Optional[ScanFunction]:
+    """
+    Função `scan` do módulo gerado, se ele existir e tiver sido gerado a
+    partir destas mesmas tabelas; None caso contrário.
+    """
+    try:
+        module = importlib.import_module(module_name)
+    except ImportError:
+        return None
+    if getattr(module, 'TABLES_DIGEST', None) != tables_digest(tables):
+        return None
+    return module.scan
+
+
+def main():
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from apollo_lexer import ApolloLexer
+
+    path = write_scanner_module(ApolloLexer().tables)
+    print(f"Scanner especializado gerado em: {path}")
+
+
+if __name__ == '__main__':
+    main()
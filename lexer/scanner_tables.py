@@ -0,0 +1,345 @@
+"""
+Tabelas do scanner combinado da linguagem Apollo.
+
+Os autômatos de identificadores, inteiros, reais, strings, comentários,
+operadores e símbolos são unidos em um único AFN (transições-ε a partir de um
+estado inicial comum) e convertidos em AFD pela construção de subconjuntos de
+`afn_to_afd` (versão com conjuntos em bits). O alfabeto do AFN é formado por classes de caracteres, de modo
+que o AFD resultante cabe numa tabela densa indexada por
+`estado * num_classes + classe`.
+"""
+
+from array import array
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import hashlib
+import os
+import struct
+import sys
+
+from afn_to_afd import AFN, afn_para_afd_bitset, minimizar_afd
+
+# Tipos de token aceitos pelo AFD combinado, em ordem de prioridade.
+# Em caso de empate entre dois autômatos vence o que aparece primeiro,
+# exatamente como no laço de `ApolloLexer._longest_match`.
+ACCEPT_KINDS = ('IDENTIFIER', 'INTEGER', 'REAL', 'STRING', 'COMMENT', 'OPERATOR', 'SYMBOL')
+
+# Classes fixas: tudo que não tem papel próprio cai em CLASS_OTHER
+CLASS_OTHER = 0
+CLASS_LETTER = 1
+CLASS_DIGIT = 2
+
+# Formato serializado: cabeçalho, classes ASCII, transições (int32) e aceitação (int8)
+TABLE_FORMAT = b'APLXTAB1'
+_HEADER = struct.Struct('<8sHHH')
+
+LETTERS = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ_'
+DIGITS = '0123456789'
+
+
+class _ClassMap(dict):
+    """Tabela para `str.translate`: caracteres fora do ASCII viram CLASS_OTHER"""
+
+    def __missing__(self, key):
+        return CLASS_OTHER
+
+
+class ScannerTables:
+    """Tabelas densas do AFD combinado (não são alteradas após a construção)"""
+
+    def __init__(self, num_classes: int, ascii_classes: bytes,
+                 transitions: array, accept: array, initial_state: int = 0):
+        self.num_classes = num_classes
+        self.ascii_classes = ascii_classes    # classe de cada código ASCII (0..127)
+        self.transitions = transitions        # array('i'): -1 = estado morto
+        self.accept = accept                  # array('b'): índice em ACCEPT_KINDS ou -1
+        self.initial_state = initial_state
+        self.num_states = len(accept)
+
+        self._byte_table = ascii_classes + bytes(128)
+        self._char_table = _ClassMap(enumerate(ascii_classes))
+
+    def classify(self, text: str) -> bytes:
+        """Converte o texto numa sequência de classes (um byte por caractere)"""
+        if text.isascii():
+            return text.encode('ascii').translate(self._byte_table)
+        return text.translate(self._char_table).encode('latin-1')
+
+    def start_chars(self) -> str:
+        """Caracteres ASCII que podem iniciar algum token (têm transição a partir do estado inicial)"""
+        row = self.initial_state * self.num_classes
+        return ''.join(chr(c) for c in range(128)
+                       if self.transitions[row + self.ascii_classes[c]] >= 0)
+
+    def classify_bytes(self, data: bytes) -> bytes:
+        """
+        Classes de um texto já codificado em UTF-8 (um byte de classe por
+        byte). Bytes fora do ASCII viram CLASS_OTHER, a mesma classe que o
+        caractere inteiro teria em `classify`.
+        """
+        return data.translate(self._byte_table)
+
+    def scan(self, classes: bytes, pos: int, end: int) -> Tuple[int, int, bool]:
+        """
+        Executa o AFD a partir de pos e devolve (tipo, posição_final, no_fim)
+        do match mais longo, com tipo = -1 quando nenhum prefixo é aceito.
+        no_fim indica que a entrada acabou com o autômato ainda vivo, ou seja,
+        mais caracteres poderiam estender o token.
+        """
+        transitions = self.transitions
+        accept = self.accept
+        num_classes = self.num_classes
+        state = self.initial_state
+        best_kind = -1
+        best_end = pos
+
+        while pos < end:
+            state = transitions[state * num_classes + classes[pos]]
+            if state < 0:
+                return best_kind, best_end, False
+            pos += 1
+            kind = accept[state]
+            if kind >= 0:
+                best_kind = kind
+                best_end = pos
+
+        return best_kind, best_end, True
+
+    def to_bytes(self) -> bytes:
+        """Serializa as tabelas num formato binário compacto"""
+        transitions = array('i', self.transitions)
+        if sys.byteorder == 'big':
+            transitions.byteswap()
+        header = _HEADER.pack(TABLE_FORMAT, self.num_classes, self.num_states, self.initial_state)
+        return header + self.ascii_classes + transitions.tobytes() + self.accept.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'ScannerTables':
+        """Reconstrói as tabelas serializadas por `to_bytes`"""
+        if len(data) < _HEADER.size + 128:
+            raise ValueError("Tabelas do scanner truncadas")
+        magic, num_classes, num_states, initial_state = _HEADER.unpack_from(data)
+        if magic != TABLE_FORMAT:
+            raise ValueError("Formato de tabelas do scanner desconhecido")
+
+        offset = _HEADER.size
+        ascii_classes = bytes(data[offset:offset + 128])
+        offset += 128
+        transitions = array('i')
+        size = num_states * num_classes * transitions.itemsize
+        transitions.frombytes(data[offset:offset + size])
+        if sys.byteorder == 'big':
+            transitions.byteswap()
+        offset += size
+        accept = array('b')
+        accept.frombytes(data[offset:offset + num_states])
+        if len(transitions) != num_states * num_classes or len(accept) != num_states:
+            raise ValueError("Tabelas do scanner truncadas")
+        return cls(num_classes, ascii_classes, transitions, accept, initial_state)
+
+
+class _AFNBuilder:
+    """Monta o AFN combinado com estados inteiros e transições por classe"""
+
+    def __init__(self, num_classes: int):
+        self.num_classes = num_classes
+        self.transicoes: Dict[Tuple[int, object], Set[int]] = {}
+        self.finais: Dict[int, int] = {}  # estado -> índice em ACCEPT_KINDS
+        self.proximo = 1  # estado 0 é o inicial comum
+
+    def novo_estado(self) -> int:
+        estado = self.proximo
+        self.proximo += 1
+        return estado
+
+    def liga(self, origem: int, classes: Iterable[int], destino: int):
+        for classe in classes:
+            self.transicoes.setdefault((origem, classe), set()).add(destino)
+
+    def fragmento(self) -> int:
+        """Cria o estado inicial de um sub-autômato, ligado por ε ao inicial comum"""
+        inicio = self.novo_estado()
+        self.liga(0, [''], inicio)
+        return inicio
+
+
+def _char_classes(operators: Iterable[str], symbols: Iterable[str]) -> Dict[str, int]:
+    """Atribui uma classe própria a cada caractere com papel especial"""
+    especiais = set('"#\n.+-')
+    for lexema in list(operators) + list(symbols):
+        especiais.update(lexema)
+    especiais -= set(LETTERS) | set(DIGITS)
+
+    classes = {c: CLASS_LETTER for c in LETTERS}
+    classes.update({c: CLASS_DIGIT for c in DIGITS})
+    for indice, c in enumerate(sorted(especiais)):
+        classes[c] = CLASS_DIGIT + 1 + indice
+    return classes
+
+
+def build_scanner_tables(operators: Iterable[str], symbols: Iterable[str]) -> ScannerTables:
+    """Constrói o AFD combinado dos tokens Apollo e o compacta em tabelas densas"""
+    operators = sorted(operators)
+    symbols = sorted(symbols)
+    char_classes = _char_classes(operators, symbols)
+    num_classes = max(char_classes.values()) + 1
+    todas = range(num_classes)
+    kind = {nome: indice for indice, nome in enumerate(ACCEPT_KINDS)}
+
+    def cls(chars: str) -> List[int]:
+        return sorted({char_classes[c] for c in chars})
+
+    afn = _AFNBuilder(num_classes)
+
+    # Identificadores: [A-Za-z_][A-Za-z0-9_]*
+    i0, i1 = afn.fragmento(), afn.novo_estado()
+    afn.liga(i0, [CLASS_LETTER], i1)
+    afn.liga(i1, [CLASS_LETTER, CLASS_DIGIT], i1)
+    afn.finais[i1] = kind['IDENTIFIER']
+
+    # Inteiros: [+-]?[0-9]+
+    n0, n1, n2 = afn.fragmento(), afn.novo_estado(), afn.novo_estado()
+    afn.liga(n0, cls('+-'), n1)
+    afn.liga(n0, [CLASS_DIGIT], n2)
+    afn.liga(n1, [CLASS_DIGIT], n2)
+    afn.liga(n2, [CLASS_DIGIT], n2)
+    afn.finais[n2] = kind['INTEGER']
+
+    # Reais: [+-]?[0-9]+\.[0-9]+
+    r0 = afn.fragmento()
+    r1, r2, r3, r4 = (afn.novo_estado() for _ in range(4))
+    afn.liga(r0, cls('+-'), r1)
+    afn.liga(r0, [CLASS_DIGIT], r2)
+    afn.liga(r1, [CLASS_DIGIT], r2)
+    afn.liga(r2, [CLASS_DIGIT], r2)
+    afn.liga(r2, cls('.'), r3)
+    afn.liga(r3, [CLASS_DIGIT], r4)
+    afn.liga(r4, [CLASS_DIGIT], r4)
+    afn.finais[r4] = kind['REAL']
+
+    # Strings: "[^"]*"
+    aspas = char_classes['"']
+    s0, s1, s2 = afn.fragmento(), afn.novo_estado(), afn.novo_estado()
+    afn.liga(s0, [aspas], s1)
+    afn.liga(s1, [c for c in todas if c != aspas], s1)
+    afn.liga(s1, [aspas], s2)
+    afn.finais[s2] = kind['STRING']
+
+    # Comentários: #[^\n]*\n ou #[^\n]+ no fim do texto. O estado c2 só para
+    # no fim da entrada, então marcá-lo como final equivale ao caso especial
+    # de fim de texto de `AFD.simulate`.
+    quebra = char_classes['\n']
+    c0, c1, c2, c3 = afn.fragmento(), afn.novo_estado(), afn.novo_estado(), afn.novo_estado()
+    afn.liga(c0, cls('#'), c1)
+    afn.liga(c1, [c for c in todas if c != quebra], c2)
+    afn.liga(c2, [c for c in todas if c != quebra], c2)
+    afn.liga(c1, [quebra], c3)
+    afn.liga(c2, [quebra], c3)
+    afn.finais[c2] = kind['COMMENT']
+    afn.finais[c3] = kind['COMMENT']
+
+    # Operadores e símbolos: casamento exato de cada lexema
+    for lexemas, nome in ((operators, 'OPERATOR'), (symbols, 'SYMBOL')):
+        for lexema in lexemas:
+            estado = afn.fragmento()
+            for c in lexema:
+                proximo = afn.novo_estado()
+                afn.liga(estado, [char_classes[c]], proximo)
+                estado = proximo
+            afn.finais[estado] = kind[nome]
+
+    afd = afn_para_afd_bitset(AFN(
+        estados=list(range(afn.proximo)),
+        alfabeto=list(todas),
+        transicoes=afn.transicoes,
+        estado_inicial=0,
+        estados_finais=set(afn.finais),
+    ))
+    afd = minimizar_afd(afd, _rotulos(afd, afn.finais))
+    return _compact(afd, _rotulos(afd, afn.finais), char_classes, num_classes)
+
+
+def _rotulos(afd, finais: Dict[int, int]) -> Dict[str, int]:
+    """Tipo de token aceito por cada estado final do AFD (o de maior prioridade)"""
+    rotulos = {}
+    for nome, conjunto in afd.subconjuntos.items():
+        tipos = [finais[e] for e in conjunto if e in finais]
+        if tipos:
+            rotulos[nome] = min(tipos)
+    return rotulos
+
+
+def _compact(afd, rotulos: Dict[str, int], char_classes: Dict[str, int], num_classes: int) -> ScannerTables:
+    """Numera os estados do AFD e gera as tabelas densas"""
+    numero = {nome: indice for indice, nome in enumerate(afd.estados)}
+    transitions = array('i', [-1]) * (len(afd.estados) * num_classes)
+    for (origem, classe), destino in afd.transicoes.items():
+        transitions[numero[origem] * num_classes + classe] = numero[destino]
+
+    accept = array('b', [-1]) * len(afd.estados)
+    for nome, tipo in rotulos.items():
+        accept[numero[nome]] = tipo
+
+    ascii_classes = bytes(char_classes.get(chr(c), CLASS_OTHER) for c in range(128))
+    return ScannerTables(num_classes, ascii_classes, transitions, accept, numero[afd.estado_inicial])
+
+
+# ========== Cache em disco ==========
+
+_MEMORY_CACHE: Dict[str, ScannerTables] = {}
+_module_digest: Optional[str] = None
+
+
+def default_cache_dir() -> str:
+    """Diretório do cache: $APOLLO_CACHE_DIR ou $XDG_CACHE_HOME/apollo"""
+    if os.environ.get('APOLLO_CACHE_DIR'):
+        return os.environ['APOLLO_CACHE_DIR']
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'apollo')
+
+
+def spec_hash(operators: Iterable[str], symbols: Iterable[str]) -> str:
+    """
+    Hash da especificação dos tokens: operadores, símbolos, formato das
+    tabelas e o próprio código que define os autômatos (este módulo), de modo
+    que qualquer mudança na especificação invalida o cache.
+    """
+    global _module_digest
+    if _module_digest is None:
+        with open(os.path.abspath(__file__), 'rb') as f:
+            _module_digest = hashlib.sha256(f.read()).hexdigest()
+    spec = repr((TABLE_FORMAT, ACCEPT_KINDS, sorted(operators), sorted(symbols),
+                 sys.byteorder, _module_digest))
+    return hashlib.sha256(spec.encode('utf-8')).hexdigest()[:32]
+
+
+def load_scanner_tables(operators: Iterable[str], symbols: Iterable[str],
+                        cache_dir: Optional[str] = None) -> ScannerTables:
+    """
+    Retorna as tabelas do scanner para a especificação dada. Procura primeiro
+    na memória do processo, depois no cache em disco; só constrói (e grava no
+    cache) quando nenhum dos dois tem as tabelas.
+    """
+    operators = sorted(operators)
+    symbols = sorted(symbols)
+    chave = spec_hash(operators, symbols)
+    tables = _MEMORY_CACHE.get(chave)
+    if tables is not None:
+        return tables
+
+    path = os.path.join(cache_dir or default_cache_dir(), f'scanner-{chave}.bin')
+    try:
+        with open(path, 'rb') as f:
+            tables = ScannerTables.from_bytes(f.read())
+    except (OSError, ValueError):
+        tables = build_scanner_tables(operators, symbols)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f'{path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(tables.to_bytes())
+            os.replace(tmp_path, path)
+        except OSError:
+            pass  # cache indisponível (ex.: diretório somente leitura)
+
+    _MEMORY_CACHE[chave] = tables
+    return tables
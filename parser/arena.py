@@ -0,0 +1,355 @@
+"""
+Arena de nós da AST da linguagem Apollo
+
+Representação compacta opcional da AST: cada nó é uma linha, identificada
+por um índice inteiro, em colunas de arrays tipados:
+
+    kinds     tipo do nó (KIND_*)
+    flags     tipo declarado (índice em `Type`) das declarações e tipo
+              resolvido pela análise semântica (índice em `Type` + 1, 0
+              sem tipo) das expressões
+    lines     linha do nó
+    columns   coluna do nó
+    first, second, third
+              filhos (índices de linha, -1 para ausente), listas (offset
+              em `lists`), ids de nomes ou índices no pool de literais,
+              conforme o tipo do nó
+
+Listas de filhos (comandos de um bloco, argumentos) ficam em `lists` como
+[tamanho, índice, índice, ...]. Nomes, strings, números e operadores vão
+para `literals`, sem repetição.
+
+Os nós são gravados em pós-ordem (filhos antes do pai), então percorrer a
+árvore visita linhas próximas. O acesso pelo resto do compilador é feito por
+visões: `arena.node(i)` devolve um objeto da subclasse do nó correspondente
+(`isinstance`, `accept(visitor)` e os atributos continuam funcionando), que
+só lê as colunas quando um atributo é pedido.
+
+Uso:
+    arena = ASTArena.from_tree(parser.parse(codigo))
+    programa = arena.root()
+"""
+
+from array import array
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import sys
+import os
+
+# Adiciona diretório raiz ao path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from parser.ast import (
+    ASTNode, Expression, Program, VarDeclaration, Block, Assignment, IfStatement, WhileStatement,
+    WriteStatement, ReadNumberStatement, ReadTextStatement,
+    BinaryOp, UnaryOp, IntegerLiteral, RealLiteral, StringLiteral,
+    BooleanLiteral, Variable, FunctionCall, Type
+)
+
+(KIND_PROGRAM, KIND_VAR_DECLARATION, KIND_BLOCK, KIND_ASSIGNMENT, KIND_IF, KIND_WHILE,
+ KIND_WRITE, KIND_READ_NUMBER, KIND_READ_TEXT, KIND_BINARY_OP, KIND_UNARY_OP,
+ KIND_INTEGER, KIND_REAL, KIND_STRING, KIND_BOOLEAN, KIND_VARIABLE,
+ KIND_FUNCTION_CALL) = range(17)
+
+_TYPES = list(Type)
+_TYPE_INDEX = {var_type: index for index, var_type in enumerate(_TYPES)}
+
+NO_NODE = -1
+
+
+class ASTArena:
+    """Nós da AST guardados em colunas de arrays tipados"""
+
+    def __init__(self):
+        self.kinds = array('B')
+        self.flags = array('B')
+        self.lines = array('i')
+        self.columns = array('i')
+        self.first = array('i')
+        self.second = array('i')
+        self.third = array('i')
+        self.lists = array('i')
+        self.literals: List[Any] = []
+        self._literal_index: Dict[Tuple[type, Any], int] = {}
+        self._root = NO_NODE
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes ocupados pelas colunas (sem contar o pool de literais)"""
+        columns = (self.kinds, self.flags, self.lines, self.columns,
+                   self.first, self.second, self.third, self.lists)
+        return sum(len(column) * column.itemsize for column in columns)
+
+    # ========== Construção ==========
+
+    def literal(self, value: Any) -> int:
+        """Índice de value no pool de literais"""
+        # O tipo entra na chave: 1, 1.0 e True são iguais como chave de dict
+        key = (type(value), value)
+        index = self._literal_index.get(key)
+        if index is None:
+            index = len(self.literals)
+            self.literals.append(value)
+            self._literal_index[key] = index
+        return index
+
+    def add_list(self, items: List[int]) -> int:
+        offset = len(self.lists)
+        self.lists.append(len(items))
+        self.lists.extend(items)
+        return offset
+
+    def add_row(self, kind: int, line: int, column: int,
+                first: int = NO_NODE, second: int = NO_NODE, third: int = NO_NODE,
+                flags: int = 0) -> int:
+        index = len(self.kinds)
+        self.kinds.append(kind)
+        self.flags.append(flags)
+        self.lines.append(line)
+        self.columns.append(column)
+        self.first.append(first)
+        self.second.append(second)
+        self.third.append(third)
+        return index
+
+    def add(self, node: Optional[ASTNode]) -> int:
+        """
+        Grava node e seus descendentes e devolve o índice da linha de node.
+        Usa pilha explícita: árvores do LL1Parser podem ter qualquer
+        profundidade.
+        """
+        stack: List[Tuple[Optional[ASTNode], bool]] = [(node, False)]
+        done: List[int] = []
+        while stack:
+            current, ready = stack.pop()
+            if current is None:
+                done.append(NO_NODE)
+                continue
+            encoder = _ENCODERS[type(current)]
+            children = encoder[0](current)
+            if not ready:
+                stack.append((current, True))
+                stack.extend((child, False) for child in reversed(children))
+                continue
+            count = len(children)
+            indices = done[len(done) - count:]
+            del done[len(done) - count:]
+            done.append(encoder[1](self, current, indices))
+        return done.pop()
+
+    @classmethod
+    def from_tree(cls, program: Program) -> 'ASTArena':
+        """Arena com a árvore inteira de program"""
+        arena = cls()
+        arena._root = arena.add(program)
+        return arena
+
+    # ========== Leitura ==========
+
+    def root(self) -> Program:
+        return self.node(self._root)
+
+    def node(self, index: int) -> Optional[ASTNode]:
+        """Visão do nó na linha index (None para NO_NODE)"""
+        if index < 0:
+            return None
+        return _VIEWS[self.kinds[index]](self, index)
+
+    def node_list(self, offset: int) -> List[ASTNode]:
+        lists = self.lists
+        count = lists[offset]
+        return [self.node(index) for index in lists[offset + 1:offset + 1 + count]]
+
+
+# ========== Gravação de cada tipo de nó ==========
+#
+# Para cada classe: (filhos em ordem, função que grava a linha recebendo os
+# índices já gravados dos filhos)
+
+def _write_program(arena: ASTArena, node: Program, children: List[int]) -> int:
+    split = len(node.declarations)
+    return arena.add_row(KIND_PROGRAM, node.line, node.column,
+                         arena.add_list(children[:split]), arena.add_list(children[split:]))
+
+
+def _named(kind: int, attribute: str):
+    def write(arena: ASTArena, node, children: List[int]) -> int:
+        third = children[0] if children else NO_NODE
+        return arena.add_row(kind, node.line, node.column,
+                             arena.literal(getattr(node, attribute)), node.name_id, third)
+    return write
+
+
+def _with_children(kind: int):
+    def write(arena: ASTArena, node, children: List[int]) -> int:
+        return arena.add_row(kind, node.line, node.column, *children)
+    return write
+
+
+def _with_list(kind: int):
+    def write(arena: ASTArena, node, children: List[int]) -> int:
+        return arena.add_row(kind, node.line, node.column, arena.add_list(children))
+    return write
+
+
+def _with_operator(kind: int):
+    def write(arena: ASTArena, node, children: List[int]) -> int:
+        return arena.add_row(kind, node.line, node.column, *children, third=arena.literal(node.operator))
+    return write
+
+
+def _literal(kind: int):
+    def write(arena: ASTArena, node, children: List[int]) -> int:
+        return arena.add_row(kind, node.line, node.column, arena.literal(node.value))
+    return write
+
+
+def _write_var_declaration(arena: ASTArena, node: VarDeclaration, children: List[int]) -> int:
+    index = _named(KIND_VAR_DECLARATION, 'name')(arena, node, children)
+    arena.flags[index] = _TYPE_INDEX[node.var_type]
+    return index
+
+
+def _write_boolean(arena: ASTArena, node: BooleanLiteral, children: List[int]) -> int:
+    return arena.add_row(KIND_BOOLEAN, node.line, node.column, int(node.value))
+
+
+def _write_function_call(arena: ASTArena, node: FunctionCall, children: List[int]) -> int:
+    return arena.add_row(KIND_FUNCTION_CALL, node.line, node.column,
+                         arena.literal(node.name), arena.add_list(children))
+
+
+def _typed(write: Callable) -> Callable:
+    """Gravação de uma expressão que guarda também o tipo resolvido em flags"""
+    def write_typed(arena: ASTArena, node: Expression, children: List[int]) -> int:
+        index = write(arena, node, children)
+        if node.resolved_type is not None:
+            arena.flags[index] = _TYPE_INDEX[node.resolved_type] + 1
+        return index
+    return write_typed
+
+
+_NO_CHILDREN = lambda node: ()
+
+_ENCODERS: Dict[type, Tuple[Callable, Callable]] = {
+    Program: (lambda node: node.declarations + node.statements, _write_program),
+    VarDeclaration: (lambda node: (node.initial_value,) if node.initial_value is not None else (),
+                     _write_var_declaration),
+    Block: (lambda node: node.statements, _with_list(KIND_BLOCK)),
+    Assignment: (lambda node: (node.value,), _named(KIND_ASSIGNMENT, 'variable')),
+    IfStatement: (lambda node: (node.condition, node.then_block, node.else_block), _with_children(KIND_IF)),
+    WhileStatement: (lambda node: (node.condition, node.body), _with_children(KIND_WHILE)),
+    WriteStatement: (lambda node: node.expressions, _with_list(KIND_WRITE)),
+    ReadNumberStatement: (_NO_CHILDREN, _named(KIND_READ_NUMBER, 'variable')),
+    ReadTextStatement: (_NO_CHILDREN, _named(KIND_READ_TEXT, 'variable')),
+    BinaryOp: (lambda node: (node.left, node.right), _typed(_with_operator(KIND_BINARY_OP))),
+    UnaryOp: (lambda node: (node.operand,), _typed(_with_operator(KIND_UNARY_OP))),
+    IntegerLiteral: (_NO_CHILDREN, _typed(_literal(KIND_INTEGER))),
+    RealLiteral: (_NO_CHILDREN, _typed(_literal(KIND_REAL))),
+    StringLiteral: (_NO_CHILDREN, _typed(_literal(KIND_STRING))),
+    BooleanLiteral: (_NO_CHILDREN, _typed(_write_boolean)),
+    Variable: (_NO_CHILDREN, _typed(_named(KIND_VARIABLE, 'name'))),
+    FunctionCall: (lambda node: node.arguments, _typed(_write_function_call)),
+}
+
+
+# ========== Visões ==========
+#
+# Cada visão é subclasse da classe do nó e troca os campos por propriedades
+# que leem as colunas; accept, __repr__ e isinstance vêm da classe do nó.
+
+def _child(column: str):
+    return lambda arena, index: arena.node(getattr(arena, column)[index])
+
+
+def _children(column: str):
+    return lambda arena, index: arena.node_list(getattr(arena, column)[index])
+
+
+def _pooled(column: str):
+    return lambda arena, index: arena.literals[getattr(arena, column)[index]]
+
+
+def _number(column: str):
+    return lambda arena, index: getattr(arena, column)[index]
+
+
+_FIELDS: Dict[int, Tuple[type, Dict[str, Callable]]] = {
+    KIND_PROGRAM: (Program, {'declarations': _children('first'), 'statements': _children('second')}),
+    KIND_VAR_DECLARATION: (VarDeclaration, {
+        'var_type': lambda arena, index: _TYPES[arena.flags[index]],
+        'name': _pooled('first'), 'name_id': _number('second'), 'initial_value': _child('third')}),
+    KIND_BLOCK: (Block, {'statements': _children('first')}),
+    KIND_ASSIGNMENT: (Assignment, {'variable': _pooled('first'), 'name_id': _number('second'),
+                                   'value': _child('third')}),
+    KIND_IF: (IfStatement, {'condition': _child('first'), 'then_block': _child('second'),
+                            'else_block': _child('third')}),
+    KIND_WHILE: (WhileStatement, {'condition': _child('first'), 'body': _child('second')}),
+    KIND_WRITE: (WriteStatement, {'expressions': _children('first')}),
+    KIND_READ_NUMBER: (ReadNumberStatement, {'variable': _pooled('first'), 'name_id': _number('second')}),
+    KIND_READ_TEXT: (ReadTextStatement, {'variable': _pooled('first'), 'name_id': _number('second')}),
+    KIND_BINARY_OP: (BinaryOp, {'left': _child('first'), 'right': _child('second'),
+                                'operator': _pooled('third')}),
+    KIND_UNARY_OP: (UnaryOp, {'operand': _child('first'), 'operator': _pooled('third')}),
+    KIND_INTEGER: (IntegerLiteral, {'value': _pooled('first')}),
+    KIND_REAL: (RealLiteral, {'value': _pooled('first')}),
+    KIND_STRING: (StringLiteral, {'value': _pooled('first')}),
+    KIND_BOOLEAN: (BooleanLiteral, {'value': lambda arena, index: bool(arena.first[index])}),
+    KIND_VARIABLE: (Variable, {'name': _pooled('first'), 'name_id': _number('second')}),
+    KIND_FUNCTION_CALL: (FunctionCall, {'name': _pooled('first'), 'arguments': _children('second')}),
+}
+
+
+def _view_init(self, arena: ASTArena, index: int):
+    self._arena = arena
+    self._index = index
+
+
+def _read_only(name: str, read: Callable) -> property:
+    def get(self):
+        return read(self._arena, self._index)
+
+    def set(self, value):
+        raise AttributeError(f"nó da arena é somente leitura: {name}")
+    return property(get, set)
+
+
+def _get_type(self) -> Optional[Type]:
+    flag = self._arena.flags[self._index]
+    return _TYPES[flag - 1] if flag else None
+
+
+def _set_type(self, value: Optional[Type]):
+    # Único campo gravável: a análise semântica anota os tipos também na arena
+    self._arena.flags[self._index] = 0 if value is None else _TYPE_INDEX[value] + 1
+
+
+def _make_view(node_class: type, fields: Dict[str, Callable]) -> type:
+    namespace = {
+        '__module__': __name__,
+        '__slots__': ('_arena', '_index'),
+        '__init__': _view_init,
+        'index': property(lambda self: self._index),
+        'line': _read_only('line', lambda arena, index: arena.lines[index]),
+        'column': _read_only('column', lambda arena, index: arena.columns[index]),
+    }
+    for name, read in fields.items():
+        namespace[name] = _read_only(name, read)
+    if issubclass(node_class, Expression):
+        namespace['resolved_type'] = property(_get_type, _set_type)
+    return type(node_class.__name__ + 'View', (node_class,), namespace)
+
+
+_VIEWS: Dict[int, type] = {kind: _make_view(node_class, fields)
+                           for kind, (node_class, fields) in _FIELDS.items()}
+
+
+def node_key(node: ASTNode) -> Any:
+    """
+    Chave estável de um nó para dicionários: o próprio nó ou, numa visão da
+    arena (um objeto novo a cada acesso), o par (arena, índice do nó)
+    """
+    arena = getattr(node, '_arena', None)
+    return node if arena is None else (arena, node._index)
@@ -17,9 +17,21 @@ class Type(Enum):
     VOID = "void"
 
 
+def symbol_key(name: str, name_id: int = -1):
+    """
+    Chave de um nome nas tabelas das fases seguintes: o id internado pelo
+    lexer quando existe (nós vindos do parser), senão o próprio nome (nós
+    construídos à mão).
+    """
+    return name_id if name_id >= 0 else name
+
+
 class ASTNode(ABC):
     """Classe base para todos os nós da AST"""
     
+    # Sem __dict__: programas grandes têm milhões de nós
+    __slots__ = ('line', 'column')
+    
     def __init__(self, line: int = 0, column: int = 0):
         self.line = line
         self.column = column
@@ -35,6 +47,8 @@ class ASTNode(ABC):
 class Program(ASTNode):
     """Nó raiz do programa"""
     
+    __slots__ = ('declarations', 'statements')
+    
     def __init__(self, declarations: List[ASTNode], statements: List[ASTNode], line: int = 0, column: int = 0):
         super().__init__(line, column)
         self.declarations = declarations
@@ -52,10 +66,14 @@ class Program(ASTNode):
 class VarDeclaration(ASTNode):
     """Declaração de variável"""
     
-    def __init__(self, var_type: Type, name: str, initial_value: Optional[ASTNode] = None, line: int = 0, column: int = 0):
+    __slots__ = ('var_type', 'name', 'name_id', 'initial_value')
+    
+    def __init__(self, var_type: Type, name: str, initial_value: Optional[ASTNode] = None, line: int = 0, column: int = 0,
+                 name_id: int = -1):
         super().__init__(line, column)
         self.var_type = var_type
         self.name = name
+        self.name_id = name_id
         self.initial_value = initial_value
     
     def accept(self, visitor):
@@ -70,6 +88,8 @@ class VarDeclaration(ASTNode):
 class Block(ASTNode):
     """Bloco de comandos"""
     
+    __slots__ = ('statements',)
+    
     def __init__(self, statements: List[ASTNode], line: int = 0, column: int = 0):
         super().__init__(line, column)
         self.statements = statements
@@ -84,9 +104,12 @@ class Block(ASTNode):
 class Assignment(ASTNode):
     """Atribuição de valor"""
     
-    def __init__(self, variable: str, value: ASTNode, line: int = 0, column: int = 0):
+    __slots__ = ('variable', 'name_id', 'value')
+    
+    def __init__(self, variable: str, value: ASTNode, line: int = 0, column: int = 0, name_id: int = -1):
         super().__init__(line, column)
         self.variable = variable
+        self.name_id = name_id
         self.value = value
     
     def accept(self, visitor):
@@ -99,6 +122,8 @@ class Assignment(ASTNode):
 class IfStatement(ASTNode):
     """Comando condicional"""
     
+    __slots__ = ('condition', 'then_block', 'else_block')
+    
     def __init__(self, condition: ASTNode, then_block: ASTNode, else_block: Optional[ASTNode] = None, line: int = 0, column: int = 0):
         super().__init__(line, column)
         self.condition = condition
@@ -115,6 +140,8 @@ class IfStatement(ASTNode):
 class WhileStatement(ASTNode):
     """Comando de repetição enquanto"""
     
+    __slots__ = ('condition', 'body')
+    
     def __init__(self, condition: ASTNode, body: ASTNode, line: int = 0, column: int = 0):
         super().__init__(line, column)
         self.condition = condition
@@ -130,6 +157,8 @@ class WhileStatement(ASTNode):
 class WriteStatement(ASTNode):
     """Comando de escrita (escreva)"""
     
+    __slots__ = ('expressions',)
+    
     def __init__(self, expressions: List[ASTNode], line: int = 0, column: int = 0):
         super().__init__(line, column)
         self.expressions = expressions
@@ -144,9 +173,12 @@ class WriteStatement(ASTNode):
 class ReadNumberStatement(ASTNode):
     """Comando de leitura de número (leia_numero)"""
     
-    def __init__(self, variable: str, line: int = 0, column: int = 0):
+    __slots__ = ('variable', 'name_id')
+    
+    def __init__(self, variable: str, line: int = 0, column: int = 0, name_id: int = -1):
         super().__init__(line, column)
         self.variable = variable
+        self.name_id = name_id
     
     def accept(self, visitor):
         return visitor.visit_read_number_statement(self)
@@ -158,9 +190,12 @@ class ReadNumberStatement(ASTNode):
 class ReadTextStatement(ASTNode):
     """Comando de leitura de texto (leia_texto)"""
     
-    def __init__(self, variable: str, line: int = 0, column: int = 0):
+    __slots__ = ('variable', 'name_id')
+    
+    def __init__(self, variable: str, line: int = 0, column: int = 0, name_id: int = -1):
         super().__init__(line, column)
         self.variable = variable
+        self.name_id = name_id
     
     def accept(self, visitor):
         return visitor.visit_read_text_statement(self)
@@ -171,9 +206,22 @@ class ReadTextStatement(ASTNode):
 
 # ========== Expressions ==========
 
-class BinaryOp(ASTNode):
+class Expression(ASTNode):
+    """Classe base das expressões"""
+    
+    # Tipo da expressão, anotado pela análise semântica (None antes dela)
+    __slots__ = ('resolved_type',)
+    
+    def __init__(self, line: int = 0, column: int = 0):
+        super().__init__(line, column)
+        self.resolved_type: Optional[Type] = None
+
+
+class BinaryOp(Expression):
     """Operação binária"""
     
+    __slots__ = ('operator', 'left', 'right')
+    
     def __init__(self, operator: str, left: ASTNode, right: ASTNode, line: int = 0, column: int = 0):
         super().__init__(line, column)
         self.operator = operator
@@ -187,9 +235,11 @@ class BinaryOp(ASTNode):
         return f"BinaryOp({self.operator}, {self.left}, {self.right})"
 
 
-class UnaryOp(ASTNode):
+class UnaryOp(Expression):
     """Operação unária"""
     
+    __slots__ = ('operator', 'operand')
+    
     def __init__(self, operator: str, operand: ASTNode, line: int = 0, column: int = 0):
         super().__init__(line, column)
         self.operator = operator
@@ -202,9 +252,11 @@ class UnaryOp(ASTNode):
         return f"UnaryOp({self.operator}, {self.operand})"
 
 
-class IntegerLiteral(ASTNode):
+class IntegerLiteral(Expression):
     """Literal inteiro"""
     
+    __slots__ = ('value',)
+    
     def __init__(self, value: int, line: int = 0, column: int = 0):
         super().__init__(line, column)
         self.value = value
@@ -216,9 +268,11 @@ class IntegerLiteral(ASTNode):
         return f"IntegerLiteral({self.value})"
 
 
-class RealLiteral(ASTNode):
+class RealLiteral(Expression):
     """Literal real"""
     
+    __slots__ = ('value',)
+    
     def __init__(self, value: float, line: int = 0, column: int = 0):
         super().__init__(line, column)
         self.value = value
@@ -230,9 +284,11 @@ class RealLiteral(ASTNode):
         return f"RealLiteral({self.value})"
 
 
-class StringLiteral(ASTNode):
+class StringLiteral(Expression):
     """Literal string"""
     
+    __slots__ = ('value',)
+    
     def __init__(self, value: str, line: int = 0, column: int = 0):
         super().__init__(line, column)
         self.value = value
@@ -244,9 +300,11 @@ class StringLiteral(ASTNode):
         return f"StringLiteral('{self.value}')"
 
 
-class BooleanLiteral(ASTNode):
+class BooleanLiteral(Expression):
     """Literal booleano"""
     
+    __slots__ = ('value',)
+    
     def __init__(self, value: bool, line: int = 0, column: int = 0):
         super().__init__(line, column)
         self.value = value
@@ -258,12 +316,15 @@ class BooleanLiteral(ASTNode):
         return f"BooleanLiteral({self.value})"
 
 
-class Variable(ASTNode):
+class Variable(Expression):
     """Referência a variável"""
     
-    def __init__(self, name: str, line: int = 0, column: int = 0):
+    __slots__ = ('name', 'name_id')
+    
+    def __init__(self, name: str, line: int = 0, column: int = 0, name_id: int = -1):
         super().__init__(line, column)
         self.name = name
+        self.name_id = name_id
     
     def accept(self, visitor):
         return visitor.visit_variable(self)
@@ -272,9 +333,11 @@ class Variable(ASTNode):
         return f"Variable({self.name})"
 
 
-class FunctionCall(ASTNode):
+class FunctionCall(Expression):
     """Chamada de função"""
     
+    __slots__ = ('name', 'arguments')
+    
     def __init__(self, name: str, arguments: List[ASTNode] = None, line: int = 0, column: int = 0):
         super().__init__(line, column)
         self.name = name
@@ -0,0 +1,438 @@
+"""
+Cache binário da AST da linguagem Apollo
+
+A AST de um código já compilado é gravada em disco num formato binário
+compacto e versionado (não é pickle) e recarregada com uma única leitura de
+arquivo quando o mesmo código é compilado de novo, sem lexer nem parser.
+
+A chave de cada entrada é o hash do código-fonte junto com a versão do
+compilador (o hash dos módulos que produzem a AST), então qualquer mudança
+no código ou no front-end invalida a entrada.
+
+Formato (`AST_FORMAT`):
+
+    magia (8 bytes)
+    tabela de strings: quantidade, e para cada uma tamanho e bytes UTF-8
+    nós em pós-ordem (filhos antes do pai), cada um com:
+        tipo do nó (byte, códigos KIND_* de `parser.arena`)
+        flags (byte: filhos opcionais presentes, nome com id internado)
+        linha (diferença com sinal para a do nó anterior), coluna
+        campos do tipo (índices na tabela de strings, tamanhos de listas,
+        valores inteiros); o primeiro campo sempre existe (0 se o tipo
+        não tem campos)
+
+Todos os inteiros são varints (LEB128; os com sinal em zigzag), exceto os
+reais (double de 8 bytes depois do primeiro campo). Os ids internados dos nomes não são gravados: na
+carga os nomes são internados de novo no `Interner` do lexer em uso.
+"""
+
+from typing import Callable, Dict, List, Optional, Tuple, Union
+import gc
+import hashlib
+import os
+import struct
+import sys
+
+# Adiciona diretório raiz e o do lexer ao path
+root_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, root_dir)
+sys.path.insert(0, os.path.join(root_dir, 'lexer'))
+
+from lexer.apollo_lexer import BytesLike, Interner
+from scanner_tables import default_cache_dir
+from parser.ast import (
+    ASTNode, Program, VarDeclaration, Block, Assignment, IfStatement, WhileStatement,
+    WriteStatement, ReadNumberStatement, ReadTextStatement,
+    BinaryOp, UnaryOp, IntegerLiteral, RealLiteral, StringLiteral,
+    BooleanLiteral, Variable, FunctionCall, Type
+)
+from parser.arena import (
+    KIND_PROGRAM, KIND_VAR_DECLARATION, KIND_BLOCK, KIND_ASSIGNMENT, KIND_IF, KIND_WHILE,
+    KIND_WRITE, KIND_READ_NUMBER, KIND_READ_TEXT, KIND_BINARY_OP, KIND_UNARY_OP,
+    KIND_INTEGER, KIND_REAL, KIND_STRING, KIND_BOOLEAN, KIND_VARIABLE, KIND_FUNCTION_CALL
+)
+
+AST_FORMAT = b'APLXAST1'
+
+# Módulos cujo código define a AST produzida a partir de um código-fonte
+_FRONTEND_MODULES = (
+    os.path.join('lexer', 'apollo_lexer.py'),
+    os.path.join('lexer', 'scanner_tables.py'),
+    os.path.join('parser', 'parser.py'),
+    os.path.join('parser', 'ast.py'),
+    os.path.join('parser', 'arena.py'),
+    os.path.join('parser', 'ast_cache.py'),
+)
+
+# Flags dos nós: filhos opcionais presentes e nome com id internado
+FLAG_FIRST = 1
+FLAG_SECOND = 2
+FLAG_NAME_ID = 4
+
+_TYPES = list(Type)
+_TYPE_INDEX = {var_type: index for index, var_type in enumerate(_TYPES)}
+_DOUBLE = struct.Struct('<d')
+# Diferença de linha de cada varint zigzag de um byte
+_LINE_DELTAS = [-(value >> 1) - 1 if value & 1 else value >> 1 for value in range(0x80)]
+
+_version: Optional[str] = None
+
+
+def compiler_version() -> str:
+    """Hash do formato e do código do front-end (lexer, parser e AST)"""
+    global _version
+    if _version is None:
+        digest = hashlib.sha256(AST_FORMAT)
+        root = os.path.abspath(root_dir)
+        for module in _FRONTEND_MODULES:
+            with open(os.path.join(root, module), 'rb') as f:
+                digest.update(f.read())
+        _version = digest.hexdigest()
+    return _version
+
+
+# ========== Serialização ==========
+
+class _Writer:
+    def __init__(self):
+        self.out = bytearray()
+        self.strings: Dict[str, int] = {}
+        self.line = 0
+
+    def varint(self, value: int):
+        out = self.out
+        while value >= 0x80:
+            out.append((value & 0x7F) | 0x80)
+            value >>= 7
+        out.append(value)
+
+    def signed(self, value: int):
+        self.varint(value * 2 if value >= 0 else -value * 2 - 1)
+
+    def string(self, value: str):
+        index = self.strings.get(value)
+        if index is None:
+            index = self.strings[value] = len(self.strings)
+        self.varint(index)
+
+    def header(self, kind: int, node: ASTNode, flags: int = 0):
+        self.out.append(kind)
+        self.out.append(flags)
+        self.signed(node.line - self.line)
+        self.line = node.line
+        self.varint(node.column)
+
+    def named(self, kind: int, node: ASTNode, name: str, flags: int = 0):
+        if node.name_id >= 0:
+            flags |= FLAG_NAME_ID
+        self.header(kind, node, flags)
+        self.string(name)
+
+
+def _optional(*nodes: Optional[ASTNode]) -> int:
+    flags = 0
+    for bit, node in zip((FLAG_FIRST, FLAG_SECOND), nodes):
+        if node is not None:
+            flags |= bit
+    return flags
+
+
+def _write_program(w: _Writer, node: Program):
+    w.header(KIND_PROGRAM, node)
+    w.varint(len(node.declarations))
+    w.varint(len(node.statements))
+
+
+def _write_var_declaration(w: _Writer, node: VarDeclaration):
+    w.named(KIND_VAR_DECLARATION, node, node.name, _optional(node.initial_value))
+    w.varint(_TYPE_INDEX[node.var_type])
+
+
+def _write_if(w: _Writer, node: IfStatement):
+    w.header(KIND_IF, node, _optional(node.then_block, node.else_block))
+    w.varint(0)
+
+
+def _write_while(w: _Writer, node: WhileStatement):
+    w.header(KIND_WHILE, node, _optional(node.body))
+    w.varint(0)
+
+
+def _write_list(kind: int, attribute: str):
+    def write(w: _Writer, node: ASTNode):
+        w.header(kind, node)
+        w.varint(len(getattr(node, attribute)))
+    return write
+
+
+def _write_named(kind: int, attribute: str):
+    def write(w: _Writer, node: ASTNode):
+        w.named(kind, node, getattr(node, attribute))
+    return write
+
+
+def _write_operator(kind: int):
+    def write(w: _Writer, node: ASTNode):
+        w.header(kind, node)
+        w.string(node.operator)
+    return write
+
+
+def _write_integer(w: _Writer, node: IntegerLiteral):
+    w.header(KIND_INTEGER, node)
+    w.signed(node.value)
+
+
+def _write_real(w: _Writer, node: RealLiteral):
+    w.header(KIND_REAL, node)
+    w.varint(0)
+    w.out += _DOUBLE.pack(node.value)
+
+
+def _write_string(w: _Writer, node: StringLiteral):
+    w.header(KIND_STRING, node)
+    w.string(node.value)
+
+
+def _write_boolean(w: _Writer, node: BooleanLiteral):
+    w.header(KIND_BOOLEAN, node)
+    w.varint(1 if node.value else 0)
+
+
+def _write_function_call(w: _Writer, node: FunctionCall):
+    w.header(KIND_FUNCTION_CALL, node)
+    w.string(node.name)
+    w.varint(len(node.arguments))
+
+
+def _none(node):
+    return ()
+
+
+# Para cada classe: (filhos na ordem de gravação, gravação do registro do nó)
+_WRITERS: Dict[type, Tuple[Callable, Callable]] = {
+    Program: (lambda node: node.declarations + node.statements, _write_program),
+    VarDeclaration: (lambda node: (node.initial_value,), _write_var_declaration),
+    Block: (lambda node: node.statements, _write_list(KIND_BLOCK, 'statements')),
+    Assignment: (lambda node: (node.value,), _write_named(KIND_ASSIGNMENT, 'variable')),
+    IfStatement: (lambda node: (node.condition, node.then_block, node.else_block), _write_if),
+    WhileStatement: (lambda node: (node.condition, node.body), _write_while),
+    WriteStatement: (lambda node: node.expressions, _write_list(KIND_WRITE, 'expressions')),
+    ReadNumberStatement: (_none, _write_named(KIND_READ_NUMBER, 'variable')),
+    ReadTextStatement: (_none, _write_named(KIND_READ_TEXT, 'variable')),
+    BinaryOp: (lambda node: (node.left, node.right), _write_operator(KIND_BINARY_OP)),
+    UnaryOp: (lambda node: (node.operand,), _write_operator(KIND_UNARY_OP)),
+    IntegerLiteral: (_none, _write_integer),
+    RealLiteral: (_none, _write_real),
+    StringLiteral: (_none, _write_string),
+    BooleanLiteral: (_none, _write_boolean),
+    Variable: (_none, _write_named(KIND_VARIABLE, 'name')),
+    FunctionCall: (lambda node: node.arguments, _write_function_call),
+}
+
+
+def serialize_ast(program: Program) -> bytes:
+    """Serializa a árvore de program no formato `AST_FORMAT`"""
+    w = _Writer()
+    # Pós-ordem com pilha explícita: a profundidade da árvore não tem limite
+    stack: List[Tuple[ASTNode, bool]] = [(program, False)]
+    while stack:
+        node, ready = stack.pop()
+        children, write = _WRITERS[type(node)]
+        if ready:
+            write(w, node)
+            continue
+        stack.append((node, True))
+        stack.extend((child, False) for child in reversed(children(node)) if child is not None)
+
+    header = bytearray(AST_FORMAT)
+    table = _Writer()
+    table.varint(len(w.strings))
+    for value in w.strings:
+        data = value.encode('utf-8')
+        table.varint(len(data))
+        table.out += data
+    return bytes(header + table.out + w.out)
+
+
+# ========== Desserialização ==========
+
+def deserialize_ast(data: BytesLike, interner: Optional[Interner] = None) -> Program:
+    """
+    Reconstrói a árvore gravada por `serialize_ast`. Com interner, os nomes
+    são internados nele e os nós recebem os ids correspondentes.
+    Levanta ValueError se os dados não estão no formato esperado.
+    """
+    data = bytes(data)
+    if data[:len(AST_FORMAT)] != AST_FORMAT:
+        raise ValueError("Formato de AST desconhecido")
+    # A árvore não tem ciclos: o coletor de ciclos só atrasaria a criação
+    # das centenas de milhares de nós
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        return _decode(data, len(AST_FORMAT), interner)
+    except (IndexError, KeyError, struct.error, UnicodeDecodeError) as e:
+        raise ValueError(f"AST serializada corrompida: {e}") from None
+    finally:
+        if collecting:
+            gc.enable()
+
+
+def _varint(data: bytes, pos: int) -> Tuple[int, int]:
+    """Varint em pos: (valor, posição seguinte)"""
+    value = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def _decode(data: bytes, pos: int, interner: Optional[Interner]) -> Program:
+    # Os varints de um byte (quase todos) são lidos direto no laço, sem
+    # chamar _varint
+    count, pos = _varint(data, pos)
+    strings: List[str] = []
+    for _ in range(count):
+        size, pos = _varint(data, pos)
+        strings.append(data[pos:pos + size].decode('utf-8'))
+        pos += size
+    # Nomes internados de novo no interner em uso (e com a string canônica dele)
+    ids: List[int] = [-1] * len(strings)
+    if interner is not None:
+        ids = [interner.intern(value) for value in strings]
+        strings = [interner.name(symbol_id) for symbol_id in ids]
+
+    stack: List[ASTNode] = []
+    push = stack.append
+    pop = stack.pop
+    line = 0
+    # Nomes globais usados no laço viram locais (consulta mais barata)
+    deltas = _LINE_DELTAS
+    varint = _varint
+    VARIABLE, INTEGER, BINARY_OP, ASSIGNMENT = KIND_VARIABLE, KIND_INTEGER, KIND_BINARY_OP, KIND_ASSIGNMENT
+    NAME_ID = FLAG_NAME_ID
+    Variable_, IntegerLiteral_, BinaryOp_, Assignment_ = Variable, IntegerLiteral, BinaryOp, Assignment
+    end = len(data)
+    while pos < end:
+        kind = data[pos]
+        flags = data[pos + 1]
+        delta = data[pos + 2]
+        pos += 3
+        if delta < 0x80:
+            line += deltas[delta]
+        else:
+            delta, pos = varint(data, pos - 1)
+            line += -(delta >> 1) - 1 if delta & 1 else delta >> 1
+        column = data[pos]
+        pos += 1
+        if column >= 0x80:
+            column, pos = varint(data, pos - 1)
+        # Primeiro campo do registro: índice de string, tamanho ou valor
+        field = data[pos]
+        pos += 1
+        if field >= 0x80:
+            field, pos = varint(data, pos - 1)
+
+        if kind == VARIABLE:
+            push(Variable_(strings[field], line, column, ids[field] if flags & NAME_ID else -1))
+        elif kind == INTEGER:
+            push(IntegerLiteral_(-(field >> 1) - 1 if field & 1 else field >> 1, line, column))
+        elif kind == BINARY_OP:
+            right = pop()
+            push(BinaryOp_(strings[field], pop(), right, line, column))
+        elif kind == ASSIGNMENT:
+            push(Assignment_(strings[field], pop(), line, column,
+                             ids[field] if flags & NAME_ID else -1))
+        elif kind == KIND_BLOCK or kind == KIND_WRITE:
+            items = stack[len(stack) - field:]
+            del stack[len(stack) - field:]
+            push((Block if kind == KIND_BLOCK else WriteStatement)(items, line, column))
+        elif kind == KIND_STRING:
+            push(StringLiteral(strings[field], line, column))
+        elif kind == KIND_IF:
+            else_block = pop() if flags & FLAG_SECOND else None
+            then_block = pop() if flags & FLAG_FIRST else None
+            push(IfStatement(pop(), then_block, else_block, line, column))
+        elif kind == KIND_WHILE:
+            body = pop() if flags & FLAG_FIRST else None
+            push(WhileStatement(pop(), body, line, column))
+        elif kind == KIND_UNARY_OP:
+            push(UnaryOp(strings[field], pop(), line, column))
+        elif kind == KIND_REAL:
+            push(RealLiteral(_DOUBLE.unpack_from(data, pos)[0], line, column))
+            pos += _DOUBLE.size
+        elif kind == KIND_BOOLEAN:
+            push(BooleanLiteral(bool(field), line, column))
+        elif kind == KIND_FUNCTION_CALL:
+            count, pos = _varint(data, pos)
+            items = stack[len(stack) - count:]
+            del stack[len(stack) - count:]
+            push(FunctionCall(strings[field], items, line, column))
+        elif kind == KIND_READ_NUMBER or kind == KIND_READ_TEXT:
+            node_class = ReadNumberStatement if kind == KIND_READ_NUMBER else ReadTextStatement
+            push(node_class(strings[field], line, column, ids[field] if flags & FLAG_NAME_ID else -1))
+        elif kind == KIND_VAR_DECLARATION:
+            var_type, pos = _varint(data, pos)
+            initial_value = pop() if flags & FLAG_FIRST else None
+            push(VarDeclaration(_TYPES[var_type], strings[field], initial_value, line, column,
+                                ids[field] if flags & FLAG_NAME_ID else -1))
+        elif kind == KIND_PROGRAM:
+            count, pos = _varint(data, pos)
+            statements = stack[len(stack) - count:]
+            del stack[len(stack) - count:]
+            declarations = stack[len(stack) - field:]
+            del stack[len(stack) - field:]
+            push(Program(declarations, statements, line, column))
+        else:
+            raise ValueError(f"Tipo de nó desconhecido: {kind}")
+
+    if len(stack) != 1 or not isinstance(stack[0], Program):
+        raise ValueError("AST serializada incompleta")
+    return stack[0]
+
+
+# ========== Cache em disco ==========
+
+class ASTCache:
+    """
+    Cache de ASTs em disco, endereçado pelo conteúdo do código-fonte.
+    Uma entrada corrompida ou de outra versão é tratada como ausente.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = cache_dir or default_cache_dir()
+
+    def key(self, source_code: Union[str, BytesLike]) -> str:
+        """Hash do código-fonte (texto ou bytes em UTF-8) e da versão do compilador"""
+        digest = hashlib.sha256(compiler_version().encode('ascii'))
+        digest.update(source_code.encode('utf-8') if isinstance(source_code, str) else source_code)
+        return digest.hexdigest()[:32]
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f'ast-{key}.bin')
+
+    def load(self, key: str, interner: Optional[Interner] = None) -> Optional[Program]:
+        """AST guardada sob key (uma leitura de arquivo), ou None"""
+        try:
+            with open(self.path(key), 'rb') as f:
+                data = f.read()
+            return deserialize_ast(data, interner)
+        except (OSError, ValueError):
+            return None
+
+    def store(self, key: str, program: Program):
+        """Guarda a AST sob key; falhas de escrita são ignoradas"""
+        path = self.path(key)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f'{path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(serialize_ast(program))
+            os.replace(tmp_path, path)
+        except OSError:
+            pass  # cache indisponível (ex.: diretório somente leitura)
@@ -0,0 +1,381 @@
+"""
+Parsing incremental para a linguagem Apollo
+
+Mantém o Program de um documento em edição junto com a faixa de tokens de
+cada comando e de cada bloco. A cada edição o `IncrementalLexer` atualiza os
+tokens e só o menor comando ou bloco que contém os tokens alterados passa de
+novo pelo parser; a subárvore nova é encaixada no lugar da antiga.
+"""
+
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+import copy
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from lexer.apollo_lexer import ApolloLexer, IncrementalLexer, TokenEdit, Token, TokenType
+from parser.ast import ASTNode, Program, Block
+from parser.parser import ApolloParser, ParseError
+
+TRIVIA = (TokenType.WHITESPACE, TokenType.COMMENT)
+
+# Tokens depois de uma região que o parser pode olhar para decidir onde ela
+# termina (o token atual e o seguinte)
+LOOKAHEAD = 2
+
+
+class _Span:
+    """Faixa de tokens [start, end) de um comando ou bloco, relativa ao início do span pai"""
+
+    __slots__ = ('node', 'start', 'end', 'children')
+
+    def __init__(self, node: ASTNode, start: int, end: int, children: List['_Span']):
+        self.node = node
+        self.start = start
+        self.end = end
+        self.children = children
+
+
+class _SpanParser(ApolloParser):
+    """ApolloParser que anota a faixa de tokens de cada comando e de cada bloco"""
+
+    def __init__(self, lexer: ApolloLexer, tokens: List[Token], indices: List[int]):
+        super().__init__(lexer)
+        # Índice no IncrementalLexer de cada token recebido (sem espaços e comentários)
+        self.indices = indices
+        # Spans já fechados de cada comando em construção; o primeiro é o nível de fora
+        self.frames: List[List[_Span]] = [[]]
+        self._load_tokens(tokens)
+
+    def parse_statement(self) -> Optional[ASTNode]:
+        return self._spanned(ApolloParser.parse_statement)
+
+    def parse_block(self) -> Block:
+        return self._spanned(ApolloParser.parse_block)
+
+    def _spanned(self, parse) -> Optional[ASTNode]:
+        start = self.position
+        self.frames.append([])
+        try:
+            node = parse(self)
+        finally:
+            children = self.frames.pop()
+        if node is None:
+            return None
+        if len(children) == 1 and children[0].node is node:
+            # Bloco usado como comando: o span do bloco já é o do comando
+            self.frames[-1].append(children[0])
+            return node
+        first = self.indices[start]
+        for child in children:
+            child.start -= first
+            child.end -= first
+        self.frames[-1].append(_Span(node, first, self.indices[self.position - 1] + 1, children))
+        return node
+
+
+_FIELDS: Dict[type, Tuple[str, ...]] = {}
+
+
+def _fields(node_type: type) -> Tuple[str, ...]:
+    """Atributos de um tipo de nó, sem linha e coluna"""
+    fields = _FIELDS.get(node_type)
+    if fields is None:
+        fields = _FIELDS[node_type] = tuple(
+            name for cls in node_type.__mro__ for name in getattr(cls, '__slots__', ())
+            if name not in ('line', 'column'))
+    return fields
+
+
+# Tipo de valor -> se é um nó (isinstance com ABC é caro em laços grandes)
+_NODE_TYPES: Dict[type, bool] = {}
+
+
+def _is_node(value) -> bool:
+    is_node = _NODE_TYPES.get(type(value))
+    if is_node is None:
+        is_node = _NODE_TYPES[type(value)] = isinstance(value, ASTNode)
+    return is_node
+
+
+def _children(node: ASTNode) -> Iterator[Union[ASTNode, list]]:
+    """Filhos diretos de node: nós e listas de nós"""
+    for name in _fields(type(node)):
+        value = getattr(node, name)
+        if type(value) is list or _is_node(value):
+            yield value
+
+
+def _replace(node: ASTNode, old: ASTNode, new: ASTNode) -> ASTNode:
+    """Cópia rasa de node com o filho old trocado por new"""
+    result = copy.copy(node)
+    for name in _fields(type(node)):
+        value = getattr(node, name)
+        if value is old:
+            setattr(result, name, new)
+        elif isinstance(value, list) and any(item is old for item in value):
+            setattr(result, name, [new if item is old else item for item in value])
+    return result
+
+
+def _bisect(items: list, value, key: Callable, right: bool = False) -> int:
+    """
+    Como bisect_left (ou bisect_right, com right) comparando key(item) com
+    value; o parâmetro key do módulo bisect só existe a partir do Python 3.10
+    """
+    low, high = 0, len(items)
+    while low < high:
+        middle = (low + high) // 2
+        item = key(items[middle])
+        if item < value or (right and item == value):
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+class _Shift:
+    """Correção de linha e coluna dos nós reaproveitados que ficam depois de uma edição"""
+
+    def __init__(self, line: int, column: int, lines: int, columns: int):
+        # Posição (antiga) do fim do trecho removido
+        self.line = line
+        self.column = column
+        # Linhas a somar depois da edição e colunas a somar na linha dela
+        self.lines = lines
+        self.columns = columns
+
+    def after(self, parent: ASTNode, skip: ASTNode):
+        """Desloca as subárvores de parent, exceto skip, que começam depois da edição"""
+        if not (self.lines or self.columns):
+            return
+        position = (self.line, self.column)
+        for value in _children(parent):
+            for node in (value if type(value) is list else (value,)):
+                if node is skip or (node.line, node.column) < position:
+                    continue
+                if not self.lines and node.line > self.line:
+                    break  # sem mudança de linha, só a linha da edição muda de coluna
+                self.subtree(node)
+
+    def within(self, parent: ASTNode):
+        """
+        Desloca, sem trocar nenhum nó, tudo o que em parent começa depois da
+        edição, descendo nos filhos que começam antes dela e podem contê-la
+        """
+        if not (self.lines or self.columns):
+            return
+        position = (self.line, self.column)
+        stack = [parent]
+        while stack:
+            for value in _children(stack.pop()):
+                if type(value) is not list:
+                    if (value.line, value.column) < position:
+                        stack.append(value)
+                    else:
+                        self.subtree(value)
+                    continue
+                index = _bisect(value, position, lambda node: (node.line, node.column))
+                if index:
+                    stack.append(value[index - 1])
+                for node in value[index:]:
+                    if not self.lines and node.line > self.line:
+                        break
+                    self.subtree(node)
+
+    def subtree(self, root: ASTNode):
+        line, lines, columns = self.line, self.lines, self.columns
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            if node.line == line:
+                node.column += columns
+            node.line += lines
+            for name in _fields(type(node)):
+                value = getattr(node, name)
+                if type(value) is list:
+                    stack.extend(value)
+                elif _is_node(value):
+                    stack.append(value)
+
+
+class IncrementalParser:
+    """
+    Mantém o Program de um documento em edição e o atualiza a cada mudança
+    no texto re-analisando só o menor comando ou `Block` que contém a edição.
+
+    Os nós fora da região re-analisada são reaproveitados (os mesmos
+    objetos, com linha e coluna corrigidas quando a edição os desloca), de
+    modo que caches indexados pela identidade dos nós continuam válidos; os
+    nós no caminho até a raiz, inclusive o Program, são cópias novas, já que
+    o conteúdo deles mudou. Quando a região não forma mais um comando
+    completo, a busca sobe para o comando ou bloco seguinte na hierarquia e,
+    no nível do programa (declarações, cabeçalho, entre comandos), o
+    programa inteiro é analisado de novo. Uma edição que só muda espaços e
+    comentários não passa pelo parser: o Program e todos os nós continuam
+    os mesmos, só com as posições corrigidas.
+    """
+
+    def __init__(self, lexer: ApolloLexer, source_code: str):
+        self.lexer = lexer
+        self.tokens: IncrementalLexer = lexer.incremental(source_code)
+        self.program: Optional[Program] = None
+        # Subárvore produzida pela última atualização (o Program, se foi completa)
+        self.reparsed: Optional[ASTNode] = None
+        self._spans: List[_Span] = []
+        self._parse_all()
+
+    @property
+    def source(self) -> str:
+        return self.tokens.source
+
+    def _parse_all(self) -> Program:
+        # Se o parsing falhar, a próxima edição recomeça do zero
+        self.program = None
+        tokens = self.tokens.tokens()
+        indices = [i for i, t in enumerate(tokens) if t.type not in TRIVIA]
+        parser = _SpanParser(self.lexer, [tokens[i] for i in indices], indices)
+        program = parser._parse_tokens()
+        self.program = self.reparsed = program
+        self._spans = parser.frames[0]
+        return program
+
+    def edit(self, offset: int, removed: int, inserted: str) -> Program:
+        """
+        Aplica a edição (substitui removed caracteres a partir de offset por
+        inserted) e devolve o Program atualizado. Levanta ParseError se o
+        código editado não for um programa válido.
+        """
+        tokens = self.tokens
+        line, column = tokens.position(offset + removed)
+        lines = inserted.count('\n') - tokens.text(offset, offset + removed).count('\n')
+        change = tokens.edit(offset, removed, inserted)
+        if self.program is None:
+            return self._parse_all()
+        _, new_column = tokens.position(offset + len(inserted))
+        shift = _Shift(line, column, lines, new_column - column)
+        if change.start == change.old_end == change.new_end:
+            self.reparsed = None
+            return self.program
+        if (all(token_type in TRIVIA for token_type in change.replaced)
+                and all(tokens[index].type in TRIVIA for index in range(change.start, change.new_end))):
+            # Só espaços e comentários mudaram: a árvore é a mesma, só as posições andam
+            self._move_spans(self._spans, 0, change)
+            shift.within(self.program)
+            self.reparsed = None
+            return self.program
+
+        chain = self._enclosing(change)
+        delta = change.new_end - change.old_end
+        for level in range(len(chain) - 1, -1, -1):
+            span, _, _, base = chain[level]
+            result = self._reparse(span, base + span.start, base + span.end + delta)
+            if result is not None:
+                break
+        else:
+            return self._parse_all()
+
+        # Os spans depois da região andam delta tokens; os que a contêm crescem delta
+        for outer in range(level + 1):
+            enclosing, siblings, index, _ = chain[outer]
+            for sibling in siblings[index + 1:]:
+                sibling.start += delta
+                sibling.end += delta
+            if outer < level:
+                enclosing.end += delta
+
+        old = span.node
+        span.node, span.children = result.node, result.children
+        span.start, span.end = result.start - base, result.end - base
+
+        # Encaixa a subárvore nova copiando o caminho até a raiz
+        new = span.node
+        for outer in range(level - 1, -1, -1):
+            parent = chain[outer][0]
+            replaced = _replace(parent.node, old, new)
+            shift.after(replaced, new)
+            old, new, parent.node = parent.node, replaced, replaced
+        program = _replace(self.program, old, new)
+        shift.after(program, new)
+
+        self.program = program
+        self.reparsed = span.node
+        return program
+
+    def _move_spans(self, spans: List[_Span], base: int, change: TokenEdit):
+        """
+        Ajusta os spans a uma edição que não muda nenhum token significativo:
+        os que ficam depois dela andam e os que a contêm crescem (spans
+        começam e terminam em tokens significativos, então nenhum a corta)
+        """
+        delta = change.new_end - change.old_end
+        while spans:
+            index = _bisect(spans, change.old_end - base - 1, lambda span: span.start, right=True)
+            for span in spans[index:]:
+                span.start += delta
+                span.end += delta
+            if not index:
+                return
+            span = spans[index - 1]
+            start = base + span.start
+            if not (start < change.start and change.old_end < base + span.end):
+                return
+            span.end += delta
+            spans, base = span.children, start
+
+    def _enclosing(self, change: TokenEdit) -> List[Tuple[_Span, List[_Span], int, int]]:
+        """
+        Spans que contêm os tokens alterados, do mais externo ao mais interno,
+        como (span, lista de irmãos, índice na lista, início do span pai).
+        Tokens inseridos logo antes ou logo depois de um comando ficam fora dele.
+        """
+        chain = []
+        spans, base = self._spans, 0
+        while spans:
+            index = _bisect(spans, change.start - base, lambda span: span.start, right=True) - 1
+            if index < 0:
+                break
+            span = spans[index]
+            start, end = base + span.start, base + span.end
+            if not (change.start < end and start < change.old_end <= end):
+                break
+            chain.append((span, spans, index, base))
+            spans, base = span.children, start
+        return chain
+
+    def _reparse(self, span: _Span, start: int, end: int) -> Optional[_Span]:
+        """
+        Analisa de novo os tokens [start, end) como o mesmo tipo de nó de
+        span (comando ou bloco). Devolve o span novo, com posições absolutas,
+        ou None se a região não formar exatamente um comando.
+        """
+        tokens: List[Token] = []
+        indices: List[int] = []
+        for index in range(start, end):
+            token = self.tokens[index]
+            if token.type not in TRIVIA:
+                tokens.append(token)
+                indices.append(index)
+        region = len(tokens)
+        if not region:
+            return None
+        # Os tokens seguintes entram só como contexto: o comando tem de terminar antes deles
+        index = end
+        while len(tokens) < region + LOOKAHEAD and index < len(self.tokens):
+            token = self.tokens[index]
+            if token.type not in TRIVIA:
+                tokens.append(token)
+                indices.append(index)
+            index += 1
+
+        parser = _SpanParser(self.lexer, tokens, indices)
+        parse = parser.parse_block if isinstance(span.node, Block) else parser.parse_statement
+        try:
+            parser._start()
+            node = parse()
+        except ParseError:
+            return None
+        if node is None or parser.position != region:
+            return None
+        return parser.frames[0][0]
@@ -0,0 +1,490 @@
+"""
+Parser LL(1) dirigido por tabela para a linguagem Apollo
+
+Alternativa não recursiva ao `ApolloParser`: a gramática fica em `GRAMMAR`
+(uma lista de produções por não-terminal), a tabela de previsão é calculada
+a partir dos conjuntos FIRST/FOLLOW e um laço com pilha explícita faz a
+análise. A profundidade de aninhamento (blocos, se/enquanto, parênteses) só
+é limitada pela memória, sem RecursionError.
+
+A gramática é a implementada pelo `ApolloParser` (docs/gramatica_apollo.md
+descreve uma variante inspirada em MicroJava que o parser não segue) e a AST
+produzida é a mesma, incluindo as particularidades do parser recursivo:
+dentro de um bloco, tokens que não iniciam comando são ignorados e um `;`
+ignora também o token seguinte. Não há recuperação de erros: o primeiro
+erro de sintaxe levanta ParseError (e `recover`/`max_errors` são recusados).
+"""
+
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+import sys
+import os
+
+# Adiciona diretório raiz ao path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from lexer.apollo_lexer import ApolloLexer, TokenType, Token
+from parser.parser import ApolloParser, ParseError, BINARY_OPERATORS
+from parser.ast_cache import ASTCache
+from parser.ast import (
+    ASTNode, Program, VarDeclaration, Block, Assignment, IfStatement, WhileStatement,
+    WriteStatement, ReadNumberStatement, ReadTextStatement,
+    BinaryOp, UnaryOp, IntegerLiteral, RealLiteral, StringLiteral,
+    BooleanLiteral, Variable, FunctionCall, Type
+)
+
+# ========== Gramática ==========
+#
+# Terminais são valores de palavras-chave, operadores e símbolos ('se', '=',
+# '(') ou classes de token em maiúsculas:
+#   IDENTIFIER, INTEGER, REAL, STRING, BOOLEAN, EOF, INVALID
+#   ASSIGN_TARGET   identificador seguido de '=' (início de atribuição)
+#   leia_numero(    leia_numero seguido de '(' (chamada em expressão);
+#   leia_texto(     idem para leia_texto
+#   ANY             qualquer token exceto EOF
+# As duas classes com '(' e ASSIGN_TARGET olham um token à frente na
+# classificação, o que deixa a gramática LL(1).
+# Símbolos iniciados por '#' são ações semânticas (ver `_ACTIONS`).
+# Em conflitos vale a primeira produção listada (ex.: senao pendente fica
+# com o se mais interno, identificadores de uma declaração são gulosos).
+
+ANY = 'ANY'
+EOF = 'EOF'
+
+TYPE_KEYWORDS = {
+    'inteiro': Type.INTEGER,
+    'real': Type.REAL,
+    'texto': Type.TEXT,
+    'logico': Type.BOOLEAN,
+}
+
+GRAMMAR: Dict[str, List[Tuple[str, ...]]] = {
+    'Program': [('algoritmo', 'Name', '#begin_program', 'Items', 'fim_algoritmo', '#end_program')],
+    'Name': [('IDENTIFIER',), ('ASSIGN_TARGET',), ('#none',)],
+    'Items': [
+        ('TypeKeyword', 'DeclVars', '#pop', 'Items'),
+        ('Statement', '#item', 'Items'),
+        (';', '#pop', 'Items'),
+        (),
+    ],
+    'TypeKeyword': [(keyword,) for keyword in TYPE_KEYWORDS],
+    'DeclVars': [
+        ('IDENTIFIER', '#declare', 'DeclMore'),
+        ('ASSIGN_TARGET', '#declare', 'DeclMore'),
+        (),
+    ],
+    'DeclMore': [(',', '#pop', 'DeclVars'), ()],
+    'Statement': [
+        ('ASSIGN_TARGET', '=', 'Expression', '#assign'),
+        ('escreva', '(', '#list', 'Args', ')', '#write'),
+        ('leia_numero', '(', 'IDENTIFIER', ')', '#read_number'),
+        ('leia_texto', '(', 'IDENTIFIER', ')', '#read_text'),
+        ('se', 'Expression', 'faca', 'Body', 'ElsePart', '#if'),
+        ('enquanto', 'Expression', 'faca', 'Body', '#while'),
+        ('{', '#list', 'BlockItems', '}', '#block'),
+    ],
+    'BlockItems': [
+        ('Statement', '#append', 'BlockItems'),
+        (';', '#skip_next', 'BlockItems'),
+        (),
+        (ANY, '#pop', 'BlockItems'),
+    ],
+    'Body': [('Statement',), (';', '#pop', '#none'), ('#none',)],
+    'ElsePart': [('senao', 'Body', '#else'), ('#no_else',)],
+    'Args': [('Expression', '#add', 'ArgsMore'), ()],
+    'ArgsMore': [(',', '#pop', 'Expression', '#add', 'ArgsMore'), ()],
+    'Unary': [('-', 'Primary', '#unary'), ('Primary',)],
+    'Primary': [
+        ('INTEGER', '#integer'),
+        ('REAL', '#real'),
+        ('STRING', '#string'),
+        ('BOOLEAN', '#boolean'),
+        ('leia_numero(', '(', ')', '#call'),
+        ('leia_texto(', '(', ')', '#call'),
+        ('IDENTIFIER', '#variable'),
+        ('ASSIGN_TARGET', '#variable'),
+        ('(', 'Expression', ')', '#parenthesis'),
+    ],
+}
+
+
+def _expression_rules(operators: Dict[str, Tuple[int, Optional[str]]]) -> Dict[str, List[Tuple[str, ...]]]:
+    """
+    Produções de expressão em camadas, uma por poder de ligação de
+    `BINARY_OPERATORS`: Expr<p> ::= Expr<próximo> Tail<p>, com a cauda
+    repetida (esquerda), única (não associativo) ou recursiva à direita.
+    """
+    powers = sorted({power for power, _ in operators.values()})
+    rules = {'Expression': [(f'Expr{powers[0]}',)] if powers else [('Unary',)]}
+    for index, power in enumerate(powers):
+        level, tail = f'Expr{power}', f'Tail{power}'
+        operand = f'Expr{powers[index + 1]}' if index + 1 < len(powers) else 'Unary'
+        rules[level] = [(operand, tail)]
+        rules[tail] = []
+        for op, (op_power, associativity) in operators.items():
+            if op_power != power:
+                continue
+            if associativity == 'left':
+                rules[tail].append((op, operand, '#binary', tail))
+            elif associativity == 'right':
+                rules[tail].append((op, level, '#binary'))
+            else:
+                rules[tail].append((op, operand, '#binary'))
+        rules[tail].append(())
+    return rules
+
+
+def _build_table(grammar: Dict[str, List[Tuple[str, ...]]]):
+    """
+    Calcula FIRST/FOLLOW e a tabela de previsão. Cada não-terminal recebe
+    um dicionário terminal -> produção e uma produção padrão para os
+    demais terminais: a que começa com ANY ou, sem ela, a produção vazia
+    (a cauda termina e quem vem depois acusa o erro, se houver).
+    """
+    def is_terminal(symbol):
+        return symbol not in grammar and not symbol.startswith('#')
+
+    nullable: Set[str] = set()
+    first: Dict[str, Set[str]] = {n: set() for n in grammar}
+
+    def first_of(symbols) -> Tuple[Set[str], bool]:
+        result = set()
+        for symbol in symbols:
+            if symbol.startswith('#'):
+                continue
+            if is_terminal(symbol):
+                result.add(symbol)
+                return result, False
+            result |= first[symbol]
+            if symbol not in nullable:
+                return result, False
+        return result, True
+
+    changed = True
+    while changed:
+        changed = False
+        for name, productions in grammar.items():
+            for production in productions:
+                symbols, empty = first_of(production)
+                if not symbols <= first[name]:
+                    first[name] |= symbols
+                    changed = True
+                if empty and name not in nullable:
+                    nullable.add(name)
+                    changed = True
+
+    follow: Dict[str, Set[str]] = {n: set() for n in grammar}
+    follow['Program'].add(EOF)
+    changed = True
+    while changed:
+        changed = False
+        for name, productions in grammar.items():
+            for production in productions:
+                for index, symbol in enumerate(production):
+                    if symbol not in grammar:
+                        continue
+                    symbols, empty = first_of(production[index + 1:])
+                    if empty:
+                        symbols = symbols | follow[name]
+                    if not symbols <= follow[symbol]:
+                        follow[symbol] |= symbols
+                        changed = True
+
+    table: Dict[str, Dict[str, Tuple[str, ...]]] = {}
+    defaults: Dict[str, Optional[Tuple[str, ...]]] = {}
+    for name, productions in grammar.items():
+        entries: Dict[str, Tuple[str, ...]] = {}
+        default = None
+        empty_default = None
+        for production in productions:
+            # Guardada invertida: é empilhada de uma vez
+            stacked = tuple(reversed(production))
+            symbols, empty = first_of(production)
+            if ANY in symbols:
+                if default is None:
+                    default = stacked
+                continue
+            if empty:
+                symbols = symbols | follow[name]
+                if empty_default is None:
+                    empty_default = stacked
+            for terminal in symbols:
+                entries.setdefault(terminal, stacked)
+        table[name] = entries
+        defaults[name] = default if default is not None else empty_default
+    return table, defaults
+
+
+GRAMMAR.update(_expression_rules(BINARY_OPERATORS))
+_TABLE, _DEFAULTS = _build_table(GRAMMAR)
+
+
+class LL1Parser(ApolloParser):
+    """
+    Parser LL(1) com pilha explícita. Mesma interface do `ApolloParser`
+    (parse, parse_tokens, iter_parse) e mesma AST; só a análise do programa
+    muda. Não há recuperação de erros: `recover` e `max_errors` levantam
+    ValueError e o primeiro erro de sintaxe levanta ParseError.
+    """
+
+    def __init__(self, lexer: ApolloLexer, window: Optional[int] = None, recover: bool = False,
+                 max_errors: Optional[int] = None, cache: Optional[ASTCache] = None):
+        if recover or max_errors is not None:
+            raise ValueError("LL1Parser não tem recuperação de erros (recover, max_errors)")
+        super().__init__(lexer, window, cache=cache)
+
+    def _terminal(self) -> str:
+        """Terminal da gramática correspondente ao token atual"""
+        token = self.current_token
+        token_type = token.type
+        if token_type == TokenType.IDENTIFIER:
+            return 'ASSIGN_TARGET' if self.peek_is(1, TokenType.OPERATOR, '=') else 'IDENTIFIER'
+        if token_type == TokenType.KEYWORD:
+            if token.value in ('leia_numero', 'leia_texto') and self.peek_is(1, TokenType.SYMBOL, '('):
+                return token.value + '('
+            return token.value
+        if token_type == TokenType.OPERATOR or token_type == TokenType.SYMBOL:
+            return token.value
+        return token_type.name
+
+    def _error(self, expected: Optional[str] = None) -> ParseError:
+        token = self.current_token
+        if token.type == TokenType.EOF:
+            found = "fim do arquivo"
+        else:
+            found = f"'{token.value}'"
+        if expected is None:
+            return ParseError(f"Token inesperado: {found}", token)
+        if expected == ANY:
+            # ANY só aparece entre os comandos de um bloco
+            return ParseError("Fim de arquivo dentro de bloco (esperado '}')", token)
+        if expected not in _CLASS_TERMINALS:
+            expected = f"'{expected}'"
+        return ParseError(f"Esperado {expected}, encontrado {found}", token)
+
+    def parse_program(self) -> Program:
+        """Analisa o programa com a tabela de previsão e uma pilha explícita"""
+        line = self.current_token.line if self.current_token else 0
+        column = self.current_token.column if self.current_token else 0
+
+        declarations: List[VarDeclaration] = []
+        statements: List[ASTNode] = []
+        for item in self.iter_program():
+            if isinstance(item, VarDeclaration):
+                declarations.append(item)
+            else:
+                statements.append(item)
+
+        return Program(declarations, statements, line, column)
+
+    def iter_program(self) -> Iterator[ASTNode]:
+        """
+        Laço da pilha explícita: gera cada declaração e cada comando do
+        nível do programa assim que a ação que o monta é executada
+        """
+        table = _TABLE
+        defaults = _DEFAULTS
+        actions = _ACTIONS
+        stack = ['Program']  # símbolos pendentes; o topo é o fim da lista
+        values: list = []    # tokens casados e nós construídos
+        terminal = self._terminal()
+
+        while stack:
+            symbol = stack.pop()
+            action = actions.get(symbol)
+            if action is not None:
+                position = self.position
+                item = action(self, values)
+                if self.position != position:
+                    terminal = self._terminal()
+                if item is not None:
+                    yield item
+                continue
+
+            productions = table.get(symbol)
+            if productions is not None:
+                # A produção vazia é () e não pode cair no padrão por engano
+                production = productions.get(terminal)
+                if production is None:
+                    production = defaults[symbol]
+                if production is None:
+                    raise self._error()
+                stack.extend(production)
+                continue
+
+            if symbol == terminal or (symbol == ANY and terminal != EOF):
+                values.append(self.current_token)
+                self.advance()
+                terminal = self._terminal()
+            else:
+                raise self._error(symbol)
+
+    # ========== Ações semânticas ==========
+    # Cada ação recebe a pilha de valores: tokens casados e nós já prontos.
+    # As que montam uma declaração ou um comando do nível do programa
+    # devolvem o nó, que `iter_program` gera.
+
+    def _none(self, values):
+        values.append(None)
+
+    def _pop(self, values):
+        values.pop()
+
+    def _list(self, values):
+        values.append([])
+
+    def _add(self, values):
+        item = values.pop()
+        values[-1].append(item)
+
+    def _append(self, values):
+        # O comando vai para a lista de comandos do bloco ou do programa
+        # (logo abaixo dele); comandos vazios não entram
+        node = values.pop()
+        if node is not None:
+            values[-1].append(node)
+
+    def _skip_next(self, values):
+        # Dentro de bloco, `;` ignora também o token seguinte
+        values.pop()
+        if self.current_token.type != TokenType.EOF:
+            self.advance()
+
+    def _item(self, values):
+        # Comando do nível do programa
+        return values.pop()
+
+    def _begin_program(self, values):
+        values.pop()  # nome do algoritmo (não fica na AST)
+
+    def _end_program(self, values):
+        values.pop()  # fim_algoritmo
+        values.pop()  # algoritmo
+
+    def _declare(self, values):
+        var = values.pop()
+        type_token = values[-1]
+        return VarDeclaration(TYPE_KEYWORDS[type_token.value], var.value, None,
+                              type_token.line, type_token.column, name_id=var.symbol_id)
+
+    def _assign(self, values):
+        expr = values.pop()
+        values.pop()  # =
+        var = values.pop()
+        values.append(Assignment(var.value, expr, var.line, var.column, name_id=var.symbol_id))
+
+    def _write(self, values):
+        values.pop()  # )
+        expressions = values.pop()
+        values.pop()  # (
+        keyword = values.pop()
+        values.append(WriteStatement(expressions, keyword.line, keyword.column))
+
+    def _read_number(self, values):
+        values.pop()
+        var = values.pop()
+        values.pop()
+        keyword = values.pop()
+        values.append(ReadNumberStatement(var.value, keyword.line, keyword.column, name_id=var.symbol_id))
+
+    def _read_text(self, values):
+        values.pop()
+        var = values.pop()
+        values.pop()
+        keyword = values.pop()
+        values.append(ReadTextStatement(var.value, keyword.line, keyword.column, name_id=var.symbol_id))
+
+    def _else(self, values):
+        body = values.pop()
+        values.pop()  # senao
+        values.append(body)
+
+    def _no_else(self, values):
+        values.append(_NO_ELSE)
+
+    def _if(self, values):
+        else_block = values.pop()
+        then_block = values.pop()
+        values.pop()  # faca
+        condition = values.pop()
+        keyword = values.pop()
+        line, column = keyword.line, keyword.column
+        if then_block is None:
+            then_block = Block([], line, column)
+        if else_block is _NO_ELSE:
+            else_block = None
+        elif else_block is None:
+            else_block = Block([], line, column)
+        values.append(IfStatement(condition, then_block, else_block, line, column))
+
+    def _while(self, values):
+        body = values.pop()
+        values.pop()  # faca
+        condition = values.pop()
+        keyword = values.pop()
+        if body is None:
+            body = Block([], keyword.line, keyword.column)
+        values.append(WhileStatement(condition, body, keyword.line, keyword.column))
+
+    def _block(self, values):
+        values.pop()  # }
+        statements = values.pop()
+        start = values.pop()
+        values.append(Block(statements, start.line, start.column))
+
+    def _binary(self, values):
+        right = values.pop()
+        op = values.pop()
+        left = values.pop()
+        values.append(BinaryOp(op.value, left, right, left.line, left.column))
+
+    def _unary(self, values):
+        operand = values.pop()
+        op = values.pop()
+        values.append(UnaryOp(op.value, operand, op.line, op.column))
+
+    def _integer(self, values):
+        token = values.pop()
+        values.append(IntegerLiteral(int(token.value), token.line, token.column))
+
+    def _real(self, values):
+        token = values.pop()
+        values.append(RealLiteral(float(token.value), token.line, token.column))
+
+    def _string(self, values):
+        token = values.pop()
+        values.append(StringLiteral(token.value[1:-1], token.line, token.column))
+
+    def _boolean(self, values):
+        token = values.pop()
+        values.append(BooleanLiteral(token.value == "verdadeiro", token.line, token.column))
+
+    def _variable(self, values):
+        token = values.pop()
+        values.append(Variable(token.value, token.line, token.column, name_id=token.symbol_id))
+
+    def _call(self, values):
+        values.pop()
+        values.pop()
+        keyword = values.pop()
+        values.append(FunctionCall(keyword.value, [], keyword.line, keyword.column))
+
+    def _parenthesis(self, values):
+        values.pop()  # )
+        expr = values.pop()
+        values.pop()  # (
+        values.append(expr)
+
+
+# Marca de "sem senao" (um senao com comando vazio vira bloco vazio)
+_NO_ELSE = object()
+
+_CLASS_TERMINALS = {'IDENTIFIER', 'ASSIGN_TARGET', 'INTEGER', 'REAL', 'STRING', 'BOOLEAN'}
+
+_ACTIONS: Dict[str, Callable[[LL1Parser, list], None]] = {
+    '#' + name: getattr(LL1Parser, '_' + name) for name in (
+        'none', 'pop', 'list', 'add', 'append', 'item', 'skip_next', 'begin_program', 'end_program',
+        'declare', 'assign', 'write', 'read_number', 'read_text', 'else', 'no_else', 'if',
+        'while', 'block', 'binary', 'unary', 'integer', 'real', 'string', 'boolean',
+        'variable', 'call', 'parenthesis',
+    )
+}
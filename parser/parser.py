@@ -3,14 +3,15 @@ Analisador Sintático (Parser) para a linguagem Apollo
 Implementa um parser recursivo descendente
 """
 
-from typing import List, Optional
+from typing import Iterable, Iterator, List, Optional, Union
+import mmap
 import sys
 import os
 
 # Adiciona o diretório lexer ao path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lexer'))
 
-from lexer.apollo_lexer import ApolloLexer, TokenType, Token
+from lexer.apollo_lexer import ApolloLexer, TokenType, Token, TokenBuffer, TokenWindow, BytesLike
 import sys
 import os
 
@@ -24,6 +25,21 @@ from parser.ast import (
     BinaryOp, UnaryOp, IntegerLiteral, RealLiteral, StringLiteral,
     BooleanLiteral, Variable, FunctionCall, Type
 )
+from parser.ast_cache import ASTCache
+
+
+# Operadores binários: operador -> (poder de ligação, associatividade).
+# Quanto maior o poder, mais forte o operador liga; associatividade é
+# 'left', 'right' ou None (não associativo: a < b < c não forma expressão).
+# Um operador novo entra na gramática de expressões só com uma linha aqui.
+BINARY_OPERATORS = {
+    '||': (1, 'left'),
+    '&&': (2, 'left'),
+    '==': (3, None), '!=': (3, None),
+    '<': (3, None), '>': (3, None), '<=': (3, None), '>=': (3, None),
+    '+': (4, 'left'), '-': (4, 'left'),
+    '*': (5, 'left'), '/': (5, 'left'),
+}
 
 
 class ParseError(Exception):
@@ -35,38 +51,195 @@ class ParseError(Exception):
         super().__init__(f"{message} na linha {token.line}, coluna {token.column}")
 
 
+class _ErrorLimit(Exception):
+    """Interrompe o parsing com recuperação ao atingir max_errors"""
+
+
+# Pontos de sincronização da recuperação em modo pânico: depois de um erro,
+# tokens são descartados até uma dessas palavras-chave (que inicia o próximo
+# comando), até depois de um ';' ou até o '}' do bloco atual
+SYNC_KEYWORDS = frozenset({"se", "enquanto", "escreva", "fim_algoritmo"})
+
+
 class ApolloParser:
     """Parser recursivo descendente para Apollo"""
     
-    def __init__(self, lexer: ApolloLexer):
+    def __init__(self, lexer: ApolloLexer, window: Optional[int] = None, recover: bool = False,
+                 max_errors: Optional[int] = None, cache: Optional[ASTCache] = None):
         self.lexer = lexer
         self.current_token: Optional[Token] = None
-        self.tokens: List[Token] = []
+        self.tokens: Union[TokenBuffer, TokenWindow] = TokenBuffer("")
         self.position = 0
+        # Com recover, erros de sintaxe não interrompem o parsing: vão para
+        # `errors`, o parser se ressincroniza e devolve um Program parcial.
+        # max_errors limita quantos erros são coletados antes de parar.
+        self.recover = recover
+        self.max_errors = max_errors
+        self.errors: List[ParseError] = []
+        self._stopped = False
+        # Com cache, `parse` de um código já visto carrega a AST do disco
+        # em vez de tokenizar e analisar de novo
+        self.cache = cache
+        # Com window, os tokens vêm sob demanda numa `TokenWindow` dessa
+        # capacidade em vez de um buffer com o arquivo inteiro
+        self.window = window
     
-    def parse(self, source_code: str) -> Program:
-        """Inicia o parsing do código-fonte"""
-        # Tokeniza o código
-        self.tokens = [t for t in self.lexer.tokenize(source_code) 
-                      if t.type not in (TokenType.WHITESPACE, TokenType.COMMENT)]
-        self.position = 0
-        self.current_token = self.tokens[0] if self.tokens else None
+    def parse(self, source_code: Union[str, BytesLike, TokenBuffer, Iterable[Token]]) -> Program:
+        """
+        Inicia o parsing do código-fonte (texto ou bytes em UTF-8) ou de
+        tokens já produzidos pelo lexer (ver `parse_tokens`)
+        """
+        key = None
+        if self.cache is not None and isinstance(source_code, (str, bytes, bytearray, memoryview, mmap.mmap)):
+            key = self.cache.key(source_code)
+            program = self.cache.load(key, self.lexer.interner)
+            if program is not None:
+                self.errors = []
+                return program
+        
+        self._load(source_code)
+        program = self._parse_tokens()
+        # AST parcial (com erros recuperados) não vai para o cache
+        if key is not None and not self.errors:
+            self.cache.store(key, program)
+        return program
+    
+    def iter_parse(self, source_code: Union[str, BytesLike, TokenBuffer, Iterable[Token]]) -> Iterator[ASTNode]:
+        """
+        Parsing em fluxo: gera cada declaração (VarDeclaration) e cada
+        comando do nível do programa assim que é reconhecido, na ordem do
+        código, sem montar o Program. Aceita as mesmas entradas de `parse`.
+        """
+        self._load(source_code)
+        self._start()
+        yield from self.iter_program()
+        self._expect_end()
+    
+    def _load(self, source_code: Union[str, BytesLike, TokenBuffer, Iterable[Token]]):
+        if not isinstance(source_code, (str, bytes, bytearray, memoryview, mmap.mmap)):
+            self._load_tokens(source_code)
+        elif self.window:
+            if isinstance(source_code, str):
+                tokens = self.lexer.iter_tokens(source_code, skip_trivia=True)
+            else:
+                tokens = self.lexer.iter_tokens_bytes(source_code, skip_trivia=True)
+            self.tokens = self._window_over(tokens)
+        # Tokeniza o código num buffer compacto, sem espaços e comentários;
+        # os objetos Token só são criados à medida que o parser avança
+        elif not isinstance(source_code, str):
+            self.tokens = self.lexer.tokenize_bytes(source_code, skip_trivia=True)
+        else:
+            self.tokens = self.lexer.tokenize_compact(source_code, skip_trivia=True)
+    
+    def parse_tokens(self, tokens: Union[TokenBuffer, Iterable[Token]]) -> Program:
+        """
+        Faz o parsing de tokens já produzidos pelo lexer, sem tokenizar de
+        novo: um `TokenBuffer` (de tokenize_compact/tokenize_bytes) ou
+        qualquer sequência ou iterador de Token (tokenize, iter_tokens,
+        tokenize_stream). Espaços e comentários são ignorados. Os nomes dos
+        tokens devem vir do interner deste lexer.
+        """
+        self._load_tokens(tokens)
+        return self._parse_tokens()
+    
+    def _load_tokens(self, tokens: Union[TokenBuffer, Iterable[Token]]):
+        trivia = (TokenType.WHITESPACE, TokenType.COMMENT)
+        if isinstance(tokens, TokenBuffer):
+            self.tokens = tokens.without(*trivia)
+        else:
+            self.tokens = self._window_over(token for token in tokens if token.type not in trivia)
+    
+    def _window_over(self, tokens: Iterable[Token]) -> TokenWindow:
+        # lookahead do parser é de 1 token: a janela guarda ao menos 2
+        return TokenWindow(tokens, max(self.window or 16, 2))
+    
+    def _start(self):
+        self.position = -1
+        self.errors = []
+        self._stopped = False
+        self.advance()
+    
+    def _parse_tokens(self) -> Program:
+        self._start()
         
         # Parse do programa
         program = self.parse_program()
-        
-        # Verifica se chegou ao fim
-        if self.current_token and self.current_token.type != TokenType.EOF:
-            raise ParseError(f"Token inesperado: {self.current_token.value}", self.current_token)
-        
+        self._expect_end()
         return program
     
+    def _expect_end(self):
+        """Verifica se chegou ao fim"""
+        if self.current_token and self.current_token.type != TokenType.EOF and not self._stopped:
+            error = ParseError(f"Token inesperado: {self.current_token.value}", self.current_token)
+            if not self.recover:
+                raise error
+            self._record(error)
+    
+    # ========== Recuperação de erros ==========
+    
+    def _record(self, error: ParseError) -> bool:
+        """
+        Guarda um erro do modo com recuperação e diz se o limite de erros
+        foi atingido. Um erro na mesma posição do anterior é consequência
+        dele e não é repetido.
+        """
+        if self.errors:
+            last = self.errors[-1].token
+            if (last.line, last.column) == (error.token.line, error.token.column):
+                return False
+        self.errors.append(error)
+        return self.max_errors is not None and len(self.errors) >= self.max_errors
+    
+    def _recover(self, error: ParseError, start: int, in_block: bool = False):
+        """Registra o erro e se ressincroniza; start é a posição onde o comando começou"""
+        if not self.recover:
+            raise error
+        if self._record(error):
+            raise _ErrorLimit()
+        self.synchronize(start, in_block)
+    
+    def synchronize(self, start: int, in_block: bool = False):
+        """
+        Modo pânico: descarta tokens até um ponto de sincronização
+        (`SYNC_KEYWORDS`, depois de ';' ou, dentro de um bloco, antes do '}'
+        que o fecha). Blocos abertos durante o descarte são pulados inteiros.
+        """
+        # Garante progresso quando o erro foi no primeiro token do comando
+        if self.position == start:
+            self.advance()
+        depth = 0
+        while self.current_token and self.current_token.type != TokenType.EOF:
+            token = self.current_token
+            if token.type == TokenType.KEYWORD and token.value in SYNC_KEYWORDS:
+                return
+            if token.type == TokenType.SYMBOL:
+                if token.value == "{":
+                    depth += 1
+                elif token.value == "}":
+                    if depth == 0 and in_block:
+                        return
+                    depth = max(depth - 1, 0)
+                elif token.value == ";" and depth == 0:
+                    self.advance()
+                    return
+            self.advance()
+    
+    def _expect_recovering(self, token_type: TokenType, value: str):
+        """expect que, com recuperação, só registra o erro (sem consumir nada)"""
+        try:
+            self.expect(token_type, value)
+        except ParseError as error:
+            if not self.recover:
+                raise
+            if self._record(error):
+                raise _ErrorLimit()
+    
     def advance(self):
         """Avança para o próximo token"""
         self.position += 1
-        if self.position < len(self.tokens):
+        try:
             self.current_token = self.tokens[self.position]
-        else:
+        except IndexError:
             self.current_token = Token(TokenType.EOF, "", 0, 0)
     
     def expect(self, token_type: TokenType, value: Optional[str] = None):
@@ -97,6 +270,16 @@ class ApolloParser:
             return False
         return True
     
+    def peek_is(self, offset: int, token_type: TokenType, value: Optional[str] = None) -> bool:
+        """Verifica o token offset posições à frente sem materializá-lo"""
+        index = self.position + offset
+        try:
+            if self.tokens.type_at(index) != token_type:
+                return False
+        except IndexError:
+            return False
+        return value is None or self.tokens.value_at(index) == value
+    
     # ========== Parsing do Programa ==========
     
     def parse_program(self) -> Program:
@@ -104,38 +287,62 @@ class ApolloParser:
         line = self.current_token.line if self.current_token else 0
         column = self.current_token.column if self.current_token else 0
         
-        # algoritmo
-        self.expect(TokenType.KEYWORD, "algoritmo")
-        
-        # Nome do algoritmo (opcional)
-        name = None
-        if self.match(TokenType.IDENTIFIER):
-            name = self.current_token.value
-            self.advance()
-        
         declarations: List[VarDeclaration] = []
         statements: List[ASTNode] = []
+        for item in self.iter_program():
+            if isinstance(item, VarDeclaration):
+                declarations.append(item)
+            else:
+                statements.append(item)
         
-        # Parse declarações e comandos
-        while self.current_token and self.current_token.type != TokenType.EOF:
-            if self.match(TokenType.KEYWORD, "fim_algoritmo"):
-                break
+        return Program(declarations, statements, line, column)
+    
+    def iter_program(self) -> Iterator[ASTNode]:
+        """
+        Mesma gramática de `parse_program`, gerando as declarações e os
+        comandos do programa um a um, na ordem do código
+        """
+        try:
+            # algoritmo
+            self._expect_recovering(TokenType.KEYWORD, "algoritmo")
             
-            # Tenta parsear declaração
-            if self.match(TokenType.KEYWORD) and self.current_token.value in ("inteiro", "real", "texto", "logico"):
-                decls = self.parse_declaration()
-                declarations.extend(decls)
-                continue
+            # Nome do algoritmo (opcional, não entra na AST)
+            if self.match(TokenType.IDENTIFIER):
+                self.advance()
             
-            # Tenta parsear comando
-            stmt = self.parse_statement()
-            if stmt:
-                statements.append(stmt)
-        
-        # fim_algoritmo
-        self.expect(TokenType.KEYWORD, "fim_algoritmo")
-        
-        return Program(declarations, statements, line, column)
+            # Parse declarações e comandos
+            while self.current_token and self.current_token.type != TokenType.EOF:
+                if self.match(TokenType.KEYWORD, "fim_algoritmo"):
+                    break
+                
+                start = self.position
+                try:
+                    items = self.parse_program_item()
+                except ParseError as error:
+                    self._recover(error, start)
+                    continue
+                yield from items
+            
+            # fim_algoritmo
+            self._expect_recovering(TokenType.KEYWORD, "fim_algoritmo")
+        except _ErrorLimit:
+            self._stopped = True
+    
+    def parse_program_item(self) -> List[ASTNode]:
+        """Uma declaração (que pode declarar várias variáveis) ou um comando do nível do programa"""
+        # Tenta parsear declaração
+        if self.match(TokenType.KEYWORD) and self.current_token.value in ("inteiro", "real", "texto", "logico"):
+            return self.parse_declaration()
+        
+        # Tenta parsear comando
+        start = self.position
+        stmt = self.parse_statement()
+        if stmt:
+            return [stmt]
+        if self.position == start:
+            # Token que não inicia comando: sem isto o laço não avançaria
+            raise ParseError(f"Token inesperado: {self.current_token.value}", self.current_token)
+        return []
     
     def parse_declaration(self) -> List[VarDeclaration]:
         """Declaração ::= tipo IDENT { , IDENT } ;"""
@@ -159,13 +366,12 @@ class ApolloParser:
         self.advance()
         
         # Lista de variáveis
-        variables: List[str] = []
+        variables: List[Token] = []
         while True:
             if not self.match(TokenType.IDENTIFIER):
                 break
             
-            var_name = self.current_token.value
-            variables.append(var_name)
+            variables.append(self.current_token)
             self.advance()
             
             if not self.match(TokenType.SYMBOL, ","):
@@ -174,8 +380,9 @@ class ApolloParser:
         
         # Cria declarações para todas as variáveis
         declarations = []
-        for var_name in variables:
-            declarations.append(VarDeclaration(var_type, var_name, None, line, column))
+        for var in variables:
+            declarations.append(VarDeclaration(var_type, var.value, None, line, column,
+                                               name_id=var.symbol_id))
         
         return declarations
     
@@ -191,8 +398,7 @@ class ApolloParser:
         
         # Atribuição
         if self.match(TokenType.IDENTIFIER):
-            next_pos = self.position + 1
-            if next_pos < len(self.tokens) and self.tokens[next_pos].type == TokenType.OPERATOR and self.tokens[next_pos].value == "=":
+            if self.peek_is(1, TokenType.OPERATOR, "="):
                 return self.parse_assignment()
         
         # escreva
@@ -202,8 +408,7 @@ class ApolloParser:
         # leia_numero como statement (sem atribuição)
         if self.match(TokenType.KEYWORD, "leia_numero"):
             # Verifica se é statement ou expressão
-            next_pos = self.position + 1
-            if next_pos < len(self.tokens) and self.tokens[next_pos].type == TokenType.SYMBOL and self.tokens[next_pos].value == "(":
+            if self.peek_is(1, TokenType.SYMBOL, "("):
                 # É uma chamada de função, será tratada como expressão
                 pass
             else:
@@ -212,8 +417,7 @@ class ApolloParser:
         # leia_texto como statement (sem atribuição)
         if self.match(TokenType.KEYWORD, "leia_texto"):
             # Verifica se é statement ou expressão
-            next_pos = self.position + 1
-            if next_pos < len(self.tokens) and self.tokens[next_pos].type == TokenType.SYMBOL and self.tokens[next_pos].value == "(":
+            if self.peek_is(1, TokenType.SYMBOL, "("):
                 # É uma chamada de função, será tratada como expressão
                 pass
             else:
@@ -252,9 +456,25 @@ class ApolloParser:
         # Continua parseando statements até encontrar '}' ou EOF
         while self.current_token and not self.match(TokenType.SYMBOL, "}"):
             if self.current_token.type == TokenType.EOF:
-                raise ParseError("Fim de arquivo dentro de bloco (esperado '}')", self.current_token)
+                error = ParseError("Fim de arquivo dentro de bloco (esperado '}')", self.current_token)
+                if not self.recover:
+                    raise error
+            elif self.recover and self.match(TokenType.KEYWORD, "fim_algoritmo"):
+                # Com recuperação, '}' esquecido não engole o fim do programa
+                error = ParseError("Esperado '}' antes de 'fim_algoritmo'", self.current_token)
+            else:
+                error = None
+            if error is not None:
+                if self._record(error):
+                    raise _ErrorLimit()
+                return Block(statements, line, column)
 
-            stmt = self.parse_statement()
+            start = self.position
+            try:
+                stmt = self.parse_statement()
+            except ParseError as error:
+                self._recover(error, start, in_block=True)
+                continue
             if stmt:
                 statements.append(stmt)
             else:
@@ -273,9 +493,9 @@ class ApolloParser:
         if not self.match(TokenType.IDENTIFIER):
             raise ParseError("Esperado identificador", self.current_token)
         
-        var_name = self.current_token.value
-        line = self.current_token.line
-        column = self.current_token.column
+        var = self.current_token
+        line = var.line
+        column = var.column
         self.advance()
         
         # =
@@ -284,7 +504,7 @@ class ApolloParser:
         # Expression
         expr = self.parse_expression()
         
-        return Assignment(var_name, expr, line, column)
+        return Assignment(var.value, expr, line, column, name_id=var.symbol_id)
     
     def parse_if_statement(self) -> IfStatement:
         """IfStatement ::= se Expression faca Statement { senao Statement }"""
@@ -372,13 +592,13 @@ class ApolloParser:
         # IDENT
         if not self.match(TokenType.IDENTIFIER):
             raise ParseError("Esperado identificador", self.current_token)
-        var_name = self.current_token.value
+        var = self.current_token
         self.advance()
         
         # )
         self.expect(TokenType.SYMBOL, ")")
         
-        return ReadNumberStatement(var_name, line, column)
+        return ReadNumberStatement(var.value, line, column, name_id=var.symbol_id)
     
     def parse_read_text_statement(self) -> ReadTextStatement:
         """ReadTextStatement ::= leia_texto ( IDENT ) ;"""
@@ -394,80 +614,53 @@ class ApolloParser:
         # IDENT
         if not self.match(TokenType.IDENTIFIER):
             raise ParseError("Esperado identificador", self.current_token)
-        var_name = self.current_token.value
+        var = self.current_token
         self.advance()
         
         # )
         self.expect(TokenType.SYMBOL, ")")
         
-        return ReadTextStatement(var_name, line, column)
+        return ReadTextStatement(var.value, line, column, name_id=var.symbol_id)
     
     # ========== Parsing de Expressions ==========
     
-    def parse_expression(self) -> ASTNode:
-        """Expression ::= OrExpression"""
-        return self.parse_or_expression()
-    
-    def parse_or_expression(self) -> ASTNode:
-        """OrExpression ::= AndExpression { || AndExpression }"""
-        left = self.parse_and_expression()
-        
-        while self.match(TokenType.OPERATOR, "||"):
-            op = self.current_token.value
-            self.advance()
-            right = self.parse_and_expression()
-            left = BinaryOp(op, left, right, left.line, left.column)
-        
-        return left
-    
-    def parse_and_expression(self) -> ASTNode:
-        """AndExpression ::= RelExpression { && RelExpression }"""
-        left = self.parse_rel_expression()
-        
-        while self.match(TokenType.OPERATOR, "&&"):
-            op = self.current_token.value
-            self.advance()
-            right = self.parse_rel_expression()
-            left = BinaryOp(op, left, right, left.line, left.column)
-        
-        return left
-    
-    def parse_rel_expression(self) -> ASTNode:
-        """RelExpression ::= AddExpression [ (==|!=|<|>|<=|>=) AddExpression ]"""
-        left = self.parse_add_expression()
-        
-        if self.match(TokenType.OPERATOR):
-            op = self.current_token.value
-            if op in ("==", "!=", "<", ">", "<=", ">="):
-                self.advance()
-                right = self.parse_add_expression()
-                return BinaryOp(op, left, right, left.line, left.column)
-        
-        return left
-    
-    def parse_add_expression(self) -> ASTNode:
-        """AddExpression ::= MulExpression { (+|-) MulExpression }"""
-        left = self.parse_mul_expression()
-        
-        while self.match(TokenType.OPERATOR) and self.current_token.value in ("+", "-"):
-            op = self.current_token.value
-            self.advance()
-            right = self.parse_mul_expression()
-            left = BinaryOp(op, left, right, left.line, left.column)
-        
-        return left
-    
-    def parse_mul_expression(self) -> ASTNode:
-        """MulExpression ::= UnaryExpression { (*|/) UnaryExpression }"""
-        left = self.parse_unary_expression()
+    def parse_expression(self, min_power: int = 0) -> ASTNode:
+        """
+        Expression ::= UnaryExpression { op UnaryExpression }
+        
+        Precedence climbing sobre `BINARY_OPERATORS`: o operando direito de
+        um operador é analisado só com os operadores que ligam mais forte
+        que ele, então a árvore sai igual à da gramática em camadas
+        (Or > And > Rel > Add > Mul > Unary) com uma chamada por operando.
+        """
+        # Operando: [ - ] Primary
+        token = self.current_token
+        if token.type == TokenType.OPERATOR and token.value == "-":
+            left = self.parse_unary_expression()
+        else:
+            left = self.parse_primary()
         
-        while self.match(TokenType.OPERATOR) and self.current_token.value in ("*", "/"):
-            op = self.current_token.value
+        operators = BINARY_OPERATORS
+        limit = None  # poder do último operador aplicado neste nível
+        while True:
+            token = self.current_token
+            if token.type != TokenType.OPERATOR:
+                return left
+            entry = operators.get(token.value)
+            if entry is None:
+                return left
+            power, associativity = entry
+            if power < min_power:
+                return left
+            # Depois de um operador não associativo (a < b) outro do mesmo
+            # nível não continua a expressão; um operador que liga mais forte
+            # que o último aplicado só aparece aqui nesse caso
+            if limit is not None and (power > limit or (power == limit and associativity is None)):
+                return left
             self.advance()
-            right = self.parse_unary_expression()
-            left = BinaryOp(op, left, right, left.line, left.column)
-        
-        return left
+            right = self.parse_expression(power if associativity == 'right' else power + 1)
+            left = BinaryOp(token.value, left, right, left.line, left.column)
+            limit = power
     
     def parse_unary_expression(self) -> ASTNode:
         """UnaryExpression ::= [ - ] Primary"""
@@ -528,9 +721,9 @@ class ApolloParser:
         
         # Variable
         if self.match(TokenType.IDENTIFIER):
-            name = self.current_token.value
+            var = self.current_token
             self.advance()
-            return Variable(name, line, column)
+            return Variable(var.value, line, column, name_id=var.symbol_id)
         
         # Parenthesized expression
         if self.match(TokenType.SYMBOL, "("):
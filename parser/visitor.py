@@ -0,0 +1,67 @@
+"""
+Visitor base para as fases que percorrem a AST da linguagem Apollo
+
+Cada classe de nó diz, no seu `accept`, qual método do visitor a trata
+(`BinaryOp` -> `visit_binary_op`). Em vez de uma cadeia de `isinstance` a
+cada nó, o `ASTVisitor` descobre esse método uma única vez por classe de nó
+e guarda a função numa tabela indexada pela classe: depois disso, visitar
+um nó é uma consulta a dicionário e uma chamada.
+"""
+
+from typing import Any, Callable, Dict
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from parser.ast import ASTNode
+
+
+class _HandlerName:
+    """Visitor falso: `accept` chama visit_xxx nele, que devolve o nome 'visit_xxx'"""
+
+    def __getattr__(self, name: str) -> Callable[[Any], str]:
+        return lambda node: name
+
+
+_HANDLER_NAME = _HandlerName()
+
+
+class ASTVisitor:
+    """
+    Base dos visitors da AST com despacho por tabela.
+
+    `visit(node)` chama o método de `accept` da classe do nó (inclusive as
+    visões da `ASTArena`, que herdam o `accept` da classe do nó) ou
+    `generic_visit` se o visitor não tiver esse método. A tabela é de cada
+    subclasse de visitor e é preenchida no primeiro nó de cada classe, de
+    modo que métodos trocados depois disso na classe não são vistos.
+    """
+
+    # Classe do nó -> função que o trata; cada subclasse ganha a sua
+    _handlers: Dict[type, Callable[[Any, ASTNode], Any]] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._handlers = {}
+
+    def visit(self, node: ASTNode) -> Any:
+        """Visita node com o método correspondente à classe dele"""
+        try:
+            handler = self._handlers[type(node)]
+        except KeyError:
+            handler = type(self)._resolve(type(node))
+        return handler(self, node)
+
+    @classmethod
+    def _resolve(cls, node_class: type) -> Callable[[Any, ASTNode], Any]:
+        name = node_class.accept(None, _HANDLER_NAME)
+        handler = getattr(cls, name, None)
+        if handler is None:
+            handler = cls.generic_visit
+        cls._handlers[node_class] = handler
+        return handler
+
+    def generic_visit(self, node: ASTNode) -> Any:
+        """Nós sem método próprio no visitor: nada a fazer"""
+        return None
@@ -0,0 +1,151 @@
+"""
+Micro-benchmark do despacho dos visitors da AST
+
+Compara o custo por nó de escolher o método de um nó pela cadeia de
+`isinstance` que o analisador semântico e o gerador de código usavam com o
+da tabela por classe do `ASTVisitor`. Os métodos não fazem nada, de modo
+que só o despacho é medido; no fim mostra também o tempo das duas fases
+inteiras sobre o mesmo programa.
+
+Uso: python scripts/bench_dispatch.py [repetições do trecho]
+"""
+
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from lexer.apollo_lexer import ApolloLexer
+from parser.parser import ApolloParser
+from parser.ast import (
+    ASTNode, Assignment, IfStatement, WhileStatement, WriteStatement,
+    ReadNumberStatement, ReadTextStatement, BinaryOp, UnaryOp, IntegerLiteral,
+    RealLiteral, StringLiteral, BooleanLiteral, Variable, FunctionCall
+)
+from parser.visitor import ASTVisitor
+from semantic.semantic_analyzer import SemanticAnalyzer
+from codegen.llvm_generator import LLVMGenerator
+
+CHUNK = '''se x < 10 faca {
+    x = x + y * 2 - 1
+    ok = x != y
+    z = -z / 2.5
+    escreva("v", x, z)
+}
+enquanto y > 0 faca { y = y - 1 }
+'''
+
+HANDLERS = ('visit_assignment', 'visit_if_statement', 'visit_while_statement', 'visit_write_statement',
+            'visit_read_number_statement', 'visit_read_text_statement', 'visit_block',
+            'visit_integer_literal', 'visit_real_literal', 'visit_string_literal', 'visit_boolean_literal',
+            'visit_function_call', 'visit_variable', 'visit_binary_op', 'visit_unary_op')
+
+
+def _noop(self, node):
+    return None
+
+
+class TableVisitor(ASTVisitor):
+    """Despacho pela tabela do ASTVisitor"""
+
+
+class ChainVisitor:
+    """Despacho como era antes: cadeia de isinstance, comandos e depois expressões"""
+
+    def visit(self, node: ASTNode):
+        if isinstance(node, Assignment):
+            return self.visit_assignment(node)
+        elif isinstance(node, IfStatement):
+            return self.visit_if_statement(node)
+        elif isinstance(node, WhileStatement):
+            return self.visit_while_statement(node)
+        elif isinstance(node, WriteStatement):
+            return self.visit_write_statement(node)
+        elif isinstance(node, ReadNumberStatement):
+            return self.visit_read_number_statement(node)
+        elif isinstance(node, ReadTextStatement):
+            return self.visit_read_text_statement(node)
+        elif hasattr(node, 'statements'):
+            return self.visit_block(node)
+        return self.visit_expression(node)
+
+    def visit_expression(self, node: ASTNode):
+        if isinstance(node, IntegerLiteral):
+            return self.visit_integer_literal(node)
+        elif isinstance(node, RealLiteral):
+            return self.visit_real_literal(node)
+        elif isinstance(node, StringLiteral):
+            return self.visit_string_literal(node)
+        elif isinstance(node, BooleanLiteral):
+            return self.visit_boolean_literal(node)
+        elif isinstance(node, FunctionCall):
+            return self.visit_function_call(node)
+        elif isinstance(node, Variable):
+            return self.visit_variable(node)
+        elif isinstance(node, BinaryOp):
+            return self.visit_binary_op(node)
+        elif isinstance(node, UnaryOp):
+            return self.visit_unary_op(node)
+        return None
+
+
+for _name in HANDLERS:
+    setattr(TableVisitor, _name, _noop)
+    setattr(ChainVisitor, _name, _noop)
+
+
+def all_nodes(program):
+    """Comandos, blocos e expressões do programa (sem declarações), em pré-ordem"""
+    nodes = []
+    stack = list(reversed(program.statements))
+    while stack:
+        node = stack.pop()
+        nodes.append(node)
+        children = []
+        for name in ('condition', 'then_block', 'else_block', 'body', 'statements', 'value',
+                     'expressions', 'left', 'right', 'operand'):
+            child = getattr(node, name, None)
+            if isinstance(child, list):
+                children.extend(child)
+            elif isinstance(child, ASTNode):
+                children.append(child)
+        stack.extend(reversed(children))
+    return nodes
+
+
+def per_node(visit, nodes, rounds: int = 5) -> float:
+    """Melhor tempo por nó (ns) de visit em todos os nós"""
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for node in nodes:
+            visit(node)
+        best = min(best, time.perf_counter() - start)
+    return best / len(nodes) * 1e9
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    src = 'algoritmo t\ninteiro x, y\nreal z\nlogico ok\n' + CHUNK * repeat + 'fim_algoritmo'
+    program = ApolloParser(ApolloLexer()).parse(src)
+    nodes = all_nodes(program)
+    print(f"{len(nodes)} nós")
+
+    chain = per_node(ChainVisitor().visit, nodes)
+    table = per_node(TableVisitor().visit, nodes)
+    print(f"cadeia de isinstance: {chain:7.1f} ns/nó")
+    print(f"tabela por classe:    {table:7.1f} ns/nó  ({chain / table:.1f}x)")
+
+    start = time.perf_counter()
+    analyzer = SemanticAnalyzer()
+    analyzer.analyze(program)
+    middle = time.perf_counter()
+    symbols = {key: symbol.var_type for key, symbol in analyzer.current_scope.symbols.items()}
+    LLVMGenerator().generate(program, symbols)
+    end = time.perf_counter()
+    print(f"análise semântica: {(middle - start) * 1000:.1f} ms, geração de código: {(end - middle) * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
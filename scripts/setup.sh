@@ -26,4 +26,7 @@ else
   echo "Arquivo requirements.txt não encontrado; nada a instalar.";
 fi
 
+echo "Gerando scanner especializado do lexer..."
+python lexer/scanner_codegen.py
+
 echo "Setup concluído. Ative o ambiente com: source $VENV_DIR/bin/activate"
@@ -3,20 +3,22 @@ Analisador Semântico para a linguagem Apollo
 Verifica tipos, escopos e outras regras semânticas
 """
 
-from typing import Dict, List, Optional, Set
+from typing import Dict, List, Optional, Set, Union
 from parser.ast import (
     ASTNode, Program, VarDeclaration, Assignment, IfStatement, WhileStatement,
     WriteStatement, ReadNumberStatement, ReadTextStatement,
     BinaryOp, UnaryOp, IntegerLiteral, RealLiteral, StringLiteral,
-    BooleanLiteral, Variable, FunctionCall, Type
+    BooleanLiteral, Variable, FunctionCall, Type, symbol_key
 )
+from parser.visitor import ASTVisitor
 
 
 class Symbol:
     """Representa um símbolo na tabela de símbolos"""
     
-    def __init__(self, name: str, var_type: Type, line: int = 0, column: int = 0):
+    def __init__(self, name: str, var_type: Type, line: int = 0, column: int = 0, name_id: int = -1):
         self.name = name
+        self.name_id = name_id
         self.var_type = var_type
         self.line = line
         self.column = column
@@ -41,31 +43,36 @@ class Scope:
     
     def __init__(self, parent: Optional['Scope'] = None):
         self.parent = parent
-        self.symbols: Dict[str, Symbol] = {}
+        # chave: id internado do nome (ou o nome, sem id) -> símbolo
+        self.symbols: Dict[Union[int, str], Symbol] = {}
     
-    def declare(self, name: str, var_type: Type, line: int = 0, column: int = 0) -> Symbol:
+    def declare(self, name: str, var_type: Type, line: int = 0, column: int = 0, name_id: int = -1) -> Symbol:
         """Declara uma variável no escopo atual"""
-        if name in self.symbols:
+        key = symbol_key(name, name_id)
+        if key in self.symbols:
             raise SemanticError(f"Variável '{name}' já foi declarada neste escopo", line, column)
         
-        symbol = Symbol(name, var_type, line, column)
-        self.symbols[name] = symbol
+        symbol = Symbol(name, var_type, line, column, name_id)
+        self.symbols[key] = symbol
         return symbol
     
-    def lookup(self, name: str) -> Optional[Symbol]:
+    def lookup(self, name: str, name_id: int = -1) -> Optional[Symbol]:
         """Busca uma variável no escopo atual e nos escopos pais"""
-        if name in self.symbols:
-            return self.symbols[name]
-        if self.parent:
-            return self.parent.lookup(name)
+        key = symbol_key(name, name_id)
+        scope = self
+        while scope is not None:
+            symbol = scope.symbols.get(key)
+            if symbol is not None:
+                return symbol
+            scope = scope.parent
         return None
     
-    def is_declared(self, name: str) -> bool:
+    def is_declared(self, name: str, name_id: int = -1) -> bool:
         """Verifica se uma variável está declarada"""
-        return self.lookup(name) is not None
+        return self.lookup(name, name_id) is not None
 
 
-class SemanticAnalyzer:
+class SemanticAnalyzer(ASTVisitor):
     """Analisador semântico para Apollo"""
     
     def __init__(self):
@@ -74,8 +81,7 @@ class SemanticAnalyzer:
     
     def analyze(self, program: Program) -> List[SemanticError]:
         """Realiza a análise semântica do programa"""
-        self.errors = []
-        self.current_scope = Scope()
+        self.start()
         
         # Analisa declarações
         for decl in program.declarations:
@@ -87,27 +93,29 @@ class SemanticAnalyzer:
         
         return self.errors
     
+    def start(self):
+        """Prepara uma análise nova, com o escopo global vazio"""
+        self.errors = []
+        self.current_scope = Scope()
+    
+    def analyze_item(self, item: ASTNode) -> List[SemanticError]:
+        """
+        Análise em fluxo: verifica uma declaração ou comando do nível do
+        programa contra o escopo global acumulado até aqui (ver `start`) e
+        devolve só os erros encontrados nele
+        """
+        count = len(self.errors)
+        self.visit(item)
+        return self.errors[count:]
+    
     def visit_statement(self, stmt: ASTNode):
         """Visita um statement"""
-        if isinstance(stmt, Assignment):
-            self.visit_assignment(stmt)
-        elif isinstance(stmt, IfStatement):
-            self.visit_if_statement(stmt)
-        elif isinstance(stmt, WhileStatement):
-            self.visit_while_statement(stmt)
-        elif isinstance(stmt, WriteStatement):
-            self.visit_write_statement(stmt)
-        elif isinstance(stmt, ReadNumberStatement):
-            self.visit_read_number_statement(stmt)
-        elif isinstance(stmt, ReadTextStatement):
-            self.visit_read_text_statement(stmt)
-        elif hasattr(stmt, 'statements'):  # Block
-            self.visit_block(stmt)
+        self.visit(stmt)
     
     def visit_var_declaration(self, decl: VarDeclaration):
         """Visita uma declaração de variável"""
         try:
-            symbol = self.current_scope.declare(decl.name, decl.var_type, decl.line, decl.column)
+            symbol = self.current_scope.declare(decl.name, decl.var_type, decl.line, decl.column, decl.name_id)
             if decl.initial_value:
                 expr_type = self.visit_expression(decl.initial_value)
                 self.check_type_compatibility(decl.var_type, expr_type, decl.line, decl.column)
@@ -118,7 +126,7 @@ class SemanticAnalyzer:
     def visit_assignment(self, assign: Assignment):
         """Visita uma atribuição"""
         # Verifica se a variável existe
-        symbol = self.current_scope.lookup(assign.variable)
+        symbol = self.current_scope.lookup(assign.variable, assign.name_id)
         if not symbol:
             self.errors.append(SemanticError(
                 f"Variável '{assign.variable}' não foi declarada",
@@ -166,7 +174,7 @@ class SemanticAnalyzer:
     
     def visit_read_number_statement(self, stmt: ReadNumberStatement):
         """Visita um comando leia_numero"""
-        symbol = self.current_scope.lookup(stmt.variable)
+        symbol = self.current_scope.lookup(stmt.variable, stmt.name_id)
         if not symbol:
             self.errors.append(SemanticError(
                 f"Variável '{stmt.variable}' não foi declarada",
@@ -180,7 +188,7 @@ class SemanticAnalyzer:
     
     def visit_read_text_statement(self, stmt: ReadTextStatement):
         """Visita um comando leia_texto"""
-        symbol = self.current_scope.lookup(stmt.variable)
+        symbol = self.current_scope.lookup(stmt.variable, stmt.name_id)
         if not symbol:
             self.errors.append(SemanticError(
                 f"Variável '{stmt.variable}' não foi declarada",
@@ -203,36 +211,46 @@ class SemanticAnalyzer:
         self.current_scope = old_scope
     
     def visit_expression(self, expr: ASTNode) -> Type:
-        """Visita uma expressão e retorna seu tipo"""
-        if isinstance(expr, IntegerLiteral):
+        """
+        Visita uma expressão, anota o tipo dela no nó (`resolved_type`, que o
+        gerador de código consulta sem recalcular) e o retorna
+        """
+        expr_type = self.visit(expr)
+        if expr_type is None:
+            expr_type = Type.INTEGER  # Tipo padrão
+        expr.resolved_type = expr_type
+        return expr_type
+    
+    def visit_integer_literal(self, lit: IntegerLiteral) -> Type:
+        return Type.INTEGER
+    
+    def visit_real_literal(self, lit: RealLiteral) -> Type:
+        return Type.REAL
+    
+    def visit_string_literal(self, lit: StringLiteral) -> Type:
+        return Type.TEXT
+    
+    def visit_boolean_literal(self, lit: BooleanLiteral) -> Type:
+        return Type.BOOLEAN
+    
+    def visit_function_call(self, call: FunctionCall) -> Type:
+        """Visita uma chamada de função (leitura)"""
+        if call.name == "leia_numero":
             return Type.INTEGER
-        elif isinstance(expr, RealLiteral):
-            return Type.REAL
-        elif isinstance(expr, StringLiteral):
+        elif call.name == "leia_texto":
             return Type.TEXT
-        elif isinstance(expr, BooleanLiteral):
-            return Type.BOOLEAN
-        elif isinstance(expr, FunctionCall):
-            if expr.name == "leia_numero":
-                return Type.INTEGER
-            elif expr.name == "leia_texto":
-                return Type.TEXT
-            return Type.INTEGER
-        elif isinstance(expr, Variable):
-            symbol = self.current_scope.lookup(expr.name)
-            if not symbol:
-                self.errors.append(SemanticError(
-                    f"Variável '{expr.name}' não foi declarada",
-                    expr.line, expr.column
-                ))
-                return Type.INTEGER  # Tipo padrão para continuar análise
-            return symbol.var_type
-        elif isinstance(expr, BinaryOp):
-            return self.visit_binary_op(expr)
-        elif isinstance(expr, UnaryOp):
-            return self.visit_unary_op(expr)
-        else:
-            return Type.INTEGER  # Tipo padrão
+        return Type.INTEGER
+    
+    def visit_variable(self, var: Variable) -> Type:
+        """Visita o uso de uma variável"""
+        symbol = self.current_scope.lookup(var.name, var.name_id)
+        if not symbol:
+            self.errors.append(SemanticError(
+                f"Variável '{var.name}' não foi declarada",
+                var.line, var.column
+            ))
+            return Type.INTEGER  # Tipo padrão para continuar análise
+        return symbol.var_type
     
     def visit_binary_op(self, op: BinaryOp) -> Type:
         """Visita uma operação binária"""
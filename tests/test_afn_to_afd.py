@@ -0,0 +1,107 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lexer'))
+from afn_to_afd import AFN, AFD, afn_para_afd, minimizar_afd
+
+
+def aceita(afd, palavra):
+    estado = afd.estado_inicial
+    for simbolo in palavra:
+        estado = afd.transicoes.get((estado, simbolo))
+        if estado is None:
+            return False
+    return estado in afd.estados_finais
+
+
+def afn_termina_em_ab():
+    # (a|b)*ab
+    return AFN(
+        estados=[0, 1, 2],
+        alfabeto=['a', 'b'],
+        transicoes={(0, 'a'): {0, 1}, (0, 'b'): {0}, (1, 'b'): {2}},
+        estado_inicial=0,
+        estados_finais={2},
+    )
+
+
+def test_subset_construction_records_subsets():
+    afd = afn_para_afd(afn_termina_em_ab())
+    assert afd.subconjuntos[afd.estado_inicial] == frozenset({0})
+    assert set(afd.subconjuntos) == set(afd.estados)
+
+
+def test_minimization_merges_equivalent_states():
+    # Estados 1 e 2 são equivalentes: ambos aceitam a* a partir daí
+    afd = AFD(
+        estados=['A', 'B', 'C'],
+        alfabeto=['a'],
+        transicoes={('A', 'a'): 'B', ('B', 'a'): 'C', ('C', 'a'): 'C'},
+        estado_inicial='A',
+        estados_finais={'B', 'C'},
+    )
+    minimo = minimizar_afd(afd)
+    assert len(minimo.estados) == 2
+    for palavra in ['', 'a', 'aa', 'aaaa']:
+        assert aceita(minimo, palavra) == aceita(afd, palavra)
+
+
+def test_minimization_preserves_language():
+    afd = afn_para_afd(afn_termina_em_ab())
+    minimo = minimizar_afd(afd)
+    assert len(minimo.estados) <= len(afd.estados)
+    palavras = ['', 'a', 'b', 'ab', 'aab', 'abb', 'bab', 'abab', 'ba']
+    for palavra in palavras:
+        assert aceita(minimo, palavra) == aceita(afd, palavra)
+
+
+def test_minimization_keeps_labels_apart():
+    afd = AFD(
+        estados=['A', 'B', 'C'],
+        alfabeto=['x', 'y'],
+        transicoes={('A', 'x'): 'B', ('A', 'y'): 'C'},
+        estado_inicial='A',
+        estados_finais={'B', 'C'},
+    )
+    assert len(minimizar_afd(afd).estados) == 2
+    assert len(minimizar_afd(afd, {'B': 'um', 'C': 'outro'}).estados) == 3
+
+
+def afn_aleatorio(rng, n, alfabeto):
+    transicoes = {}
+    for _ in range(rng.randint(0, 3 * n)):
+        chave = (rng.randrange(n), rng.choice(alfabeto + ['']))
+        transicoes.setdefault(chave, set()).add(rng.randrange(n))
+    return AFN(
+        estados=list(range(n)),
+        alfabeto=alfabeto + [''],
+        transicoes=transicoes,
+        estado_inicial=rng.randrange(n),
+        estados_finais=set(rng.sample(range(n), rng.randint(0, n))),
+    )
+
+
+def test_bitset_construction_matches_sets():
+    import random
+    from afn_to_afd import afn_para_afd_bitset
+    rng = random.Random(13)
+    for _ in range(300):
+        afn = afn_aleatorio(rng, rng.randint(1, 12), ['a', 'b', 'c'])
+        esperado, obtido = afn_para_afd(afn), afn_para_afd_bitset(afn)
+        assert obtido.estados == esperado.estados
+        assert obtido.alfabeto == esperado.alfabeto
+        assert obtido.transicoes == esperado.transicoes
+        assert obtido.estado_inicial == esperado.estado_inicial
+        assert obtido.estados_finais == esperado.estados_finais
+        assert obtido.subconjuntos == esperado.subconjuntos
+
+
+def test_scanner_tables_same_with_both_constructions(monkeypatch):
+    import scanner_tables
+    from apollo_lexer import ApolloLexer
+    lexer = ApolloLexer()
+    rapido = scanner_tables.build_scanner_tables(lexer.operators, lexer.symbols)
+    monkeypatch.setattr(scanner_tables, 'afn_para_afd_bitset', afn_para_afd)
+    lento = scanner_tables.build_scanner_tables(lexer.operators, lexer.symbols)
+    assert rapido.transitions == lento.transitions
+    assert rapido.accept == lento.accept
@@ -0,0 +1,95 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from lexer.apollo_lexer import ApolloLexer
+from parser.parser import ApolloParser
+from parser.ll1_parser import LL1Parser
+from parser.arena import ASTArena
+from parser.ast import ASTNode, Block, BinaryOp, IfStatement, IntegerLiteral, RealLiteral, BooleanLiteral
+from semantic.semantic_analyzer import SemanticAnalyzer
+from codegen.llvm_generator import LLVMGenerator
+
+EXAMPLES = os.path.join(os.path.dirname(__file__), '..', 'examples')
+
+
+@pytest.fixture
+def lexer():
+    return ApolloLexer()
+
+
+def test_nodes_have_no_instance_dict():
+    node = BinaryOp('+', IntegerLiteral(1), IntegerLiteral(2), 1, 1)
+    assert not hasattr(node, '__dict__')
+    with pytest.raises(AttributeError):
+        node.extra = 1
+
+
+@pytest.mark.parametrize("name", ['exemplo_simples.apl', 'exemplo_completo.apl'])
+def test_arena_views_compile_like_the_tree(lexer, name):
+    with open(os.path.join(EXAMPLES, name), encoding='utf-8') as f:
+        program = ApolloParser(lexer).parse(f.read())
+    root = ASTArena.from_tree(program).root()
+    assert [repr(s) for s in root.statements] == [repr(s) for s in program.statements]
+    assert SemanticAnalyzer().analyze(root) == SemanticAnalyzer().analyze(program) == []
+    assert LLVMGenerator().generate(root) == LLVMGenerator().generate(program)
+
+
+def test_literal_pool_keeps_types_apart(lexer):
+    program = ApolloParser(lexer).parse(
+        'algoritmo t\nreal x\nx = 1\nx = 1.0\nx = verdadeiro\nx = 1\nfim_algoritmo')
+    arena = ASTArena.from_tree(program)
+    values = [s.value for s in arena.root().statements]
+    assert [type(v).__bases__ for v in values] == [
+        (IntegerLiteral,), (RealLiteral,), (BooleanLiteral,), (IntegerLiteral,)]
+    assert [v.value for v in values] == [1, 1.0, True, 1]
+    assert type(values[0].value) is int and type(values[1].value) is float
+    assert arena.literals.count(1) == 2  # 1 e 1.0; True fica na coluna
+
+
+def test_views_are_read_only_node_subclasses(lexer):
+    program = ApolloParser(lexer).parse('algoritmo t\nse x < 1 faca { y = -x }\nfim_algoritmo')
+    view = ASTArena.from_tree(program).root().statements[0]
+    assert isinstance(view, IfStatement) and isinstance(view, ASTNode)
+    assert (view.line, view.column) == (2, 1)
+    assert view.else_block is None
+    assert repr(view.then_block.statements[0]) == 'Assignment(y = UnaryOp(-, Variable(x)))'
+    with pytest.raises(AttributeError):
+        view.condition = None
+
+
+def test_children_are_stored_before_parents(lexer):
+    program = ApolloParser(lexer).parse('algoritmo t\nx = (1 + 2) * 3\nfim_algoritmo')
+    arena = ASTArena.from_tree(program)
+    product = arena.root().statements[0].value
+    assert product.left.index < product.index and product.right.index < product.index
+    assert product.left.left.index < product.left.index
+
+
+def test_deep_tree_from_ll1_parser(lexer):
+    depth = 50_000
+    src = 'algoritmo t\n' + '{' * depth + 'x = 1' + '}' * depth + '\nfim_algoritmo'
+    arena = ASTArena.from_tree(LL1Parser(lexer).parse(src))
+    assert len(arena) == depth + 3
+    node = arena.root().statements[0]
+    for _ in range(depth - 1):
+        node = node.statements[0]
+    assert isinstance(node, Block)
+    assert repr(node.statements[0]) == 'Assignment(x = IntegerLiteral(1))'
+
+
+def test_arena_is_smaller_than_the_tree(lexer):
+    import tracemalloc
+    src = 'algoritmo t\ninteiro x\n' + 'se x < 10 faca { x = x + 2 * x - 1 }\n' * 2000 + 'fim_algoritmo'
+    tracemalloc.start()
+    try:
+        program = ApolloParser(lexer).parse(src)
+        tree = tracemalloc.get_traced_memory()[0]
+        arena = ASTArena.from_tree(program)
+        size = tracemalloc.get_traced_memory()[0] - tree
+    finally:
+        tracemalloc.stop()
+    assert size * 3 < tree
+    assert len(arena) == 2 + 2000 * 13
@@ -0,0 +1,128 @@
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from lexer.apollo_lexer import ApolloLexer
+from parser.parser import ApolloParser
+from parser.ll1_parser import LL1Parser
+from parser.ast import (
+    Program, VarDeclaration, Assignment, IfStatement, WhileStatement, Block,
+    IntegerLiteral, RealLiteral, BooleanLiteral, StringLiteral, Type
+)
+from parser.ast_cache import AST_FORMAT, ASTCache, deserialize_ast, serialize_ast
+from codegen.llvm_generator import LLVMGenerator
+
+EXAMPLES = os.path.join(os.path.dirname(__file__), '..', 'examples')
+
+
+@pytest.fixture
+def lexer():
+    return ApolloLexer()
+
+
+def dump(node):
+    if isinstance(node, list):
+        return [dump(item) for item in node]
+    if hasattr(type(node), 'accept'):
+        fields = [name for cls in type(node).__mro__ for name in getattr(cls, '__slots__', ())]
+        return type(node).__name__, {name: dump(getattr(node, name)) for name in fields}
+    return node
+
+
+@pytest.mark.parametrize("name", ['exemplo_simples.apl', 'exemplo_completo.apl'])
+def test_round_trip_examples(lexer, name):
+    with open(os.path.join(EXAMPLES, name), encoding='utf-8') as f:
+        program = ApolloParser(lexer).parse(f.read())
+    data = serialize_ast(program)
+    assert data.startswith(AST_FORMAT)
+    loaded = deserialize_ast(data, lexer.interner)
+    assert dump(loaded) == dump(program)
+    assert LLVMGenerator().generate(loaded) == LLVMGenerator().generate(program)
+
+
+def test_round_trip_edge_values_and_fresh_interner(lexer):
+    program = Program(
+        [VarDeclaration(Type.REAL, 'r', RealLiteral(-0.1, 1, 1), 300, 2, name_id=7)],
+        [Assignment('x', IntegerLiteral(-(2 ** 70), 1, 200), 2, 1),
+         IfStatement(BooleanLiteral(False), Block([]), None, 1, 1),
+         WhileStatement(StringLiteral('olá "ç"\n'), None, 5000, 1)],
+        1, 1)
+    other = ApolloLexer()
+    loaded = deserialize_ast(serialize_ast(program), other.interner)
+    assert dump(loaded.statements) == dump(program.statements)
+    decl = loaded.declarations[0]
+    assert (decl.var_type, decl.initial_value.value, decl.line) == (Type.REAL, -0.1, 300)
+    # ids vêm do interner da carga; nomes sem id continuam sem id
+    assert decl.name_id == other.interner.intern('r')
+    assert loaded.statements[0].name_id == -1
+
+
+def test_deep_tree_round_trip(lexer):
+    depth = 50_000
+    src = 'algoritmo t\nx = ' + '-(' * depth + '1' + ')' * depth + '\nfim_algoritmo'
+    program = LL1Parser(lexer).parse(src)
+    loaded = deserialize_ast(serialize_ast(program), lexer.interner)
+    node = loaded.statements[0].value
+    for _ in range(depth):
+        node = node.operand
+    assert isinstance(node, IntegerLiteral)
+
+
+def test_corrupt_data_is_rejected(lexer):
+    data = serialize_ast(ApolloParser(lexer).parse('algoritmo t\nx = 1 + 2\nfim_algoritmo'))
+    for bad in (b'', b'APLXAST0' + data[8:], data[:-3], data + b'\x05'):
+        with pytest.raises(ValueError):
+            deserialize_ast(bad)
+
+
+def test_parser_uses_cache(lexer, tmp_path, monkeypatch):
+    cache = ASTCache(str(tmp_path))
+    src = 'algoritmo t\ninteiro x\nx = 1\nfim_algoritmo'
+    first = ApolloParser(lexer, cache=cache).parse(src)
+    assert len(list(tmp_path.glob('ast-*.bin'))) == 1
+
+    monkeypatch.setattr(ApolloParser, '_parse_tokens', None)  # não pode analisar de novo
+    second = ApolloParser(lexer, cache=cache).parse(src.encode('utf-8'))
+    assert dump(second) == dump(first)
+    with pytest.raises(TypeError):
+        ApolloParser(lexer, cache=cache).parse(src + ' ')
+
+
+def test_partial_programs_are_not_cached(lexer, tmp_path):
+    parser = ApolloParser(lexer, recover=True, cache=ASTCache(str(tmp_path)))
+    parser.parse('algoritmo t\nx = (1 +\nfim_algoritmo')
+    assert parser.errors
+    assert list(tmp_path.glob('ast-*.bin')) == []
+
+
+def test_compiler_reuses_cached_ast(tmp_path, capsys):
+    from apollo_compiler import compile_apollo
+    with open(os.path.join(EXAMPLES, 'exemplo_completo.apl'), encoding='utf-8') as f:
+        src = f.read()
+    cache = ASTCache(str(tmp_path / 'cache'))
+    assert compile_apollo(src, str(tmp_path / 'a.ll'), ast_cache=cache)
+    assert compile_apollo(src, str(tmp_path / 'b.ll'), verbose=True, ast_cache=cache)
+    assert 'AST carregada do cache' in capsys.readouterr().out
+    assert (tmp_path / 'a.ll').read_text(encoding='utf-8') == (tmp_path / 'b.ll').read_text(encoding='utf-8')
+
+
+def test_cache_load_is_much_faster_than_parsing(lexer, tmp_path):
+    src = ('algoritmo t\ninteiro x, y\nreal z\n'
+           + 'se x < 10 faca { x = x + y * 2 - 1 escreva("v", x) z = 2.5 * -z }\n' * 2000
+           + 'fim_algoritmo')
+    cache = ASTCache(str(tmp_path))
+    key = cache.key(src)
+
+    start = time.perf_counter()
+    program = ApolloParser(lexer).parse(src)
+    parse_time = time.perf_counter() - start
+    cache.store(key, program)
+
+    start = time.perf_counter()
+    loaded = cache.load(key, lexer.interner)
+    load_time = time.perf_counter() - start
+    assert loaded is not None
+    assert load_time * 4 < parse_time
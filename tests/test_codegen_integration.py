@@ -1,4 +1,5 @@
 import os
+import pytest
 from apollo_compiler import compile_apollo
 
 
@@ -17,3 +18,91 @@ def test_compile_example_generates_ll(tmp_path):
     content = out_file.read_text(encoding='utf-8')
     # Verifica presença de marca típica de LLVM IR
     assert 'define' in content or 'target' in content
+
+
+def test_compile_tokenizes_once(tmp_path, monkeypatch):
+    from lexer.apollo_lexer import ApolloLexer
+    calls = []
+    for name in ('tokenize', 'tokenize_compact', 'tokenize_bytes', 'iter_tokens'):
+        original = getattr(ApolloLexer, name)
+
+        def counted(self, *args, _original=original, _name=name, **kwargs):
+            calls.append(_name)
+            return _original(self, *args, **kwargs)
+        monkeypatch.setattr(ApolloLexer, name, counted)
+
+    with open(os.path.join('examples', 'exemplo_completo.apl'), 'rb') as f:
+        data = f.read()
+    assert compile_apollo(data.decode('utf-8'), output_file=str(tmp_path / 'a.ll'), verbose=True)
+    assert compile_apollo(data, output_file=str(tmp_path / 'b.ll'))
+    assert calls == ['tokenize_compact', 'tokenize_bytes']
+
+
+def test_parser_accepts_token_streams():
+    from lexer.apollo_lexer import ApolloLexer
+    from parser.parser import ApolloParser
+    from codegen.llvm_generator import LLVMGenerator
+
+    with open(os.path.join('examples', 'exemplo_completo.apl'), encoding='utf-8') as f:
+        src = f.read()
+    lexer = ApolloLexer()
+    expected = LLVMGenerator().generate(ApolloParser(lexer).parse(src))
+    for tokens in (lexer.tokenize_compact(src), lexer.tokenize(src), lexer.iter_tokens(src)):
+        assert LLVMGenerator().generate(ApolloParser(lexer).parse(tokens)) == expected
+
+
+def test_iter_parse_yields_items_in_source_order():
+    from lexer.apollo_lexer import ApolloLexer
+    from parser.parser import ApolloParser
+
+    src = 'algoritmo t\ninteiro x\nx = 1\nreal y, z\nescreva(x)\nfim_algoritmo'
+    items = list(ApolloParser(ApolloLexer()).iter_parse(src))
+    assert [type(item).__name__ for item in items] == [
+        'VarDeclaration', 'Assignment', 'VarDeclaration', 'VarDeclaration', 'WriteStatement']
+
+
+def test_stream_compile_matches_batch(tmp_path, capsys):
+    src_path = os.path.join('examples', 'exemplo_simples.apl')
+    with open(src_path, 'r', encoding='utf-8') as f:
+        src = f.read()
+
+    assert compile_apollo(src, output_file=str(tmp_path / 'batch.ll'))
+    assert compile_apollo(src.encode('utf-8'), output_file=str(tmp_path / 'stream.ll'), stream=True)
+    assert (tmp_path / 'stream.ll').read_text(encoding='utf-8') == (tmp_path / 'batch.ll').read_text(encoding='utf-8')
+    assert sorted(os.listdir(tmp_path)) == ['batch.ll', 'stream.ll']
+
+    capsys.readouterr()
+    assert compile_apollo(src)
+    batch = capsys.readouterr().out
+    assert compile_apollo(src, stream=True)
+    assert capsys.readouterr().out == batch
+
+
+def test_stream_compile_reports_errors_without_output(tmp_path, capsys):
+    src = 'algoritmo t\nx = 1\ninteiro x\ny = verdadeiro\nfim_algoritmo'
+    out_file = tmp_path / 'out.ll'
+    assert not compile_apollo(src, output_file=str(out_file), stream=True)
+    out = capsys.readouterr().out
+    assert out.count("não foi declarada") == 2
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.mark.parametrize("kind", ['str', 'bytes', 'mmap'])
+def test_stream_compile_memory_does_not_grow_with_program(tmp_path, kind):
+    import mmap
+    import tracemalloc
+    src = 'algoritmo t\ninteiro x\n' + 'se x < 10 faca { x = x + 1 escreva("v", x) }\n' * 4000 + 'fim_algoritmo'
+    src_path = tmp_path / 'programa.apl'
+    src_path.write_text(src, encoding='utf-8')
+    # Como a linha de comando passa o arquivo: mapeado com mmap ou em bytes
+    with open(src_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        source = {'str': src, 'bytes': src.encode('utf-8'), 'mmap': mapped}[kind]
+        tracemalloc.start()
+        try:
+            assert compile_apollo(source, output_file=str(tmp_path / 'out.ll'), stream=True)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    # Só o que é proporcional ao próprio texto (tabela de classes do scanner);
+    # o modo em lotes passa de 30 vezes o texto
+    assert peak < 3 * len(src)
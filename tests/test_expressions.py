@@ -0,0 +1,47 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from lexer.apollo_lexer import ApolloLexer, TokenType
+from parser.parser import ApolloParser, BINARY_OPERATORS, ParseError
+
+
+def parse_expression(src):
+    parser = ApolloParser(ApolloLexer())
+    parser.tokens = parser.lexer.tokenize_compact(src, skip_trivia=True)
+    parser.position = -1
+    parser.advance()
+    return parser.parse_expression(), parser.current_token
+
+
+@pytest.mark.parametrize("src,tree", [
+    ('a + b * c', 'BinaryOp(+, Variable(a), BinaryOp(*, Variable(b), Variable(c)))'),
+    ('a - b - c', 'BinaryOp(-, BinaryOp(-, Variable(a), Variable(b)), Variable(c))'),
+    ('a * b / c + d', 'BinaryOp(+, BinaryOp(/, BinaryOp(*, Variable(a), Variable(b)), Variable(c)), Variable(d))'),
+    ('a + b < c * d', 'BinaryOp(<, BinaryOp(+, Variable(a), Variable(b)), BinaryOp(*, Variable(c), Variable(d)))'),
+    ('-a * b', 'BinaryOp(*, UnaryOp(-, Variable(a)), Variable(b))'),
+    ('(a + b) * c', 'BinaryOp(*, BinaryOp(+, Variable(a), Variable(b)), Variable(c))'),
+])
+def test_precedence_and_associativity(src, tree):
+    expr, rest = parse_expression(src)
+    assert repr(expr) == tree
+    assert rest.type == TokenType.EOF
+
+
+def test_relational_operators_do_not_chain():
+    expr, rest = parse_expression('a < b < c')
+    assert repr(expr) == 'BinaryOp(<, Variable(a), Variable(b))'
+    assert rest.value == '<'
+
+
+def test_unary_operand_is_a_primary():
+    with pytest.raises(ParseError):
+        parse_expression('- -a')
+
+
+def test_new_operator_only_needs_a_table_entry(monkeypatch):
+    monkeypatch.setitem(BINARY_OPERATORS, '=', (0, 'right'))
+    expr, _ = parse_expression('a = b = c + 1')
+    assert repr(expr) == 'BinaryOp(=, Variable(a), BinaryOp(=, Variable(b), BinaryOp(+, Variable(c), IntegerLiteral(1))))'
@@ -0,0 +1,192 @@
+import os
+import random
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from lexer.apollo_lexer import ApolloLexer, TokenType
+from parser.parser import ApolloParser, ParseError
+from parser.incremental import IncrementalParser
+from parser.ast import ASTNode, Assignment, Block
+
+SOURCE = '''algoritmo t
+inteiro x, y
+x = 1
+se x < 2 faca {
+    y = x + 1 escreva(y)
+    enquanto y > 0 faca { y = y - 1 }
+} senao escreva("n")
+real z
+{ z = 2.5 * x  x = -x }
+escreva(x, y)
+fim_algoritmo'''
+
+
+@pytest.fixture
+def lexer():
+    return ApolloLexer()
+
+
+def dump(node):
+    if isinstance(node, list):
+        return [dump(item) for item in node]
+    if isinstance(node, ASTNode):
+        fields = [name for cls in type(node).__mro__ for name in getattr(cls, '__slots__', ())]
+        return type(node).__name__, {name: dump(getattr(node, name)) for name in fields}
+    return node
+
+
+def edit(parser, old, new, occurrence=0):
+    offset = -1
+    for _ in range(occurrence + 1):
+        offset = parser.source.index(old, offset + 1)
+    return parser.edit(offset, len(old), new)
+
+
+def test_edit_reparses_only_the_statement(lexer):
+    parser = IncrementalParser(lexer, SOURCE)
+    before = parser.program
+    if_statement = before.statements[1]
+    block = if_statement.then_block
+    loop = block.statements[2]
+
+    program = edit(parser, 'x + 1', 'x + 10 * y')
+    assert dump(program) == dump(ApolloParser(lexer).parse(parser.source))
+    assert isinstance(parser.reparsed, Assignment)
+
+    # Irmãos e o resto do programa são os mesmos objetos; o caminho até a raiz é novo
+    new_if = program.statements[1]
+    assert program is not before and new_if is not if_statement
+    assert new_if.condition is if_statement.condition and new_if.else_block is if_statement.else_block
+    assert new_if.then_block.statements[1:] == block.statements[1:]
+    assert new_if.then_block.statements[2] is loop
+    assert program.statements[0] is before.statements[0] and program.declarations == before.declarations
+    # A árvore anterior não muda
+    assert repr(block.statements[0]) == 'Assignment(y = BinaryOp(+, Variable(x), IntegerLiteral(1)))'
+
+
+def test_reused_nodes_follow_inserted_lines(lexer):
+    parser = IncrementalParser(lexer, SOURCE)
+    last = parser.program.statements[-1]
+    block = parser.program.statements[2]
+    program = edit(parser, 'x = 1', 'x = (1 +\n\n 2)')
+    assert dump(program) == dump(ApolloParser(lexer).parse(parser.source))
+    assert program.statements[-1] is last and last.line == 12
+
+    # Na mesma linha da edição, só a coluna muda
+    negation = block.statements[1]
+    program = edit(parser, '2.5', '2.75')
+    assert dump(program) == dump(ApolloParser(lexer).parse(parser.source))
+    assert program.statements[-1] is last and last.line == 12
+    assert program.statements[2].statements[1] is negation
+    assert (negation.line, negation.column) == (11, 17)
+
+
+def test_edit_that_splits_a_statement_widens_to_the_block(lexer):
+    parser = IncrementalParser(lexer, SOURCE)
+    edit(parser, 'y = y - 1', 'y = y escreva(y) y = 0')
+    assert isinstance(parser.reparsed, Block)
+    assert len(parser.reparsed.statements) == 3
+    assert dump(parser.program) == dump(ApolloParser(lexer).parse(parser.source))
+
+    # Fora de qualquer comando (declarações), o programa inteiro é analisado de novo
+    edit(parser, 'real z', 'real z, w')
+    assert parser.reparsed is parser.program
+    assert [d.name for d in parser.program.declarations] == ['x', 'y', 'z', 'w']
+
+
+def test_lookahead_after_the_region_is_respected(lexer):
+    # Dentro de bloco, o '<' solto depois do comando é ignorado; com 'x + 1' ele
+    # passa a fazer parte da expressão e a região sozinha não basta
+    parser = IncrementalParser(lexer, 'algoritmo t\n{ x = a < b < c }\nfim_algoritmo')
+    edit(parser, 'a < b', 'a + b')
+    assert dump(parser.program) == dump(ApolloParser(lexer).parse(parser.source))
+    assert repr(parser.program.statements[0].statements[0]) == (
+        'Assignment(x = BinaryOp(<, BinaryOp(+, Variable(a), Variable(b)), Variable(c)))')
+
+
+def test_trivia_edits_keep_every_node(lexer):
+    parser = IncrementalParser(lexer, SOURCE)
+    program = parser.program
+    statements = list(program.statements)
+    last = statements[-1]
+    # Enter, espaços e comentário entre comandos do nível do programa e dentro de um
+    # comando; por fim a linha em branco inserida é apagada
+    for anchor, removed, text in (('se x < 2', 0, '\n'), ('escreva(x, y)', 0, '   '), ('\n{ z', 0, ' # z'),
+                                  ('* x', 0, '\n '), ('\n\n', 1, '')):
+        assert parser.edit(parser.source.index(anchor), removed, text) is program
+        assert parser.reparsed is None
+        assert all(a is b for a, b in zip(program.statements, statements))
+        assert dump(program) == dump(ApolloParser(lexer).parse(parser.source))
+    assert (last.line, last.column) == (11, 4)
+
+    # Os spans acompanharam as edições: a próxima re-analisa só um comando
+    program = edit(parser, 'y - 1', 'y - 2')
+    assert isinstance(parser.reparsed, Assignment)
+    assert program.statements[-1] is last
+    assert dump(program) == dump(ApolloParser(lexer).parse(parser.source))
+
+
+def test_random_trivia_edits_match_full_parse(lexer):
+    rng = random.Random(8)
+    snippets = ['\n', ' ', '\t', ' # nota\n', '\n\n  ']
+    for _ in range(20):
+        parser = IncrementalParser(lexer, SOURCE)
+        nodes = [id(node) for node in parser.program.statements]
+        for _ in range(10):
+            # Só entre tokens: no começo de um espaço (fora dos comentários)
+            offset = rng.choice([t.offset for t in parser.tokens.tokens() if t.type is TokenType.WHITESPACE])
+            program = parser.edit(offset, 0, rng.choice(snippets))
+            assert dump(program) == dump(ApolloParser(lexer).parse(parser.source)), (parser.source, offset)
+        assert [id(node) for node in parser.program.statements] == nodes
+
+
+def test_syntax_error_then_fix(lexer):
+    parser = IncrementalParser(lexer, SOURCE)
+    with pytest.raises(ParseError):
+        edit(parser, 'fim_algoritmo', 'fim')
+    assert parser.program is None
+    program = edit(parser, 'fim', 'fim_algoritmo')
+    assert dump(program) == dump(ApolloParser(lexer).parse(SOURCE))
+
+
+def test_random_edits_match_full_parse(lexer):
+    rng = random.Random(5)
+    snippets = ['\n', '7', ' + 3', ' * y', ' escreva(x) ', '\n{ x = 1 }\n', 'z', '  ', 'x = 2 ', ' // c\n',
+                '(', '}', ' se x faca ']
+    for _ in range(40):
+        parser = IncrementalParser(lexer, SOURCE)
+        for _ in range(8):
+            source = parser.source
+            offset = rng.randint(0, len(source))
+            removed = rng.randint(0, min(2, len(source) - offset))
+            inserted = rng.choice(snippets)
+            changed = source[:offset] + inserted + source[offset + removed:]
+            try:
+                expected = dump(ApolloParser(lexer).parse(changed))
+            except ParseError:
+                expected = None
+            try:
+                result = dump(parser.edit(offset, removed, inserted))
+            except ParseError:
+                result = None
+            assert result == expected, (source, offset, removed, inserted)
+
+
+def test_edit_is_much_faster_than_full_parse(lexer):
+    src = ('algoritmo t\ninteiro x, y\n'
+           + 'se x < 10 faca { x = x + 2 * y - 1 escreva(x) }\n' * 2000 + 'fim_algoritmo')
+    start = time.perf_counter()
+    ApolloParser(lexer).parse(src)
+    full = time.perf_counter() - start
+
+    parser = IncrementalParser(lexer, src)
+    offset = src.index('2 * y', len(src) // 2)
+    parser.edit(offset, 1, '3')  # leva o gap do lexer incremental para perto da edição
+    start = time.perf_counter()
+    parser.edit(offset, 1, '4')
+    parser.edit(offset, 1, '5\n')
+    assert (time.perf_counter() - start) * 10 < full
+    assert dump(parser.program) == dump(ApolloParser(lexer).parse(parser.source))
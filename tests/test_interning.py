@@ -0,0 +1,59 @@
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from lexer.apollo_lexer import ApolloLexer, TokenType
+from parser.parser import ApolloParser
+from parser.ast import Assignment, Variable
+from semantic.semantic_analyzer import SemanticAnalyzer
+
+SOURCE = 'algoritmo t\ninteiro contador\ncontador = contador + 1\nescreva(contador)\nfim_algoritmo'
+
+
+@pytest.fixture
+def lexer():
+    return ApolloLexer()
+
+
+def test_repeated_identifiers_share_id_and_string(lexer):
+    names = [t for t in lexer.tokenize(SOURCE) if t.type == TokenType.IDENTIFIER]
+    assert [t.value for t in names] == ['t'] + ['contador'] * 4
+    assert len({t.symbol_id for t in names[1:]}) == 1
+    assert all(t.value is names[1].value for t in names[1:])
+    assert lexer.interner.name(names[1].symbol_id) == 'contador'
+
+
+def test_keywords_resolve_through_interner(lexer):
+    tokens = lexer.tokenize('se verdadeiro senaox')
+    assert [(t.type, t.symbol_id >= 0) for t in tokens if t.type != TokenType.WHITESPACE] == [
+        (TokenType.KEYWORD, True), (TokenType.BOOLEAN, True),
+        (TokenType.IDENTIFIER, True), (TokenType.EOF, False)]
+    assert lexer.interner.kind(tokens[0].symbol_id) == TokenType.KEYWORD
+
+
+def test_ids_agree_across_tokenizers(lexer):
+    expected = [t.symbol_id for t in lexer.tokenize(SOURCE)]
+    assert [t.symbol_id for t in lexer.tokenize_compact(SOURCE)] == expected
+    assert [t.symbol_id for t in lexer.tokenize_stream(io.StringIO(SOURCE), chunk_size=4)] == expected
+    assert [t.symbol_id for t in lexer.incremental(SOURCE).tokens()] == expected
+
+
+def test_ast_nodes_carry_name_ids(lexer):
+    program = ApolloParser(lexer).parse(SOURCE)
+    decl = program.declarations[0]
+    assign = program.statements[0]
+    assert isinstance(assign, Assignment) and isinstance(assign.value.left, Variable)
+    assert decl.name_id >= 0
+    assert assign.name_id == decl.name_id == assign.value.left.name_id
+
+
+def test_semantic_scope_is_keyed_by_id(lexer):
+    program = ApolloParser(lexer).parse(SOURCE)
+    analyzer = SemanticAnalyzer()
+    assert analyzer.analyze(program) == []
+    decl = program.declarations[0]
+    assert list(analyzer.current_scope.symbols) == [decl.name_id]
+    assert analyzer.current_scope.lookup('contador', decl.name_id).name == 'contador'
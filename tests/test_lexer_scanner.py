@@ -0,0 +1,285 @@
+import io
+import os
+import random
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from lexer.apollo_lexer import ApolloLexer, IncrementalLexer, TokenType
+from scanner_tables import ScannerTables, load_scanner_tables
+
+EXAMPLES = os.path.join(os.path.dirname(__file__), '..', 'examples')
+ALPHABET = 'abxyz_019+-.<>=!*/(){}[]:,;"#\n \térá€&|'
+
+
+@pytest.fixture
+def legacy():
+    return ApolloLexer(single_pass=False)
+
+
+@pytest.fixture
+def lexer():
+    return ApolloLexer()
+
+
+@pytest.mark.parametrize("name", ['exemplo_simples.apl', 'exemplo_completo.apl'])
+def test_single_pass_matches_legacy_on_examples(legacy, lexer, name):
+    with open(os.path.join(EXAMPLES, name), encoding='utf-8') as f:
+        src = f.read()
+    assert lexer.tokenize(src) == legacy.tokenize(src)
+
+
+def test_single_pass_matches_legacy_on_random_inputs(legacy, lexer):
+    rng = random.Random(1234)
+    for _ in range(2000):
+        src = ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 40)))
+        assert lexer.tokenize(src) == legacy.tokenize(src), repr(src)
+
+
+@pytest.mark.parametrize("src,types", [
+    ('x+1', [TokenType.IDENTIFIER, TokenType.INTEGER]),
+    ('3.x', [TokenType.INTEGER, TokenType.SYMBOL, TokenType.IDENTIFIER]),
+    ('#', [TokenType.INVALID]),
+    ('# fim', [TokenType.COMMENT]),
+    ('"aberta', [TokenType.INVALID, TokenType.IDENTIFIER]),
+])
+def test_single_pass_edge_cases(lexer, src, types):
+    toks = [t for t in lexer.tokenize(src) if t.type != TokenType.EOF]
+    assert [t.type for t in toks] == types
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 64])
+def test_stream_matches_tokenize_across_chunks(lexer, chunk_size):
+    rng = random.Random(99)
+    for _ in range(300):
+        src = ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 80)))
+        stream = lexer.tokenize_stream(io.StringIO(src), chunk_size=chunk_size)
+        assert list(stream) == lexer.tokenize(src), repr(src)
+
+
+def test_stream_token_larger_than_buffer(lexer):
+    src = 'escreva("' + 'x' * 5000 + '") # ' + 'c' * 3000 + '\n123456789'
+    stream = list(lexer.tokenize_stream(io.StringIO(src), chunk_size=16))
+    assert stream == lexer.tokenize(src)
+    assert stream[2].type == TokenType.STRING
+
+
+def test_tables_round_trip_through_bytes(lexer):
+    tables = ScannerTables.from_bytes(lexer.tables.to_bytes())
+    assert tables.transitions == lexer.tables.transitions
+    assert tables.accept == lexer.tables.accept
+    assert tables.ascii_classes == lexer.tables.ascii_classes
+
+
+def test_tables_are_cached_on_disk(lexer, tmp_path, monkeypatch):
+    import scanner_tables
+    monkeypatch.setattr(scanner_tables, '_MEMORY_CACHE', {})
+    first = load_scanner_tables(lexer.operators, lexer.symbols, cache_dir=str(tmp_path))
+    assert len(list(tmp_path.glob('scanner-*.bin'))) == 1
+
+    monkeypatch.setattr(scanner_tables, '_MEMORY_CACHE', {})
+    monkeypatch.setattr(scanner_tables, 'build_scanner_tables', None)  # não pode reconstruir
+    second = load_scanner_tables(lexer.operators, lexer.symbols, cache_dir=str(tmp_path))
+    assert second.transitions == first.transitions
+
+
+
+def test_compact_buffer_materializes_same_tokens(lexer):
+    rng = random.Random(7)
+    for _ in range(300):
+        src = ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 60)))
+        assert lexer.tokenize_compact(src).tokens() == lexer.tokenize(src), repr(src)
+
+
+def test_compact_buffer_view_api(lexer):
+    buffer = lexer.tokenize_compact('x = 42 # fim\ny')
+    assert len(buffer) == 9
+    assert buffer.type_at(4) == TokenType.INTEGER
+    assert buffer.value_at(4) == '42'
+    assert buffer[-1].type == TokenType.EOF
+
+    sem_trivia = buffer.without(TokenType.WHITESPACE, TokenType.COMMENT)
+    assert [t.value for t in sem_trivia] == ['x', '=', '42', 'y', '']
+    assert sem_trivia[3].line == 2
+
+
+def test_trivia_free_mode_records_side_table(lexer):
+    from lexer.apollo_lexer import TokenBuffer
+    src = 'x = 1 # um\n  y = 2'
+    trivia = TokenBuffer(src)
+    buffer = lexer.tokenize_compact(src, skip_trivia=True, trivia=trivia)
+    assert [t.value for t in buffer] == ['x', '=', '1', 'y', '=', '2', '']
+    comments = [t for t in trivia if t.type == TokenType.COMMENT]
+    assert [c.value for c in comments] == ['# um\n']
+    assert len(buffer) + len(trivia) == len(lexer.tokenize(src))
+
+
+def test_trivia_free_mode_matches_filtered_tokens(lexer):
+    rng = random.Random(5)
+    trivia_types = (TokenType.WHITESPACE, TokenType.COMMENT)
+    for _ in range(300):
+        src = ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 60)))
+        expected = [t for t in lexer.tokenize(src) if t.type not in trivia_types]
+        assert lexer.tokenize_compact(src, skip_trivia=True).tokens() == expected, repr(src)
+        assert lexer.tokenize(src, skip_trivia=True) == expected, repr(src)
+
+
+def test_incremental_edits_match_full_relex(lexer):
+    rng = random.Random(11)
+    for _ in range(300):
+        src = ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 50)))
+        inc = lexer.incremental(src)
+        for _ in range(5):
+            offset = rng.randint(0, len(inc.source))
+            removed = rng.randint(0, min(4, len(inc.source) - offset))
+            inserted = ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 4)))
+            before = inc.tokens()
+            edit = inc.edit(offset, removed, inserted)
+            after = inc.tokens()
+            assert after == lexer.tokenize(inc.source), (src, offset, removed, inserted)
+            assert after[:edit.start] == before[:edit.start]
+            assert len(after) - edit.new_end == len(before) - edit.old_end
+            # a faixa começa no primeiro token que de fato mudou
+            assert (edit.start in (edit.old_end, edit.new_end)
+                    or after[edit.start] != before[edit.start]), (src, offset, removed, inserted)
+
+
+def test_incremental_edit_reports_small_range(lexer):
+    src = 'x = 1\n' * 1000
+    inc = lexer.incremental(src)
+    edit = inc.edit(src.index('1', 3000), 1, '42')
+    assert edit.old_end - edit.start <= 3
+    assert '42' in [inc[i].value for i in range(edit.start, edit.new_end)]
+    assert inc.tokens() == lexer.tokenize(inc.source)
+
+
+def test_incremental_chunks_and_pending_shifts(lexer):
+    # Pedaços de texto minúsculos e poucos deslocamentos pendentes antes de aplicá-los
+    rng = random.Random(13)
+    for _ in range(100):
+        src = ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 120)))
+        inc = IncrementalLexer(lexer, src, chunk_size=rng.randint(1, 8))
+        inc.max_pending = rng.randint(0, 4)
+        for _ in range(10):
+            offset = rng.randint(0, len(src))
+            removed = rng.randint(0, min(5, len(src) - offset))
+            inserted = ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 5)))
+            inc.edit(offset, removed, inserted)
+            src = src[:offset] + inserted + src[offset + removed:]
+            assert inc.source == src
+            assert [inc[i] for i in range(len(inc))] == lexer.tokenize(src), (src, offset, removed, inserted)
+            offset = rng.randint(0, len(src))
+            assert inc.position(offset) == (src.count('\n', 0, offset) + 1, offset - src.rfind('\n', 0, offset))
+
+
+def test_incremental_edit_cost_does_not_depend_on_distance(lexer):
+    src = 'algoritmo t\ninteiro x, y\n' + 'se x < 10 faca { x = x + 2 * y - 1 }\n' * 8000 + 'fim_algoritmo'
+    inc = lexer.incremental(src)
+    top, bottom = 100, len(src) - 100
+
+    def timed(offsets):
+        times = []
+        for offset in offsets:
+            start = time.perf_counter()
+            inc.edit(offset, 1, '7')
+            times.append(time.perf_counter() - start)
+        return sorted(times)[len(times) // 2]
+
+    near = timed([top] * 11)
+    far = timed([bottom, top] * 6)  # cada edição no outro extremo do arquivo
+    assert far < 10 * near + 0.001
+    assert inc.tokens() == lexer.tokenize(inc.source)
+
+
+def test_parallel_matches_sequential_on_random_inputs(lexer):
+    from concurrent.futures import ThreadPoolExecutor
+    rng = random.Random(21)
+    with ThreadPoolExecutor(2) as executor:
+        for _ in range(500):
+            src = ''.join(rng.choice(ALPHABET + '\n\n') for _ in range(rng.randint(0, 120)))
+            for skip_trivia in (False, True):
+                expected = lexer.tokenize_compact(src, skip_trivia).tokens()
+                buffer = lexer.tokenize_parallel(src, chunk_size=rng.randint(1, 16),
+                                                 skip_trivia=skip_trivia, executor=executor)
+                assert buffer.tokens() == expected, repr(src)
+
+
+def test_parallel_in_process_pool(lexer):
+    src = 'algoritmo t\ninteiro x\nx = 1 # um\nescreva("a\nb")\n' * 20 + 'fim_algoritmo'
+    buffer = lexer.tokenize_parallel(src, workers=2, chunk_size=64)
+    assert buffer.tokens() == lexer.tokenize(src)
+    assert buffer[-2].line == 101
+
+
+def _positions(tokens):
+    return [(t.type, t.value, t.line, t.column) for t in tokens]
+
+
+def test_bytes_path_matches_text_path(lexer):
+    rng = random.Random(31)
+    alphabet = ALPHABET + '\xa0\u2028\U0001F600'
+    for _ in range(500):
+        src = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 60)))
+        data = src.encode('utf-8')
+        for skip_trivia in (False, True):
+            expected = lexer.tokenize_compact(src, skip_trivia).tokens()
+            buffer = lexer.tokenize_bytes(data, skip_trivia, window_size=rng.randint(1, 16))
+            assert _positions(buffer) == _positions(expected), repr(src)
+            assert [t.offset for t in buffer] == [len(src[:t.offset].encode('utf-8')) for t in expected]
+
+
+def test_bytes_path_over_mmap_normalizes_crlf(lexer, tmp_path):
+    import mmap
+    path = tmp_path / 'p.apl'
+    path.write_bytes('x = "olá\r\nmundo" # ç\r\ny'.encode('utf-8'))
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        tokens = lexer.tokenize_bytes(data, skip_trivia=True).tokens()
+    assert [t.value for t in tokens] == ['x', '=', '"olá\nmundo"', 'y', '']
+    assert (tokens[3].line, tokens[3].column) == (3, 1)
+
+
+def test_line_index_positions():
+    from lexer.apollo_lexer import LineIndex
+    index = LineIndex('ab\n\ncd\n')
+    assert len(index) == 4
+    assert index.line_col(0) == (1, 1)
+    assert index.line_col(2) == (1, 3)
+    assert index.line_col(3) == (2, 1)
+    assert index.line_col(5) == (3, 2)
+    assert index.line_col(7) == (4, 1)
+
+
+def test_parse_error_reports_line_and_column(lexer):
+    from parser.parser import ApolloParser, ParseError
+    with pytest.raises(ParseError) as info:
+        ApolloParser(lexer).parse('algoritmo t\n  x = (1 +\nfim_algoritmo')
+    assert 'linha 3, coluna 1' in str(info.value)
+
+
+def test_invalid_characters_coalesce_into_one_token(lexer):
+    tokens = [t for t in lexer.tokenize('@!&x != y') if t.type != TokenType.WHITESPACE]
+    assert [(t.type, t.value) for t in tokens] == [
+        (TokenType.INVALID, '@!&'), (TokenType.IDENTIFIER, 'x'), (TokenType.OPERATOR, '!='),
+        (TokenType.IDENTIFIER, 'y'), (TokenType.EOF, '')]
+    assert [t.value for t in lexer.tokenize('"aberta')][:1] == ['"']
+
+
+def test_max_errors_aborts_every_tokenizer():
+    from lexer.apollo_lexer import LexicalError
+    lexer = ApolloLexer(max_errors=2)
+    src = 'x = @ 1\ny = $ 2\nz = ~ 3'
+    assert len([t for t in lexer.tokenize(src[:16]) if t.type == TokenType.INVALID]) == 2
+    for tokenize in (lexer.tokenize, lexer.tokenize_compact, lexer.iter_tokens,
+                     lambda s: lexer.tokenize_bytes(s.encode('utf-8'))):
+        with pytest.raises(LexicalError) as info:
+            list(tokenize(src))
+        assert (info.value.line, info.value.column) == (3, 5)
+
+
+def test_compiler_reports_lexical_error(capsys):
+    from apollo_compiler import compile_apollo
+    src = 'algoritmo t\ninteiro x\nx = @@ 1 $\nfim_algoritmo'
+    assert not compile_apollo(src, max_errors=1)
+    assert 'Erro léxico' in capsys.readouterr().out
@@ -0,0 +1,122 @@
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from lexer.apollo_lexer import ApolloLexer
+from parser.parser import ApolloParser, ParseError
+from parser.ll1_parser import LL1Parser
+from parser.ast import ASTNode, Block, IfStatement, WhileStatement
+from codegen.llvm_generator import LLVMGenerator
+
+EXAMPLES = os.path.join(os.path.dirname(__file__), '..', 'examples')
+DEPTH = 100_000
+
+
+@pytest.fixture
+def lexer():
+    return ApolloLexer()
+
+
+def dump(node):
+    if isinstance(node, list):
+        return [dump(item) for item in node]
+    if isinstance(node, ASTNode):
+        fields = [name for cls in type(node).__mro__ for name in getattr(cls, '__slots__', ())]
+        return type(node).__name__, {name: dump(getattr(node, name)) for name in fields}
+    return node
+
+
+@pytest.mark.parametrize("name", ['exemplo_simples.apl', 'exemplo_completo.apl'])
+def test_same_ast_as_recursive_parser_on_examples(lexer, name):
+    with open(os.path.join(EXAMPLES, name), encoding='utf-8') as f:
+        src = f.read()
+    expected = ApolloParser(lexer).parse(src)
+    program = LL1Parser(lexer).parse(src)
+    assert dump(program) == dump(expected)
+    assert LLVMGenerator().generate(program) == LLVMGenerator().generate(expected)
+
+
+def test_same_ast_as_recursive_parser_on_random_programs(lexer):
+    rng = random.Random(18)
+    statements = ['x = 1', 'y = x * (2 + 3) - -x', 'escreva("a", x)', 'x = leia_numero()',
+                  'inteiro a, b', 'se x < 1 faca', 'se x faca y = 1 senao',
+                  'enquanto x faca', '{ x = 1 ; y }', '{ }']
+    for _ in range(500):
+        body = ' '.join(rng.choice(statements) for _ in range(rng.randint(0, 12)))
+        src = f'algoritmo t\n{body}\nfim_algoritmo'
+        try:
+            expected = ('ok', dump(ApolloParser(lexer).parse(src)))
+        except ParseError:
+            expected = ('erro',)
+        except RecursionError:
+            continue
+        try:
+            actual = ('ok', dump(LL1Parser(lexer).parse(src)))
+        except ParseError:
+            actual = ('erro',)
+        assert actual == expected, src
+
+
+def _depth(node, child):
+    depth = 0
+    while node is not None:
+        depth += 1
+        node = child(node)
+    return depth
+
+
+def test_deeply_nested_blocks(lexer):
+    src = 'algoritmo t\n' + '{' * DEPTH + 'x = 1' + '}' * DEPTH + '\nfim_algoritmo'
+    program = LL1Parser(lexer).parse(src)
+    depth = _depth(program.statements[0],
+                   lambda b: b.statements[0] if isinstance(b, Block) else None)
+    assert depth == DEPTH + 1
+
+
+def test_deeply_nested_if_and_while(lexer):
+    src = 'algoritmo t\n' + 'se x faca enquanto y faca ' * (DEPTH // 2) + 'x = 1\nfim_algoritmo'
+    program = LL1Parser(lexer).parse(src)
+
+    def child(node):
+        if isinstance(node, IfStatement):
+            return node.then_block
+        if isinstance(node, WhileStatement):
+            return node.body
+        return None
+    assert _depth(program.statements[0], child) == DEPTH + 1
+
+
+def test_deeply_nested_parentheses(lexer):
+    src = 'algoritmo t\nx = ' + '(' * DEPTH + '1' + ')' * DEPTH + ' + 2\nfim_algoritmo'
+    statement = LL1Parser(lexer).parse(src).statements[0]
+    assert repr(statement.value) == 'BinaryOp(+, IntegerLiteral(1), IntegerLiteral(2))'
+
+
+def test_stray_token_at_program_level_is_an_error(lexer):
+    for parser in (ApolloParser(lexer), LL1Parser(lexer)):
+        with pytest.raises(ParseError):
+            parser.parse('algoritmo t\nx = 1 )\nfim_algoritmo')
+
+
+def test_recovery_options_are_rejected(lexer):
+    for options in ({'recover': True}, {'recover': True, 'max_errors': 3}, {'max_errors': 3}):
+        with pytest.raises(ValueError):
+            LL1Parser(lexer, **options)
+
+
+def test_iter_parse_streams_deep_code_without_recursion(lexer):
+    src = ('algoritmo t\ninteiro x\n' + '{' * DEPTH + 'x = 1' + '}' * DEPTH
+           + '\nreal z\nescreva(x)\nfim_algoritmo')
+    items = LL1Parser(lexer).iter_parse(src)
+    assert type(next(items)).__name__ == 'VarDeclaration'
+    block = next(items)
+    assert _depth(block, lambda b: b.statements[0] if isinstance(b, Block) else None) == DEPTH + 1
+    assert [type(item).__name__ for item in items] == ['VarDeclaration', 'WriteStatement']
+
+    short = 'algoritmo t\ninteiro x\nx = 1\nreal z\nescreva(x)\nfim_algoritmo'
+    assert dump(list(LL1Parser(lexer).iter_parse(short))) == dump(list(ApolloParser(lexer).iter_parse(short)))
+    with pytest.raises(ParseError):
+        list(LL1Parser(lexer).iter_parse('algoritmo t\nx = = 1\nfim_algoritmo'))
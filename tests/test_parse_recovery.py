@@ -0,0 +1,77 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from lexer.apollo_lexer import ApolloLexer
+from parser.parser import ApolloParser, ParseError
+
+SOURCE = '''algoritmo t
+inteiro x
+x = (1 +
+escreva("a")
+se x < faca { x = 1 }
+enquanto x > 0 faca { x = x - ; escreva(x) }
+x = * 3
+escreva("fim")
+fim_algoritmo'''
+
+
+@pytest.fixture
+def lexer():
+    return ApolloLexer()
+
+
+def _lines(errors):
+    return [error.token.line for error in errors]
+
+
+def test_without_recovery_first_error_raises(lexer):
+    with pytest.raises(ParseError) as info:
+        ApolloParser(lexer).parse(SOURCE)
+    assert info.value.token.line == 4
+
+
+def test_recovery_reports_every_error_and_keeps_the_rest(lexer):
+    parser = ApolloParser(lexer, recover=True)
+    program = parser.parse(SOURCE)
+    assert _lines(parser.errors) == [4, 5, 6, 7]
+    assert [repr(s) for s in program.statements] == [
+        'WriteStatement(1 expressions)',
+        'WhileStatement(condition=BinaryOp(>, Variable(x), IntegerLiteral(0)))',
+        'WriteStatement(1 expressions)',
+    ]
+    # O corpo do enquanto continua depois do ';' que fechou o comando com erro
+    assert repr(program.statements[1].body.statements) == '[WriteStatement(1 expressions)]'
+
+
+def test_recovery_on_stray_tokens_and_missing_brace(lexer):
+    parser = ApolloParser(lexer, recover=True)
+    program = parser.parse('algoritmo t\nx = 1 ) }\nescreva(x)\n{ y = 2\nfim_algoritmo')
+    assert [e.message for e in parser.errors] == [
+        'Token inesperado: )', "Esperado '}' antes de 'fim_algoritmo'"]
+    assert [type(s).__name__ for s in program.statements] == ['Assignment', 'WriteStatement', 'Block']
+
+
+def test_error_cap_returns_partial_program(lexer):
+    parser = ApolloParser(lexer, recover=True, max_errors=2)
+    program = parser.parse(SOURCE)
+    assert _lines(parser.errors) == [4, 5]
+    assert len(program.declarations) == 1
+
+
+def test_recovery_in_streaming_parse(lexer):
+    parser = ApolloParser(lexer, window=4, recover=True)
+    items = list(parser.iter_parse(SOURCE))
+    assert len(items) == 4
+    assert _lines(parser.errors) == [4, 5, 6, 7]
+
+
+def test_compiler_reports_all_syntax_errors_in_one_pass(capsys):
+    from apollo_compiler import compile_apollo
+    for stream in (False, True):
+        assert not compile_apollo(SOURCE, stream=stream)
+        out = capsys.readouterr().out
+        assert 'Erros de parsing encontrados:' in out
+        assert [f'linha {line},' in out for line in (4, 5, 6, 7)] == [True] * 4
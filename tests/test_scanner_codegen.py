@@ -0,0 +1,65 @@
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from lexer.apollo_lexer import ApolloLexer
+from scanner_codegen import load_generated_scanner, write_scanner_module
+
+EXAMPLES = os.path.join(os.path.dirname(__file__), '..', 'examples')
+ALPHABET = 'abxyz_019+-.<>=!*/(){}[]:,;"#\n \térá€&|'
+
+
+@pytest.fixture
+def generated(tmp_path, monkeypatch):
+    """Lexer usando um scanner gerado em tmp_path, e o lexer por tabelas para comparar"""
+    table_lexer = ApolloLexer()
+    write_scanner_module(table_lexer.tables, str(tmp_path / '_scanner_gen_teste.py'))
+    monkeypatch.syspath_prepend(str(tmp_path))
+    scan = load_generated_scanner(table_lexer.tables, '_scanner_gen_teste')
+    assert scan is not None
+    lexer = ApolloLexer()
+    lexer._scan = scan
+    table_lexer._scan = table_lexer.tables.scan
+    return lexer, table_lexer
+
+
+def test_generated_scan_matches_tables(generated):
+    lexer, table_lexer = generated
+    rng = random.Random(41)
+    tables = table_lexer.tables
+    for _ in range(2000):
+        classes = tables.classify(''.join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 30))))
+        pos = rng.randint(0, len(classes))
+        end = rng.randint(pos, len(classes))
+        assert lexer._scan(classes, pos, end) == tables.scan(classes, pos, end)
+
+
+@pytest.mark.parametrize("name", ['exemplo_simples.apl', 'exemplo_completo.apl'])
+def test_generated_lexer_matches_tables_on_examples(generated, name):
+    lexer, table_lexer = generated
+    with open(os.path.join(EXAMPLES, name), encoding='utf-8') as f:
+        src = f.read()
+    assert lexer.tokenize(src) == table_lexer.tokenize(src)
+    assert lexer.tokenize_compact(src).tokens() == table_lexer.tokenize(src)
+
+
+def test_generated_lexer_matches_tables_on_random_inputs(generated):
+    lexer, table_lexer = generated
+    rng = random.Random(43)
+    for _ in range(1000):
+        src = ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 60)))
+        assert lexer.tokenize(src) == table_lexer.tokenize(src), repr(src)
+
+
+def test_stale_or_missing_module_falls_back(tmp_path, monkeypatch):
+    tables = ApolloLexer().tables
+    path = tmp_path / '_scanner_gen_velho.py'
+    write_scanner_module(tables, str(path))
+    path.write_text(path.read_text(encoding='utf-8').replace('TABLES_DIGEST = ', 'TABLES_DIGEST = "x" + '),
+                    encoding='utf-8')
+    monkeypatch.syspath_prepend(str(tmp_path))
+    assert load_generated_scanner(tables, '_scanner_gen_velho') is None
+    assert load_generated_scanner(tables, '_scanner_gen_inexistente') is None
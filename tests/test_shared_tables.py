@@ -0,0 +1,86 @@
+import dataclasses
+import os
+import random
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from lexer.apollo_lexer import ApolloLexer, LexerTables, TokenType
+
+ALPHABET = 'abxyz_019+-.<>=!*/(){}[]:,;"#\n \térá€&|'
+
+
+def _sources(seed, count=200):
+    rng = random.Random(seed)
+    return [''.join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 80))) for _ in range(count)]
+
+
+def _run_threads(target, count=8):
+    errors = []
+
+    def run(index):
+        try:
+            target(index)
+        except BaseException as error:  # repassado para a thread do teste
+            errors.append(error)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+
+
+def test_lexers_share_default_tables():
+    first, second = ApolloLexer(), ApolloLexer(single_pass=False)
+    assert first.shared is second.shared is LexerTables.default()
+    assert first.tables is second.tables
+    assert first.interner is not second.interner
+    assert second.afds is ApolloLexer(single_pass=False).afds
+
+
+def test_tables_are_frozen():
+    tables = LexerTables.default()
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        tables.keywords = frozenset()
+    assert isinstance(tables.operators, frozenset)
+
+
+def test_custom_tables_change_the_language():
+    tables = LexerTables(keywords=LexerTables.default().keywords | {'retorne'})
+    tokens = ApolloLexer(tables=tables).tokenize('retorne x')
+    assert tokens[0].type == TokenType.KEYWORD
+    assert ApolloLexer().tokenize('retorne x')[0].type == TokenType.IDENTIFIER
+
+
+def test_concurrent_contexts_over_shared_tables():
+    sources = _sources(51)
+    expected = [ApolloLexer().tokenize(src) for src in sources]
+
+    def work(index):
+        lexer = ApolloLexer()
+        order = list(range(len(sources)))
+        random.Random(index).shuffle(order)
+        for i in order:
+            assert lexer.tokenize(sources[i]) == expected[i]
+            assert lexer.tokenize_compact(sources[i]).tokens() == expected[i]
+
+    _run_threads(work)
+
+
+def test_one_lexer_used_from_many_threads():
+    lexer = ApolloLexer()
+    sources = [' '.join(f'nome{i}_{j}' for j in range(50)) for i in range(8)]
+
+    def work(index):
+        for _ in range(20):
+            tokens = lexer.tokenize(sources[index], skip_trivia=True)
+            for token in tokens[:-1]:
+                assert lexer.interner.name(token.symbol_id) == token.value
+
+    _run_threads(work)
+    assert len(lexer.interner) == len(set(lexer.interner.names))
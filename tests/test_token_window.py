@@ -0,0 +1,85 @@
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from lexer.apollo_lexer import ApolloLexer, LexerInterface, TokenType, TokenWindow
+from parser.parser import ApolloParser
+from codegen.llvm_generator import LLVMGenerator
+
+EXAMPLES = os.path.join(os.path.dirname(__file__), '..', 'examples')
+
+
+@pytest.fixture
+def lexer():
+    return ApolloLexer()
+
+
+def test_iter_tokens_matches_tokenize(lexer):
+    rng = random.Random(3)
+    alphabet = 'abx_19+-.<>=!(){};"#\n \té'
+    for _ in range(300):
+        src = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 50)))
+        assert list(lexer.iter_tokens(src)) == lexer.tokenize(src), repr(src)
+        assert list(lexer.iter_tokens(src, skip_trivia=True)) == lexer.tokenize(src, skip_trivia=True)
+
+
+def test_window_discards_oldest_and_reads_lazily(lexer):
+    consumed = []
+
+    def tokens():
+        for token in lexer.iter_tokens('a b c d e f g', skip_trivia=True):
+            consumed.append(token)
+            yield token
+
+    window = TokenWindow(tokens(), capacity=3)
+    assert window[1].value == 'b'
+    assert len(consumed) == 2
+    assert window[4].value == 'e'
+    assert (window.start, window.end, window.capacity) == (2, 5, 3)
+    with pytest.raises(LookupError):
+        window[1]
+    assert window[7].type == TokenType.EOF
+    with pytest.raises(IndexError):
+        window[8]
+
+
+def test_window_grows_while_pinned(lexer):
+    window = TokenWindow(lexer.iter_tokens('a b c d e f g h i j k l', skip_trivia=True), capacity=2)
+    window.pin(1)
+    assert window[6].value == 'g'
+    assert window[1].value == 'b'
+    assert window.capacity == 8
+    window.unpin(1)
+    assert window[12].type == TokenType.EOF
+    assert window.start == 12 - 8 + 1
+
+
+def test_interface_mark_reset_and_peek(lexer):
+    lexer.reset('x = 10 + 20')
+    interface = LexerInterface(lexer, buffer_size=2)
+    assert interface.next_token().value == 'x'
+    mark = interface.mark()
+    assert [interface.peek_token(k).value for k in range(4)] == [' ', '=', ' ', '10']
+    for _ in range(6):
+        interface.next_token()
+    interface.reset_to(mark)
+    assert interface.next_token().value == ' '
+    assert interface.next_token().value == '='
+    interface.backtrack(1)
+    assert interface.next_token().value == '='
+    while interface.next_token().type != TokenType.EOF:
+        pass
+    assert interface.next_token().type == TokenType.EOF
+
+
+@pytest.mark.parametrize("name", ['exemplo_simples.apl', 'exemplo_completo.apl'])
+def test_parser_over_window_matches_buffer(lexer, name):
+    with open(os.path.join(EXAMPLES, name), encoding='utf-8') as f:
+        src = f.read()
+    expected = LLVMGenerator().generate(ApolloParser(lexer).parse(src))
+    parser = ApolloParser(lexer, window=4)
+    assert LLVMGenerator().generate(parser.parse(src)) == expected
+    assert parser.tokens.capacity == 4
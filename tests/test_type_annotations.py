@@ -0,0 +1,135 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from lexer.apollo_lexer import ApolloLexer
+from parser.parser import ApolloParser
+from parser.arena import ASTArena
+from parser.ast import Expression, Type
+from semantic.semantic_analyzer import SemanticAnalyzer
+from codegen.llvm_generator import LLVMGenerator
+
+SOURCE = '''algoritmo t
+inteiro n
+real media
+logico ok
+n = 3
+media = (n + 1) / 2.0
+media = n
+media = -media
+ok = (n > 2) == verdadeiro
+escreva(media, -n, ok)
+fim_algoritmo'''
+
+
+@pytest.fixture
+def lexer():
+    return ApolloLexer()
+
+
+def expressions(node):
+    """Todas as expressões da árvore, em pré-ordem"""
+    found = []
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, list):
+            stack.extend(reversed(current))
+            continue
+        if isinstance(current, Expression):
+            found.append(current)
+        for name in ('declarations', 'statements', 'value', 'initial_value', 'expressions',
+                     'left', 'right', 'operand', 'arguments'):
+            child = getattr(current, name, None)
+            if child is not None and not isinstance(child, (int, float, str, bool)):
+                stack.append(child)
+    return found
+
+
+def compile_source(program):
+    analyzer = SemanticAnalyzer()
+    assert analyzer.analyze(program) == []
+    symbols = {key: symbol.var_type for key, symbol in analyzer.current_scope.symbols.items()}
+    return LLVMGenerator().generate(program, symbols)
+
+
+def test_analyzer_annotates_every_expression(lexer):
+    program = ApolloParser(lexer).parse(SOURCE)
+    assert all(expr.resolved_type is None for expr in expressions(program))
+    SemanticAnalyzer().analyze(program)
+    assert all(expr.resolved_type is not None for expr in expressions(program))
+    division = program.statements[1].value
+    assert (division.resolved_type, division.left.resolved_type, division.left.left.resolved_type) == (
+        Type.REAL, Type.INTEGER, Type.INTEGER)
+    assert [e.resolved_type for e in program.statements[-1].expressions] == [Type.REAL, Type.INTEGER, Type.BOOLEAN]
+
+
+def test_codegen_reads_annotations_without_inferring(lexer, monkeypatch):
+    program = ApolloParser(lexer).parse(SOURCE)
+    SemanticAnalyzer().analyze(program)
+
+    def fail(self, expr):
+        raise AssertionError(f"tipo recalculado para {expr}")
+    monkeypatch.setattr(LLVMGenerator, 'infer_expression_type', fail)
+    LLVMGenerator().generate(program)
+
+
+def test_generated_code_uses_real_types(lexer):
+    code = compile_source(ApolloParser(lexer).parse(SOURCE)).splitlines()
+    # (n + 1) / 2.0: soma inteira convertida antes da divisão real
+    add = next(i for i, line in enumerate(code) if ' = add i32 ' in line)
+    assert 'sitofp i32' in code[add + 1] and 'fdiv double' in code[add + 2]
+    # inteiro atribuído a real, negação real, comparação de lógicos
+    assert sum('sitofp i32' in line for line in code) == 2
+    assert any('fneg double' in line for line in code)
+    assert any('icmp eq i1' in line for line in code)
+    # escreva(media) imprime double com %f
+    assert any('@printf' in line and ', double %' in line for line in code)
+    assert any('c"%f' in line for line in code)
+
+
+def test_unannotated_tree_infers_each_node_once(lexer, monkeypatch):
+    depth = 100
+    program = ApolloParser(lexer).parse(
+        'algoritmo t\nreal x\nescreva(' + '(' * depth + 'x' + ' + 1)' * depth + ')\nfim_algoritmo')
+    calls = []
+    original = LLVMGenerator.infer_expression_type
+
+    def counted(self, expr):
+        calls.append(expr)
+        return original(self, expr)
+    monkeypatch.setattr(LLVMGenerator, 'infer_expression_type', counted)
+    symbols = {lexer.interner.intern('x'): Type.REAL}
+    code = LLVMGenerator().generate(program, symbols)
+    assert len(calls) == len(expressions(program)) == 2 * depth + 1
+    assert code.count('fadd double') == depth
+
+    # Também numa arena, cujas visões são objetos novos a cada acesso
+    calls.clear()
+    assert LLVMGenerator().generate(ASTArena.from_tree(program).root(), symbols) == code
+    assert len(calls) == 2 * depth + 1
+
+
+def test_inferred_types_do_not_leak_between_generations(lexer):
+    src = 'algoritmo t\nreal x\nescreva(x + 1)\nfim_algoritmo'
+    program = ApolloParser(lexer).parse(src)
+    generator = LLVMGenerator()
+    generator.generate(program)  # sem tabela: x é inteiro
+    as_real = generator.generate(program, {'x': Type.REAL})
+    assert all(expr.resolved_type is None for expr in expressions(program))
+    assert as_real == LLVMGenerator().generate(ApolloParser(lexer).parse(src), {'x': Type.REAL})
+    assert 'fadd double' in as_real and ' = add i32 ' not in as_real
+
+
+def test_arena_keeps_annotations(lexer):
+    program = ApolloParser(lexer).parse(SOURCE)
+    arena = ASTArena.from_tree(program)
+    root = arena.root()
+    # Anotações feitas nas visões ficam na arena
+    assert compile_source(root) == compile_source(program)
+    assert [e.resolved_type for e in expressions(arena.root())] == [e.resolved_type for e in expressions(program)]
+    # e as de uma árvore já analisada são copiadas para ela
+    copied = ASTArena.from_tree(program).root()
+    assert [e.resolved_type for e in expressions(copied)] == [e.resolved_type for e in expressions(program)]
@@ -0,0 +1,102 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from lexer.apollo_lexer import ApolloLexer
+from parser.parser import ApolloParser
+from parser.arena import ASTArena
+from parser import ast
+from parser.visitor import ASTVisitor
+from semantic.semantic_analyzer import SemanticAnalyzer
+from codegen.llvm_generator import LLVMGenerator
+
+NODE_CLASSES = [cls for cls in vars(ast).values()
+                if isinstance(cls, type) and issubclass(cls, ast.ASTNode) and 'accept' in vars(cls)
+                and not getattr(cls.accept, '__isabstractmethod__', False)]
+
+
+class Recorder:
+    """Visitor que só registra qual método accept chamou"""
+
+    def __getattr__(self, name):
+        return lambda node: name
+
+
+class Names(ASTVisitor):
+    def generic_visit(self, node):
+        return 'generic'
+
+
+for _cls in NODE_CLASSES:
+    _name = _cls.accept(None, Recorder())
+    setattr(Names, _name, lambda self, node, name=_name: name)
+
+
+@pytest.fixture
+def lexer():
+    return ApolloLexer()
+
+
+@pytest.mark.parametrize("node_class", NODE_CLASSES, ids=lambda cls: cls.__name__)
+def test_dispatch_matches_accept(node_class):
+    node = object.__new__(node_class)
+    assert Names().visit(node) == node.accept(Recorder())
+    assert Names._handlers[node_class] is getattr(Names, node.accept(Recorder()))
+
+
+def test_missing_handler_falls_back_and_tables_are_per_class():
+    class OnlyVariables(ASTVisitor):
+        def visit_variable(self, node):
+            return node.name
+
+    class Empty(ASTVisitor):
+        pass
+
+    variable, literal = ast.Variable('x'), ast.IntegerLiteral(1)
+    assert OnlyVariables().visit(variable) == 'x'
+    assert OnlyVariables().visit(literal) is None
+    assert Empty().visit(variable) is None
+    assert set(OnlyVariables._handlers) == {ast.Variable, ast.IntegerLiteral}
+    assert set(Empty._handlers) == {ast.Variable}
+    assert ASTVisitor._handlers == {}
+
+
+def test_arena_views_dispatch_like_their_node_class(lexer):
+    src = 'algoritmo t\ninteiro x\nx = -(x + 1)\nse x > 0 faca { escreva("p", x) }\nfim_algoritmo'
+    program = ApolloParser(lexer).parse(src)
+    root = ASTArena.from_tree(program).root()
+    assert type(root.statements[0]) is not ast.Assignment
+    assert Names().visit(root.statements[0].value) == 'visit_unary_op'
+    assert Names().visit(root.statements[1].then_block) == 'visit_block'
+
+    analyzer = SemanticAnalyzer()
+    assert analyzer.analyze(root) == []
+    symbols = {key: symbol.var_type for key, symbol in analyzer.current_scope.symbols.items()}
+    assert LLVMGenerator().generate(root, symbols) == LLVMGenerator().generate(program, symbols)
+
+
+def test_phases_dispatch_through_the_table(lexer, monkeypatch):
+    src = 'algoritmo t\ninteiro x\nreal z\nx = leia_numero()\nz = -x * 2.5\nescreva(z, "ok", verdadeiro)\nfim_algoritmo'
+    program = ApolloParser(lexer).parse(src)
+    unanalyzed = ApolloParser(lexer).parse(src)
+    # Nenhuma fase volta a testar a classe de cada nó com isinstance
+    import builtins
+    original = builtins.isinstance
+    checked = []
+
+    def counting(obj, classes):
+        if original(obj, ast.ASTNode):
+            checked.append((type(obj).__name__, classes))
+        return original(obj, classes)
+    monkeypatch.setattr(builtins, 'isinstance', counting)
+    analyzer = SemanticAnalyzer()
+    assert analyzer.analyze(program) == []
+    symbols = {key: s.var_type for key, s in analyzer.current_scope.symbols.items()}
+    expected = LLVMGenerator().generate(program, symbols)
+    # Nem a inferência de tipos de uma árvore não analisada (ex.: vinda do cache de AST)
+    assert LLVMGenerator().generate(unanalyzed, symbols) == expected
+    monkeypatch.undo()
+    # só a atribuição especial de leitura ainda olha o tipo do valor
+    assert all(classes is ast.FunctionCall for _, classes in checked)